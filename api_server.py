@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import json
+import logging
+import re
+import signal
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from config import Config
+from async_database import AsyncDatabaseHandler
+from database import DatabaseHandler, ValidationError
+from session import SessionTokens
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 16384
+
+# Wording for request body type errors
+JSON_TYPE_NAMES = {int: "an integer", str: "a string", dict: "an object"}
+
+class Request:
+    """A parsed HTTP request as seen by route handlers"""
+    __slots__ = ('method', 'path', 'version', 'headers', 'query', 'body', 'params', 'user', 'source')
+
+    def __init__(self, method: str, path: str, version: str, headers: Dict[str, str],
+                 query: Dict[str, str], source: Optional[str]):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.query = query
+        self.body = b''
+        self.params: Tuple[str, ...] = ()
+        self.user: Optional[Dict[str, Any]] = None
+        self.source = source
+
+    def json(self) -> Dict[str, Any]:
+        """The body as a JSON object"""
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise ValidationError("Request body must be valid JSON")
+        if not isinstance(data, dict):
+            raise ValidationError("Request body must be a JSON object")
+        return data
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+class HTTPError(Exception):
+    """Raised by handlers to answer with an error status"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+Response = Tuple[int, Any]
+Handler = Callable[["ApiServer", Request], Awaitable[Response]]
+
+class ApiServer:
+    """Asyncio JSON HTTP/1.1 server over the library database
+
+    Connections are kept alive between requests and closed after
+    keepalive_timeout idle seconds; past max_connections new ones are
+    refused with a 503. Database calls go through AsyncDatabaseHandler,
+    whose bounded worker pool matches the connection pool, and each request
+    must be answered within request_timeout or gets a 504 (a call still
+    queued for a worker is dropped). Everything but /health and /api/login
+    needs an ``Authorization: Bearer`` session token, verified from the
+    token itself without a database lookup; a refreshed token is sent back
+    in the X-Session-Token header. Tokens are signed with Config.JWT_SECRET
+    (or the given SessionTokens), and the server will not start without one.
+    """
+
+    def __init__(self, db: Optional[DatabaseHandler] = None, host: Optional[str] = None,
+                 port: Optional[int] = None, max_connections: Optional[int] = None,
+                 request_timeout: Optional[float] = None, keepalive_timeout: Optional[float] = None,
+                 max_body: Optional[int] = None, tokens: Optional[SessionTokens] = None):
+        # Refuses to run without a configured JWT_SECRET (SessionTokens raises ValueError)
+        self.tokens = tokens or SessionTokens()
+        if self.tokens.ephemeral:
+            raise ValueError("The API server needs JWT_SECRET configured, not a per-process key")
+        self.db = AsyncDatabaseHandler(db)
+        self.host = host or Config.API_HOST
+        self.port = Config.API_PORT if port is None else port
+        self.max_connections = max(max_connections or Config.API_MAX_CONNECTIONS, 1)
+        self.request_timeout = request_timeout or Config.API_REQUEST_TIMEOUT
+        self.keepalive_timeout = keepalive_timeout or Config.API_KEEPALIVE_TIMEOUT
+        self.max_body = max_body or Config.API_MAX_BODY_BYTES
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = 0
+        self._tasks = set()
+        self._metrics = {'connections': 0, 'rejected': 0, 'requests': 0, 'errors': 0, 'timeouts': 0}
+
+    async def start(self) -> None:
+        """Listen on host and port; port 0 picks a free one"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"API server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening, drop open connections and release the database workers"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._metrics, 'open_connections': self._connections, 'database': self.db.stats()}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info('peername')
+        source = peer[0] if peer else None
+        if self._connections >= self.max_connections:
+            self._metrics['rejected'] += 1
+            await self._respond(writer, 503, {'error': "Server busy"}, keep_alive=False)
+            await self._close(writer)
+            return
+
+        self._connections += 1
+        self._metrics['connections'] += 1
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {'error': "Request headers too large"}, keep_alive=False)
+                    break
+
+                try:
+                    request = self._parse_head(head, source)
+                    length = int(request.headers.get('content-length', '0'))
+                except ValueError:
+                    await self._respond(writer, 400, {'error': "Malformed request"}, keep_alive=False)
+                    break
+                if 'transfer-encoding' in request.headers:
+                    await self._respond(writer, 411, {'error': "Content-Length required"}, keep_alive=False)
+                    break
+                if length > self.max_body or length < 0:
+                    await self._respond(writer, 413, {'error': "Request body too large"}, keep_alive=False)
+                    break
+                if length:
+                    try:
+                        request.body = await asyncio.wait_for(reader.readexactly(length), self.request_timeout)
+                    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                status, payload, headers = await self._dispatch(request)
+                await self._respond(writer, status, payload, request.keep_alive, headers)
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"API connection from {source} failed: {e}")
+        finally:
+            self._connections -= 1
+            self._tasks.discard(task)
+            await self._close(writer)
+
+    @staticmethod
+    def _parse_head(head: bytes, source: Optional[str]) -> Request:
+        lines = head.decode('latin-1').split("\r\n")
+        method, target, version = lines[0].split(" ")
+        if not version.startswith("HTTP/1."):
+            raise ValueError(f"Unsupported protocol {version}")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        return Request(method.upper(), unquote(url.path), version, headers, query, source)
+
+    async def _dispatch(self, request: Request) -> Tuple[int, Any, Dict[str, str]]:
+        self._metrics['requests'] += 1
+        headers: Dict[str, str] = {}
+        handler, allowed = self._route(request)
+        if handler is None:
+            if allowed:
+                headers['Allow'] = ", ".join(allowed)
+                return 405, {'error': "Method not allowed"}, headers
+            return 404, {'error': "Not found"}, headers
+
+        if handler not in PUBLIC_HANDLERS:
+            scheme, _, token = request.headers.get('authorization', '').partition(" ")
+            refreshed = self.tokens.refresh(token) if scheme.lower() == 'bearer' else None
+            request.user = self.tokens.get_user(refreshed) if refreshed else None
+            if request.user is None:
+                headers['WWW-Authenticate'] = 'Bearer'
+                return 401, {'error': "Authentication required"}, headers
+            if refreshed != token:
+                headers['X-Session-Token'] = refreshed
+
+        try:
+            status, payload = await asyncio.wait_for(handler(self, request), self.request_timeout)
+        except asyncio.TimeoutError:
+            self._metrics['timeouts'] += 1
+            logger.warning(f"{request.method} {request.path} timed out after {self.request_timeout}s")
+            return 504, {'error': "Request timed out"}, headers
+        except HTTPError as e:
+            return e.status, {'error': str(e)}, headers
+        except ValidationError as e:
+            return 400, {'error': str(e)}, headers
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.error(f"{request.method} {request.path} failed: {e}")
+            return 500, {'error': "Internal server error"}, headers
+        return status, payload, headers
+
+    @staticmethod
+    def _route(request: Request) -> Tuple[Optional[Handler], List[str]]:
+        allowed = []
+        for method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(request.path)
+            if match:
+                if method == request.method:
+                    request.params = match.groups()
+                    return handler, []
+                allowed.append(method)
+        return None, allowed
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool,
+                       headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 "Content-Type: application/json",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if keep_alive:
+            lines.append(f"Keep-Alive: timeout={int(self.keepalive_timeout)}")
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter) -> None:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+    # Handlers
+    async def health(self, request: Request) -> Response:
+        return 200, {'status': 'ok', **self.stats()}
+
+    async def login(self, request: Request) -> Response:
+        data = request.json()
+        try:
+            user = await self.db.authenticate_user(data.get('username'), data.get('password'), request.source)
+        except ValidationError as e:
+            raise HTTPError(401, str(e))
+        if user is None:
+            raise HTTPError(401, "Invalid username or password")
+        user.pop('token', None)
+        token = self.tokens.issue(user)
+        return 200, {'token': token, 'expires_in': self.tokens.timeout, 'user': user}
+
+    async def search_books(self, request: Request) -> Response:
+        query, limit, cursor = self._page_args(request)
+        if query:
+            return 200, await self.db.search_books_page(query, limit, cursor)
+        return 200, await self.db.get_books_page(limit, cursor)
+
+    async def get_book(self, request: Request) -> Response:
+        book = await self.db.get_book_by_isbn(request.params[0])
+        if book is None:
+            raise HTTPError(404, "Book not found")
+        return 200, book
+
+    async def search_members(self, request: Request) -> Response:
+        query, limit, cursor = self._page_args(request)
+        return 200, await self.db.search_members(query, limit, cursor)
+
+    async def get_member(self, request: Request) -> Response:
+        member = await self.db.get_member(int(request.params[0]))
+        if member is None:
+            raise HTTPError(404, "Member not found")
+        return 200, member
+
+    async def issue(self, request: Request) -> Response:
+        """Issue one 'isbn', or a basket of 'isbns', to 'member_id'"""
+        data = request.json()
+        member_id = self._field(data, 'member_id', int)
+        if 'isbns' in data:
+            isbns = self._list_field(data, 'isbns', str)
+            return 200, {'results': await self.db.issue_books(member_id, isbns)}
+        isbn = self._field(data, 'isbn', str)
+        await self.db.issue_book(member_id, isbn)
+        return 201, {'member_id': member_id, 'isbn': isbn, 'success': True}
+
+    async def return_(self, request: Request) -> Response:
+        """Return one loan ('member_id' and 'isbn') or a list of them as 'items'"""
+        data = request.json()
+        if 'items' in data:
+            items = self._list_field(data, 'items', dict)
+            for item in items:
+                self._field(item, 'member_id', int)
+                self._field(item, 'isbn', str)
+            return 200, {'results': await self.db.return_books(items)}
+        member_id, isbn = self._field(data, 'member_id', int), self._field(data, 'isbn', str)
+        await self.db.return_book(member_id, isbn)
+        return 200, {'member_id': member_id, 'isbn': isbn, 'success': True}
+
+    async def overdue(self, request: Request) -> Response:
+        return 200, {'items': await self.db.get_overdue_loans()}
+
+    @staticmethod
+    def _field(data: Dict[str, Any], name: str, kind: type) -> Any:
+        """A required body field of the given JSON type"""
+        value = data.get(name)
+        # bool is an int subclass, but true is not a member id
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ValidationError(f"'{name}' must be {JSON_TYPE_NAMES[kind]}")
+        return value
+
+    @staticmethod
+    def _list_field(data: Dict[str, Any], name: str, kind: type) -> List[Any]:
+        """A body field holding a list whose elements are all of the given JSON type"""
+        values = data.get(name)
+        if not isinstance(values, list) or not all(isinstance(value, kind) for value in values):
+            raise ValidationError(f"'{name}' must be a list where each entry is {JSON_TYPE_NAMES[kind]}")
+        return values
+
+    @staticmethod
+    def _page_args(request: Request) -> Tuple[str, Optional[int], Optional[str]]:
+        limit = request.query.get('limit')
+        if limit is not None and not limit.isdigit():
+            raise ValidationError("Page size must be an integer")
+        return request.query.get('q', ''), int(limit) if limit else None, request.query.get('cursor') or None
+
+ROUTES: List[Tuple[str, "re.Pattern[str]", Handler]] = [
+    ('GET', re.compile(r'/health'), ApiServer.health),
+    ('POST', re.compile(r'/api/login'), ApiServer.login),
+    ('GET', re.compile(r'/api/books'), ApiServer.search_books),
+    ('GET', re.compile(r'/api/books/([^/]+)'), ApiServer.get_book),
+    ('GET', re.compile(r'/api/members'), ApiServer.search_members),
+    ('GET', re.compile(r'/api/members/(\d+)'), ApiServer.get_member),
+    ('POST', re.compile(r'/api/loans'), ApiServer.issue),
+    ('POST', re.compile(r'/api/returns'), ApiServer.return_),
+    ('GET', re.compile(r'/api/overdue'), ApiServer.overdue),
+]
+
+PUBLIC_HANDLERS = (ApiServer.health, ApiServer.login)
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Run the API server until SIGINT or SIGTERM"""
+    server = ApiServer(host=host, port=port)
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LibraManage headless JSON API")
+    parser.add_argument('--host', default=None, help=f"Bind address (default {Config.API_HOST})")
+    parser.add_argument('--port', type=int, default=None, help=f"Port (default {Config.API_PORT})")
+    args = parser.parse_args()
+    Config.setup_logging()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from config import Config
+from database import DatabaseHandler
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseHandler:
+    """Awaitable facade over DatabaseHandler for asyncio front ends
+
+    Calls run on a bounded thread pool sized to the connection pool, so
+    workers never queue behind each other for a connection. Every call takes
+    an optional timeout; when it expires or the awaiting task is cancelled,
+    a call that has not started yet is dropped from the executor queue.
+    """
+
+    def __init__(self, db: Optional[DatabaseHandler] = None, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self._owns_db = db is None
+        self.db = db if db is not None else DatabaseHandler()
+        self.max_workers = max(max_workers or Config.ASYNC_DB_WORKERS, 1)
+        self.timeout = Config.ASYNC_DB_TIMEOUT if timeout is None else timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="db-async")
+        self._lock = threading.Lock()
+        self._metrics = {'calls': 0, 'in_flight': 0, 'completed': 0, 'failed': 0,
+                         'timeouts': 0, 'cancelled': 0}
+
+    async def __aenter__(self) -> "AsyncDatabaseHandler":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop accepting calls, drop queued ones and close an owned handler"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_db:
+            await asyncio.get_running_loop().run_in_executor(None, self.db.close)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call, timeout and cancellation counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['max_workers'] = self.max_workers
+        return metrics
+
+    async def run(self, func: Callable[..., Any], *args: Any,
+                  timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run a blocking callable on the executor and await its result
+
+        Raises:
+            asyncio.TimeoutError: If the call does not finish within timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        self._count('calls', 'in_flight')
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        try:
+            result = await asyncio.wait_for(future, timeout if timeout and timeout > 0 else None)
+        except asyncio.TimeoutError:
+            self._count('timeouts')
+            logger.warning(f"Database call {getattr(func, '__name__', func)} timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            self._count('cancelled')
+            raise
+        except Exception:
+            self._count('failed')
+            raise
+        else:
+            self._count('completed')
+            return result
+        finally:
+            with self._lock:
+                self._metrics['in_flight'] -= 1
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._metrics[name] += 1
+
+    # Authentication
+    async def authenticate_user(self, username: str, password: str, source: Optional[str] = None, *,
+                                timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.authenticate_user, username, password, source, timeout=timeout)
+
+    # Catalog
+    async def search_books(self, query: str, limit: Optional[int] = None, *,
+                           timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.search_books, query, limit, timeout=timeout)
+
+    async def search_books_page(self, query: str, limit: Optional[int] = None, cursor: Optional[str] = None, *,
+                                timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self.db.search_books_page, query, limit, cursor, timeout=timeout)
+
+    async def get_books_page(self, limit: Optional[int] = None, cursor: Optional[str] = None, *,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self.db.get_books_page, limit, cursor, timeout=timeout)
+
+    async def get_book_by_isbn(self, isbn: str, *,
+                               timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_book_by_isbn, isbn, timeout=timeout)
+
+    async def get_book_loan_history(self, isbn: str, *,
+                                    timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.get_book_loan_history, isbn, timeout=timeout)
+
+    async def get_categories(self, *, timeout: Optional[float] = None) -> List[str]:
+        return await self.run(self.db.get_categories, timeout=timeout)
+
+    async def add_book(self, title: str, author: str, isbn: str, quantity: int, category: str = 'General', *,
+                       timeout: Optional[float] = None) -> None:
+        return await self.run(self.db.add_book, title, author, isbn, quantity, category, timeout=timeout)
+
+    async def add_books_bulk(self, rows: Iterable[Dict[str, Any]], chunk_size: Optional[int] = None, *,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self.db.add_books_bulk, rows, chunk_size, timeout=timeout)
+
+    # Members
+    async def get_member(self, member_id: int, *,
+                         timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_member, member_id, timeout=timeout)
+
+    async def get_members_page(self, limit: Optional[int] = None, cursor: Optional[str] = None, *,
+                               timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self.db.get_members_page, limit, cursor, timeout=timeout)
+
+    async def search_members(self, query: str, limit: Optional[int] = None, cursor: Optional[str] = None, *,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self.db.search_members, query, limit, cursor, timeout=timeout)
+
+    async def add_member(self, name: str, email: str, phone: str, *,
+                         timeout: Optional[float] = None) -> None:
+        return await self.run(self.db.add_member, name, email, phone, timeout=timeout)
+
+    # Circulation
+    async def issue_book(self, member_id: int, isbn: str, *, timeout: Optional[float] = None) -> None:
+        return await self.run(self.db.issue_book, member_id, isbn, timeout=timeout)
+
+    async def return_book(self, member_id: int, isbn: str, *, timeout: Optional[float] = None) -> None:
+        return await self.run(self.db.return_book, member_id, isbn, timeout=timeout)
+
+    async def issue_books(self, member_id: int, isbns: Iterable[str], *,
+                          timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.issue_books, member_id, list(isbns), timeout=timeout)
+
+    async def return_books(self, items: Iterable[Dict[str, Any]], *,
+                           timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.return_books, list(items), timeout=timeout)
+
+    async def get_overdue_loans(self, *, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.get_overdue_loans, timeout=timeout)
+
+    # Reporting
+    async def get_dashboard_snapshot(self, *, timeout: Optional[float] = None) -> Dict[str, int]:
+        return await self.run(self.db.get_dashboard_snapshot, timeout=timeout)
+
+    async def execute_query(self, query: str, params: tuple = (), *,
+                            timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.db.execute_query, query, params, timeout=timeout)
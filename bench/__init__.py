@@ -0,0 +1,4 @@
+"""Performance benchmarks for the catalog and circulation hot paths
+
+Run from the project root with ``python -m bench``; see ``python -m bench --help``.
+"""
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from config import Config
+from database import DatabaseHandler
+from datagen import TITLE_WORDS, DatasetSpec, generate
+
+# Benchmarked DatabaseHandler methods, in run order; return_book closes generated loans
+OPERATIONS = ('add_book', 'issue_book', 'return_book', 'search_books', 'get_overdue_loans',
+              'get_dashboard_snapshot', 'get_books_by_category', 'get_monthly_loans')
+# Whole-table reads that run heavy_iterations times instead of iterations
+HEAVY_OPERATIONS = ('get_overdue_loans', 'get_books_by_category', 'get_monthly_loans')
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '1M' -> 1000000"""
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of pre-sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+def measure(func: Callable[..., Any], calls: List[Tuple]) -> Dict[str, Any]:
+    """Time func once per argument tuple
+
+    Returns:
+        Iterations, wall time, throughput and latency percentiles in ms
+    """
+    samples = []
+    start = time.perf_counter()
+    for args in calls:
+        call_start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - call_start) * 1000)
+    total = time.perf_counter() - start
+    samples.sort()
+    return {
+        'iterations': len(samples),
+        'total_seconds': round(total, 6),
+        'ops_per_second': round(len(samples) / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p99_ms': round(percentile(samples, 99), 4),
+        'mean_ms': round(sum(samples) / len(samples), 4) if samples else 0.0,
+        'max_ms': round(samples[-1], 4) if samples else 0.0,
+    }
+
+def run_size(size: int, workdir: str, iterations: int, heavy_iterations: int,
+             seed: int = 0, operations: Sequence[str] = OPERATIONS) -> Dict[str, Any]:
+    """Generate a fresh library with size books and size loans, then time each operation"""
+    path = os.path.join(workdir, f"bench-{size}.db")
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    previous_path, Config.DB_PATH = Config.DB_PATH, path
+    db = DatabaseHandler()
+    try:
+        dataset = generate(db, DatasetSpec(books=size, members=max(size // 10, 100), loans=size), seed)
+
+        rng = random.Random(seed)
+        free_isbns = [row['isbn'] for row in db.execute_query(
+            "SELECT isbn FROM books WHERE available > 0 ORDER BY id DESC LIMIT ?", (iterations,))]
+        open_loans = [(row['member_id'], row['isbn']) for row in db.execute_query('''
+            SELECT t.member_id, b.isbn FROM transactions t JOIN books b ON b.id = t.book_id
+            WHERE t.return_date IS NULL
+            GROUP BY t.member_id, t.book_id
+            LIMIT ?
+        ''', (iterations * 10,))]
+        calls: Dict[str, List[Tuple]] = {
+            # 979 prefix: generated books all use 978
+            'add_book': [(f"Bench Book {n}", "Bench Author", f"979{n:010d}", 1, "Bench")
+                         for n in range(iterations)],
+            'issue_book': [(rng.randint(1, dataset['members']), isbn) for isbn in free_isbns],
+            'return_book': rng.sample(open_loans, min(iterations, len(open_loans))),
+            'search_books': [(rng.choice(TITLE_WORDS),) for _ in range(iterations)],
+            'get_dashboard_snapshot': [()] * iterations,
+        }
+        for name in HEAVY_OPERATIONS:
+            calls[name] = [()] * heavy_iterations
+
+        results = {name: measure(getattr(db, name), calls[name]) for name in operations}
+        return {
+            'size': size,
+            'rows': {name: dataset[name] for name in ('books', 'members', 'loans')},
+            'open_loans': dataset['open_loans'],
+            'overdue_loans': dataset['overdue_loans'],
+            'seed_seconds': dataset['seconds'],
+            'database_bytes': os.path.getsize(path),
+            'results': results,
+        }
+    finally:
+        db.close()
+        Config.DB_PATH = previous_path
+
+def environment() -> Dict[str, Any]:
+    """Where and on what code the run happened, for comparing runs"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except Exception:
+        commit = ''
+    return {
+        'started_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'serialize_writes': Config.DB_SERIALIZE_WRITES,
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Per-operation p50, p99 and throughput changes against an earlier report"""
+    before = {(run['size'], name): result for run in baseline.get('runs', [])
+              for name, result in run['results'].items()}
+    lines = []
+    for run in current['runs']:
+        for name, result in run['results'].items():
+            old = before.get((run['size'], name))
+            if not old:
+                continue
+            changes = ', '.join(
+                f"{key} {old[key]:g} -> {result[key]:g} ({(result[key] / old[key] - 1) * 100:+.1f}%)"
+                for key in ('p50_ms', 'p99_ms', 'ops_per_second') if old[key])
+            lines.append(f"{run['size']:>9} {name:<24} {changes}")
+    return lines
+
+def format_run(run: Dict[str, Any]) -> str:
+    lines = [f"{run['size']} books/loans (generated in {run['seed_seconds']:.1f}s):"]
+    for name, result in run['results'].items():
+        lines.append(f"  {name:<24} {result['ops_per_second']:>10.1f} ops/s"
+                     f"  p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms")
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench",
+                                     description="Benchmark LibraManage catalog and circulation hot paths")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated database sizes, e.g. 10k,100k,1M (default: %(default)s)")
+    parser.add_argument('--iterations', type=int, default=200, help="Calls per operation (default: %(default)s)")
+    parser.add_argument('--heavy-iterations', type=int, default=10,
+                        help=f"Calls for {', '.join(HEAVY_OPERATIONS)} (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for data and call arguments")
+    parser.add_argument('--workdir', help="Directory for the benchmark databases (default: a temporary one)")
+    parser.add_argument('--output', '-o', default='-', help="JSON report path, '-' for stdout (default)")
+    parser.add_argument('--compare', help="Earlier JSON report to print changes against")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    report = {'environment': environment(),
+              'settings': {'iterations': args.iterations, 'heavy_iterations': args.heavy_iterations,
+                           'seed': args.seed},
+              'runs': []}
+    with tempfile.TemporaryDirectory(prefix="libra-bench-") as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for size in sizes:
+            run = run_size(size, workdir, args.iterations, args.heavy_iterations, args.seed)
+            report['runs'].append(run)
+            print(format_run(run), file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print("\n".join(["Changes against " + args.compare + ":"] + compare(json.load(f), report)),
+                  file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    return 0
@@ -0,0 +1,102 @@
+import copy
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL
+
+    Values are stored and returned as shallow copies so callers can't mutate
+    cached rows. None is never cached, so lookups of missing records always
+    go back to the loader.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(max_size or Config.CACHE_MAX_SIZE, 1)
+        self.ttl = Config.CACHE_TIMEOUT if ttl is None else ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so in-flight loads can't store stale rows
+        self._generation = 0
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a copy of the cached value, or default on miss/expiry"""
+        value = self._lookup(key)
+        return default if value is _MISSING else copy.copy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if value is None:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Read-through lookup: call loader on a miss and cache its result"""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return copy.copy(value)
+
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+        return copy.copy(value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self._metrics['invalidations'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._metrics['invalidations'] += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['size'] = len(self._data)
+        metrics['max_size'] = self.max_size
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = metrics['hits'] / lookups if lookups else 0.0
+        return metrics
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._data.move_to_end(key)
+                    self._metrics['hits'] += 1
+                    return value
+                del self._data[key]
+                self._metrics['expirations'] += 1
+            self._metrics['misses'] += 1
+            return _MISSING
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        # Caller holds the lock
+        self._data[key] = (self._clock() + self.ttl, copy.copy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._metrics['evictions'] += 1
@@ -0,0 +1,106 @@
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Rendered dashboards kept per (data version, theme)
+CHART_CACHE_SIZE = 4
+
+ChartKey = Tuple[int, bool]
+
+class ChartService:
+    """Render the dashboard charts to PNG off the UI thread
+
+    Rendering uses matplotlib's Agg backend through one reused Figure, so it
+    is safe on worker threads and never touches Tk. Results are cached by the
+    database data_version (bumped by triggers when books or loans change)
+    and theme, so revisiting the dashboard with unchanged data costs a single
+    row lookup. matplotlib is imported on the first render.
+    """
+
+    def __init__(self, db: Any, figsize: Tuple[float, float] = (12, 4), dpi: int = 100):
+        self.db = db
+        self.figsize = figsize
+        self.dpi = dpi
+        self._figure = None
+        self._canvas = None
+        self._cache: "OrderedDict[ChartKey, bytes]" = OrderedDict()
+        # Serializes use of the shared Figure
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'renders': 0}
+
+    def render(self, dark: bool = False) -> Optional[Tuple[ChartKey, bytes]]:
+        """Return (cache key, PNG bytes) for the current data, rendering only on change
+
+        Returns None when matplotlib is not installed.
+        """
+        key = (self.db.get_data_version(), bool(dark))
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self._metrics['hits'] += 1
+                return key, png
+
+            try:
+                self._get_figure()
+            except ImportError:
+                logger.warning("matplotlib not found - charts will be disabled")
+                return None
+            categories = self.db.get_books_by_category()
+            monthly_loans = self.db.get_monthly_loans()
+            png = self._render_png(categories, monthly_loans, dark)
+            self._metrics['renders'] += 1
+            self._cache[key] = png
+            while len(self._cache) > CHART_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return key, png
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['cached'] = len(self._cache)
+        return metrics
+
+    def _get_figure(self):
+        if self._figure is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self._figure = Figure(figsize=self.figsize, dpi=self.dpi)
+            self._canvas = FigureCanvasAgg(self._figure)
+        return self._figure
+
+    def _render_png(self, categories: List[tuple], loans_data: List[tuple], dark: bool) -> bytes:
+        theme = Config.DARK_THEME if dark else Config.LIGHT_THEME
+        fig = self._get_figure()
+        fig.clear()
+        fig.set_facecolor(theme['card'])
+
+        # Books by category
+        ax1 = fig.add_subplot(121)
+        if categories:
+            ax1.pie([count for _, count in categories],
+                    labels=[cat or 'Uncategorized' for cat, _ in categories],
+                    autopct='%1.1f%%', textprops={'color': theme['text']})
+        ax1.set_title('Books by Category', color=theme['text'])
+
+        # Monthly loans trend, oldest month first
+        loans_data = list(reversed(loans_data))
+        ax2 = fig.add_subplot(122)
+        ax2.set_facecolor(theme['card'])
+        ax2.plot([date for date, _ in loans_data],
+                 [count for _, count in loans_data],
+                 color=theme['primary'])
+        ax2.set_title('Monthly Loans Trend', color=theme['text'])
+        ax2.tick_params(axis='x', rotation=45, colors=theme['text'])
+        ax2.tick_params(axis='y', colors=theme['text'])
+
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        self._canvas.print_png(buffer)
+        return buffer.getvalue()
@@ -11,28 +11,73 @@ class Config:
     # Database settings
     DB_PATH = os.getenv('DB_PATH', 'library.db')
     CONNECTION_POOL_SIZE = int(os.getenv('POOL_SIZE', '5'))
+    POOL_MAX_SIZE = int(os.getenv('POOL_MAX_SIZE', '10'))  # Upper bound when autoscaling under load
+    POOL_TIMEOUT = float(os.getenv('POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+    POOL_GROW_WAIT_MS = int(os.getenv('POOL_GROW_WAIT_MS', '50'))  # Checkout wait that triggers growth
+    POOL_SCALE_INTERVAL = int(os.getenv('POOL_SCALE_INTERVAL', '30'))  # Seconds between shrink steps
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+    # Route all writes through a single writer thread with group commit
+    DB_SERIALIZE_WRITES = os.getenv('DB_SERIALIZE_WRITES', 'false').lower() in ('1', 'true', 'yes')
+    WRITER_MAX_BATCH = int(os.getenv('WRITER_MAX_BATCH', '64'))  # Writes coalesced per commit
+    WRITER_BATCH_WINDOW_MS = int(os.getenv('WRITER_BATCH_WINDOW_MS', '0'))  # Extra wait to fill a batch
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))  # Rows per bulk import transaction
+    # Async facade: worker threads default to the pool's upper bound
+    ASYNC_DB_WORKERS = int(os.getenv('ASYNC_DB_WORKERS', str(POOL_MAX_SIZE)))
+    ASYNC_DB_TIMEOUT = float(os.getenv('ASYNC_DB_TIMEOUT', '30'))  # Seconds per awaited call, 0 disables
+    # Headless HTTP API (api_server.py)
+    API_HOST = os.getenv('API_HOST', '127.0.0.1')
+    API_PORT = int(os.getenv('API_PORT', '8080'))
+    API_MAX_CONNECTIONS = int(os.getenv('API_MAX_CONNECTIONS', '512'))  # Further connections get a 503
+    API_REQUEST_TIMEOUT = float(os.getenv('API_REQUEST_TIMEOUT', '10'))  # Seconds to read a body and respond
+    API_KEEPALIVE_TIMEOUT = float(os.getenv('API_KEEPALIVE_TIMEOUT', '15'))  # Idle seconds before closing
+    API_MAX_BODY_BYTES = int(os.getenv('API_MAX_BODY_BYTES', '65536'))
 
     # Loan settings
     LOAN_PERIOD_DAYS = int(os.getenv('LOAN_PERIOD_DAYS', '14'))  # Default loan period is 14 days
+    # Per-category loan periods overriding the default, e.g. "Reference:7,Fiction:21"
+    LOAN_PERIODS_BY_CATEGORY = {
+        name.strip(): int(days)
+        for name, days in (item.split(':', 1) for item in
+                           os.getenv('LOAN_PERIODS_BY_CATEGORY', '').split(',') if ':' in item)
+    }
 
     # Security settings
     # Remove PASSWORD_SALT since Argon2 handles salting internally
+    # Argon2 cost; stored hashes made with other values are upgraded on login
+    ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '3'))
+    ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '65536'))  # KiB per hash
+    ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '4'))
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', '4'))  # Hashes run at once
+    # Login throttling: failures within the window that lock an account or source
+    LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', '5'))
+    LOGIN_MAX_SOURCE_FAILURES = int(os.getenv('LOGIN_MAX_SOURCE_FAILURES', '20'))
+    LOGIN_FAILURE_WINDOW = float(os.getenv('LOGIN_FAILURE_WINDOW', '900'))  # Seconds
+    LOGIN_LOCKOUT_SECONDS = float(os.getenv('LOGIN_LOCKOUT_SECONDS', '900'))
     
-    JWT_SECRET = os.getenv('JWT_SECRET')
-    if not JWT_SECRET:
-        JWT_SECRET = 'MY_SUPER_SECRET_JWT_456!@#$%^&*'  # Default value
+    # Signs session tokens, at least 32 bytes; unset, the desktop app signs with a per-process key
+    JWT_SECRET = os.getenv('JWT_SECRET', '')
 
     # UI settings
     THEME = os.getenv('THEME', 'default')
     ROWS_PER_PAGE = int(os.getenv('ROWS_PER_PAGE', '10'))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+    TABLE_PAGE_SIZE = int(os.getenv('TABLE_PAGE_SIZE', '100'))  # Rows fetched per scroll in table views
+    SEARCH_DEBOUNCE_MS = int(os.getenv('SEARCH_DEBOUNCE_MS', '250'))  # Typing pause before searching
+    UI_WORKERS = int(os.getenv('UI_WORKERS', '4'))  # Threads running database calls for the UI
+    UI_POLL_INTERVAL_MS = int(os.getenv('UI_POLL_INTERVAL_MS', '50'))  # How often results are delivered
 
     # Logging
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     LOG_FILE = os.getenv('LOG_FILE', 'library.log')
     LOG_LEVEL = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper())
 
+    # Startup profiling (also enabled by the --profile-startup flag)
+    PROFILE_STARTUP = os.getenv('PROFILE_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+    STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', '1000'))  # Time allowed until the login screen
+
     # Cache settings
     CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', '300'))
+    CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', '1024'))  # Entries kept by the lookup cache
     
     # Enhanced UI Theme settings
     THEME_COLORS = {
@@ -453,16 +498,42 @@ class Config:
     }
     
     # SMTP Configuration
-    SMTP_SERVER = "smtp.gmail.com"
-    SMTP_PORT = 587
-    SMTP_USE_TLS = True
-    SMTP_FROM = "library@example.com"
-    SMTP_USER = "your_email@gmail.com"
-    SMTP_PASSWORD = "your_app_password"
+    SMTP_SERVER = os.getenv('SMTP_SERVER', "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() in ('1', 'true', 'yes')
+    SMTP_FROM = os.getenv('SMTP_FROM', "library@example.com")
+    SMTP_USER = os.getenv('SMTP_USER', "your_email@gmail.com")  # Empty skips login (local relays)
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', "your_app_password")
+    SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', '10'))  # Seconds per SMTP connect/command
+    NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '4'))  # Threads delivering overdue notices
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', str(NOTIFY_WORKERS)))  # Open SMTP sessions per run
+    # Notification send limits per NOTIFY_LIMIT_WINDOW seconds; 0 disables a limit
+    NOTIFY_LIMIT_WINDOW = float(os.getenv('NOTIFY_LIMIT_WINDOW', '3600'))
+    NOTIFY_RECIPIENT_LIMIT = int(os.getenv('NOTIFY_RECIPIENT_LIMIT', '10'))
+    NOTIFY_DOMAIN_LIMIT = int(os.getenv('NOTIFY_DOMAIN_LIMIT', '2000'))
+    NOTIFY_GLOBAL_LIMIT = int(os.getenv('NOTIFY_GLOBAL_LIMIT', '10000'))
+    NOTIFY_RATE_WAIT = float(os.getenv('NOTIFY_RATE_WAIT', '0'))  # Seconds a send may wait for a token
+    # Notification outbox
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))  # Messages claimed per dispatch
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '5'))  # Idle seconds between checks
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))  # Then the message is dead-lettered
+    OUTBOX_BACKOFF_SECONDS = float(os.getenv('OUTBOX_BACKOFF_SECONDS', '30'))  # First retry delay, doubling
+    OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv('OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+    OUTBOX_LEASE_SECONDS = float(os.getenv('OUTBOX_LEASE_SECONDS', '300'))  # Claimed rows retry after a crash
+    # Sent messages are purged after this many days; must outlive the day in overdue idempotency keys
+    OUTBOX_RETENTION_DAYS = float(os.getenv('OUTBOX_RETENTION_DAYS', '30'))
+    OUTBOX_PURGE_INTERVAL = float(os.getenv('OUTBOX_PURGE_INTERVAL', '3600'))  # Seconds between purges
     
     # Session settings
-    SESSION_TIMEOUT = 3600  # 1 hour in seconds
+    SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', '3600'))  # 1 hour in seconds
+    SESSION_REFRESH_AFTER = float(os.getenv('SESSION_REFRESH_AFTER', '900'))  # Token age reissued on use
+    SESSION_TOKEN_CACHE_SIZE = int(os.getenv('SESSION_TOKEN_CACHE_SIZE', '4096'))  # Verified tokens kept
     
+    @classmethod
+    def loan_period_days(cls, category=None):
+        """Loan period in days for a book category"""
+        return cls.LOAN_PERIODS_BY_CATEGORY.get(category, cls.LOAN_PERIOD_DAYS)
+
     @classmethod
     def get_font(cls, size='default', weight='normal'):
         """Helper method to get font tuple"""
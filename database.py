@@ -1,12 +1,23 @@
 import sqlite3
-from typing import Optional, List, Dict, Any, Union
+import base64
+import csv
+import json
+import os
+import re
+from itertools import islice
+from typing import Optional, List, Dict, Any, Union, Iterable, Iterator, Tuple
 from contextlib import contextmanager
-from functools import lru_cache
-from queue import Queue
+from queue import Queue, Empty
+import threading
 from config import Config
 import logging
-from utils import hash_password, verify_password, validate_email, validate_phone
-from datetime import datetime
+from migrations import apply_migrations, REFRESH_LIBRARY_STATS_SQL
+from db_writer import DatabaseWriter
+from cache import TTLCache
+from login_throttle import LoginThrottle
+from session import SessionTokens
+from utils import hash_password, verify_password, password_needs_rehash, validate_email, validate_phone
+from datetime import datetime, timedelta
 import time
 
 # Setup logging
@@ -37,7 +48,7 @@ class DataValidator:
             if max_value is not None and num > max_value:
                 raise ValidationError(f"{field_name} must not exceed {max_value}")
             return num
-        except ValueError:
+        except (TypeError, ValueError):
             raise ValidationError(f"{field_name} must be a valid number")
 
     @staticmethod
@@ -91,44 +102,342 @@ def validate_member_data(data: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         raise ValidationError(f"Member validation failed: {str(e)}")
 
-logger = logging.getLogger(__name__)
+def _iter_catalog_file(path: str) -> Iterator[Tuple[int, Union[Dict[str, Any], Exception]]]:
+    """Stream (row_number, record) pairs from a CSV or JSONL catalog file.
+
+    Rows that cannot be parsed are yielded as exceptions so the caller can
+    report them without aborting the whole import.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row_number, record in enumerate(csv.DictReader(f), 1):
+                yield row_number, record
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            row_number = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("Record must be a JSON object")
+                    yield row_number, record
+                except ValueError as e:
+                    yield row_number, ValidationError(f"Invalid JSON record: {e}")
+    else:
+        raise ValidationError("Catalog file must be .csv or .jsonl")
+
+def _encode_cursor(kind: str, **position: Any) -> str:
+    """Encode a keyset position as an opaque page token"""
+    payload = json.dumps({'kind': kind, **position}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(token: str, kind: str) -> Dict[str, Any]:
+    """Decode a page token produced by _encode_cursor for the given listing"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValidationError("Invalid page cursor")
+    if not isinstance(position, dict) or position.pop('kind', None) != kind:
+        raise ValidationError("Page cursor does not belong to this listing")
+    return position
+
+# Columns a listing may be sorted by; each is backed by an index
+BOOK_SORT_COLUMNS = ('title', 'author', 'isbn', 'category', 'available', 'id')
+MEMBER_SORT_COLUMNS = ('id', 'name', 'email', 'join_date')
+
+# (member_id, isbn) pairs looked up per query, two parameters each, below
+# SQLite's default 999-variable limit
+LOAN_CONTACT_CHUNK = 400
+
+def _keyset_phases(table: str, column: str, descending: bool,
+                   after: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """Build the (WHERE, ORDER BY, params) queries for keyset paging over (column, id)
+
+    Each phase is a plain index range seek, so deep pages cost the same as
+    the first. Rows with a NULL column are read as their own phase ordered
+    by id, before the others ascending (SQLite sorts NULLs first) and after
+    them descending. A page runs the phases in turn until it has enough
+    rows. Columns are qualified with the table so a computed alias of the
+    same name can't defeat the index.
+    """
+    direction = "DESC" if descending else "ASC"
+    op = '<' if descending else '>'
+    if column == 'id':
+        if after is None:
+            return [("", f"ORDER BY id {direction}", ())]
+        return [(f"id {op} ?", f"ORDER BY id {direction}", (after['after_id'],))]
+
+    column = f"{table}.{column}"
+    id_order = f"ORDER BY id {direction}"
+    value_order = f"ORDER BY {column} {direction}, id {direction}"
+    if after is None:
+        nulls = (f"{column} IS NULL", id_order, ())
+        values = (f"{column} IS NOT NULL", value_order, ())
+    elif after['after_value'] is None:
+        nulls = (f"{column} IS NULL AND id {op} ?", id_order, (after['after_id'],))
+        values = (f"{column} IS NOT NULL", value_order, ())
+        if descending:
+            return [nulls]
+    else:
+        # The rest of the current value's run, then the values past it; one
+        # row-value comparison would seek on the column alone and scan the run
+        value, after_id = after['after_value'], after['after_id']
+        phases = [(f"{column} = ? AND id {op} ?", id_order, (value, after_id)),
+                  (f"{column} {op} ?", value_order, (value,))]
+        return phases + [(f"{column} IS NULL", id_order, ())] if descending else phases
+    return [values, nulls] if descending else [nulls, values]
+
+def _validate_sort(sort: str, allowed: Tuple[str, ...]) -> str:
+    if sort not in allowed:
+        raise ValidationError(f"Cannot sort by '{sort}'; choose one of: {', '.join(allowed)}")
+    return sort
+
+def _decode_sorted_cursor(token: Optional[str], kind: str, sort: str,
+                          descending: bool) -> Optional[Dict[str, Any]]:
+    if not token:
+        return None
+    after = _decode_cursor(token, kind)
+    if after.get('sort') != sort or after.get('desc') != descending:
+        raise ValidationError("Page cursor does not match the requested sort order")
+    return after
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available before the checkout timeout"""
+    pass
 
 class DatabasePool:
-    def __init__(self):
-        # Initialize database connection pool
-        self.pool = Queue(maxsize=Config.CONNECTION_POOL_SIZE)
-        for _ in range(Config.CONNECTION_POOL_SIZE):
-            conn = sqlite3.connect(Config.DB_PATH)
-            # Ensure each connection has row_factory set
-            conn.row_factory = sqlite3.Row
-            # Configure connection for better transaction handling
-            conn.isolation_level = None  # Enable autocommit mode
-            conn.execute('PRAGMA journal_mode=WAL')  # Use WAL mode for better concurrency
-            conn.execute('PRAGMA synchronous=NORMAL')  # Balance between safety and performance
-            self.pool.put(conn)
+    """Lazily grown SQLite connection pool with checkout metrics
+
+    Connections are opened on demand up to ``target_size`` and configured once
+    when created. The target grows towards ``max_size`` while callers wait
+    longer than POOL_GROW_WAIT_MS for a connection, and shrinks back to the
+    configured CONNECTION_POOL_SIZE once checkouts are no longer contended.
+    """
+    # Weight of the latest checkout in the smoothed wait time
+    WAIT_SMOOTHING = 0.2
+
+    def __init__(self, max_size: Optional[int] = None, timeout: Optional[float] = None):
+        self.base_size = Config.CONNECTION_POOL_SIZE
+        self.max_size = max(max_size or Config.POOL_MAX_SIZE, 1)
+        self.target_size = min(self.base_size, self.max_size)
+        self.timeout = timeout if timeout is not None else Config.POOL_TIMEOUT
+        self.grow_wait = Config.POOL_GROW_WAIT_MS / 1000
+        self.scale_interval = Config.POOL_SCALE_INTERVAL
+
+        # Idle connections ready for checkout
+        self.pool: Queue = Queue()
+        self._lock = threading.Lock()
+        self._size = 0  # Open connections, idle or checked out
+        self._closed = False
+        self._last_scale = time.monotonic()
+        self._metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'wait_ewma': 0.0,
+            'hold_total': 0.0,
+            'hold_max': 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection; PRAGMAs are sent only here"""
+        conn = sqlite3.connect(Config.DB_PATH, check_same_thread=False)
+        # Ensure each connection has row_factory set
+        conn.row_factory = sqlite3.Row
+        # Configure connection for better transaction handling
+        conn.isolation_level = None  # Enable autocommit mode
+        conn.execute('PRAGMA journal_mode=WAL')  # Use WAL mode for better concurrency
+        conn.execute('PRAGMA synchronous=NORMAL')  # Balance between safety and performance
+        conn.execute(f'PRAGMA busy_timeout={Config.DB_BUSY_TIMEOUT_MS}')  # Wait on locks
+        return conn
 
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, timeout: Optional[float] = None):
         # Get database connection
-        conn = self.pool.get()
+        conn = self._acquire(self.timeout if timeout is None else timeout)
+        checked_out = time.perf_counter()
+        failed = False
         try:
-            # Enable WAL mode and set timeout
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA busy_timeout=5000')  # Wait up to 5 seconds on locks
             yield conn
+        except BaseException:
+            failed = True
+            raise
         finally:
+            self._release(conn, failed, time.perf_counter() - checked_out)
+
+    def _acquire(self, timeout: float) -> sqlite3.Connection:
+        start = time.perf_counter()
+        deadline = start + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            try:
+                conn = self.pool.get_nowait()
+                break
+            except Empty:
+                pass
+
+            with self._lock:
+                waited = time.perf_counter() - start
+                # Grow while callers are kept waiting
+                if (self._size >= self.target_size and waited >= self.grow_wait
+                        and self.target_size < self.max_size):
+                    self.target_size += 1
+                    self._last_scale = time.monotonic()
+                    logger.info(f"Connection pool grown to {self.target_size} after {waited * 1000:.0f} ms wait")
+                create = self._size < self.target_size
+                if create:
+                    self._size += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                    raise
+                break
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                with self._lock:
+                    self._metrics['timeouts'] += 1
+                logger.error(f"Timed out after {timeout:.1f}s waiting for a database connection")
+                raise PoolTimeoutError("No database connection available")
+            try:
+                # Wake up periodically in case the pool grew or a slot was freed
+                conn = self.pool.get(timeout=min(remaining, 0.05))
+                break
+            except Empty:
+                continue
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            metrics = self._metrics
+            metrics['checkouts'] += 1
+            metrics['wait_total'] += waited
+            metrics['wait_max'] = max(metrics['wait_max'], waited)
+            metrics['wait_ewma'] += self.WAIT_SMOOTHING * (waited - metrics['wait_ewma'])
+        if waited >= 1:
+            logger.warning(f"Waited {waited:.2f}s for a database connection")
+        return conn
+
+    def _release(self, conn: sqlite3.Connection, failed: bool, held: float) -> None:
+        with self._lock:
+            metrics = self._metrics
+            metrics['hold_total'] += held
+            metrics['hold_max'] = max(metrics['hold_max'], held)
+
+        healthy = True
+        try:
+            # Never hand out a connection with a leaked transaction
+            if conn.in_transaction:
+                conn.rollback()
+            if failed:
+                conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            healthy = False
+
+        with self._lock:
+            # Shrink back once checkouts stop waiting
+            now = time.monotonic()
+            if (self.target_size > self.base_size
+                    and metrics['wait_ewma'] < self.grow_wait / 10
+                    and now - self._last_scale >= self.scale_interval):
+                self.target_size -= 1
+                self._last_scale = now
+                logger.info(f"Connection pool shrunk to {self.target_size}")
+
+            keep = healthy and not self._closed and self._size <= self.target_size
+            if not keep:
+                self._size -= 1
+                if not healthy:
+                    metrics['discarded'] += 1
+
+        if keep:
             self.pool.put(conn)
+        else:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and checkout wait/hold metrics"""
+        with self._lock:
+            metrics = self._metrics
+            checkouts = metrics['checkouts'] or 1
+            idle = self.pool.qsize()
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'target_size': self.target_size,
+                'max_size': self.max_size,
+                'checkouts': metrics['checkouts'],
+                'timeouts': metrics['timeouts'],
+                'discarded': metrics['discarded'],
+                'wait_avg_ms': metrics['wait_total'] / checkouts * 1000,
+                'wait_max_ms': metrics['wait_max'] * 1000,
+                'wait_recent_ms': metrics['wait_ewma'] * 1000,
+                'hold_avg_ms': metrics['hold_total'] / checkouts * 1000,
+                'hold_max_ms': metrics['hold_max'] * 1000,
+            }
+
+    def close_all(self) -> None:
+        """Close idle connections; checked-out ones are closed when released"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self.pool.get_nowait()
+            except Empty:
+                break
+            with self._lock:
+                self._size -= 1
+            conn.close()
 
 class DatabaseHandler:
-    def __init__(self):
+    def __init__(self, serialize_writes: Optional[bool] = None):
+        self.writer: Optional[DatabaseWriter] = None
+        # Read-through cache for book, member and category lookups
+        self.cache = TTLCache()
+        self.login_throttle = LoginThrottle()
+        # Per-process key unless JWT_SECRET is set, which the desktop app does not need
+        self.session_tokens = SessionTokens(allow_ephemeral=True)
         try:
             self.pool = DatabasePool()
             self.create_tables()
             self.create_default_user()
+            if Config.DB_SERIALIZE_WRITES if serialize_writes is None else serialize_writes:
+                # All mutations go through one connection; readers keep using the pool
+                self.writer = DatabaseWriter(self.pool._connect)
         except Exception as e:
             logger.critical(f"Failed to initialize database: {e}")
             raise RuntimeError("Database initialization failed")
 
+    def close(self) -> None:
+        """Stop the writer thread and close pooled database connections"""
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close_all()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool size and checkout wait/hold metrics"""
+        return self.pool.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Lookup cache hit/miss counters"""
+        return self.cache.stats()
+
     def test_connection(self) -> bool:
         """Test if database connection is working"""
         try:
@@ -160,18 +469,43 @@ class DatabaseHandler:
                 logger.error(f"Unexpected database error: {e}")
                 raise
 
+    def _write(self, operation):
+        """Run a mutation in a write transaction and return its result
+
+        The operation receives a connection and must not begin, commit or roll
+        back itself. With write serialization enabled it is queued to the
+        writer thread and group-committed with concurrent writes; otherwise it
+        runs on a pooled connection inside BEGIN IMMEDIATE.
+        """
+        if self.writer is not None:
+            return self.writer.execute(operation)
+
+        def transaction(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(conn)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+
+        return self._execute_with_retry(transaction)
+
+    def run_write(self, operation):
+        """Run operation(conn) as one write transaction and return its result
+
+        For callers outside this class that must commit their own rows together
+        with a change, e.g. an outbox message alongside the event behind it.
+        The same rules as _write apply, and the operation may be retried.
+        """
+        return self._write(operation)
+
     def create_tables(self):
         """Create necessary database tables if they don't exist"""
         with self.pool.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Add login_attempts column if it doesn't exist
-            try:
-                cursor.execute("SELECT login_attempts FROM users LIMIT 1")
-            except sqlite3.OperationalError:
-                cursor.execute("ALTER TABLE users ADD COLUMN login_attempts INTEGER DEFAULT 0")
-                conn.commit()
-            
             # Ensure correct users table structure
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -234,9 +568,56 @@ class DatabaseHandler:
                     FOREIGN KEY (member_id) REFERENCES members (id)
                 )
             """)
+
+            conn.commit()
+
+            # Indexes and later column changes are versioned migrations
+            apply_migrations(conn)
+
+            self.has_fts = self._create_search_index(cursor)
             
             conn.commit()
 
+    def _create_search_index(self, cursor) -> bool:
+        """Create the FTS5 index over books, returning False when FTS5 is unavailable"""
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+            if cursor.fetchone():
+                return True
+
+            # External content table: the index stores tokens only, rows live in books
+            cursor.execute("""
+                CREATE VIRTUAL TABLE books_fts USING fts5(
+                    title, author, isbn, category,
+                    content='books', content_rowid='id'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 not available, falling back to LIKE search: {e}")
+            return False
+
+        # Keep the index in sync with books; availability updates don't touch it
+        cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts(rowid, title, author, isbn, category)
+                VALUES (new.id, new.title, new.author, new.isbn, new.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author, isbn, category)
+                VALUES ('delete', old.id, old.title, old.author, old.isbn, old.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, isbn, category ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, author, isbn, category)
+                VALUES ('delete', old.id, old.title, old.author, old.isbn, old.category);
+                INSERT INTO books_fts(rowid, title, author, isbn, category)
+                VALUES (new.id, new.title, new.author, new.isbn, new.category);
+            END;
+        """)
+        # Index any books that existed before the search index was created
+        cursor.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+        logger.info("Created full-text search index for books")
+        return True
+
     def create_default_user(self):
         """Create default admin user if not exists"""
         try:
@@ -257,52 +638,90 @@ class DatabaseHandler:
             logger.error(f"Error creating default user: {e}")
             raise
 
-    def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
-        """Authenticate user with enhanced security"""
+    def authenticate_user(self, username: str, password: str,
+                          source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Authenticate user with enhanced security
+
+        Failed attempts are counted in memory by login_throttle, per username
+        and per source (e.g. a client address); the database is written only
+        when a lockout starts or ends, or a hash is upgraded. The returned
+        user carries a signed session 'token' (see session.SessionTokens).
+
+        Raises:
+            ValidationError: If the username or source is locked out
+        """
         try:
             # Sanitize inputs
             username = DataValidator.validate_string(username, "Username", min_length=1)
             if not password:
                 raise ValidationError("Password cannot be empty")
+
+            # Rejected before touching the database or paying for Argon2
+            if self.login_throttle.locked_until(username, source):
+                logger.warning(f"Account locked due to too many failed attempts: {username}")
+                raise ValidationError("Account temporarily locked. Please try again later.")
             
             def operation(conn):
                 cursor = conn.cursor()
                 # Use parameterized query to prevent SQL injection
                 cursor.execute("""
-                    SELECT id, username, password_hash, role, 
-                           COUNT(*) as login_attempts
+                    SELECT id, username, password_hash, role, locked_until
                     FROM users 
                     WHERE username = ?
-                    GROUP BY id
                 """, (username,))
-                user = cursor.fetchone()
-                
-                if not user:
-                    logger.warning(f"Login attempt for non-existent user: {username}")
-                    return None
-                
-                # Check for too many failed attempts
-                if user['login_attempts'] >= 5:
-                    logger.warning(f"Account locked due to too many failed attempts: {username}")
-                    raise ValidationError("Account temporarily locked. Please try again later.")
-                
-                if verify_password(password, user['password_hash']):
-                    # Reset login attempts on successful login
-                    cursor.execute("UPDATE users SET login_attempts = 0 WHERE username = ?", (username,))
-                    conn.commit()
-                    
-                    return {
-                        'id': user['id'],
-                        'username': user['username'],
-                        'role': user['role']
-                    }
-                else:
-                    # Increment failed login attempts
-                    cursor.execute("UPDATE users SET login_attempts = login_attempts + 1 WHERE username = ?", (username,))
-                    conn.commit()
-                    return None
-                    
-            return self._execute_with_retry(operation)
+                return cursor.fetchone()
+
+            user = self._execute_with_retry(operation)
+            
+            if not user:
+                # Counted against the source only, so junk names cannot crowd out real accounts
+                self.login_throttle.record_failure(username, source, known=False)
+                logger.warning(f"Login attempt for non-existent user: {username}")
+                return None
+            
+            # A lockout persisted by another process or before a restart
+            now = datetime.now()
+            if user['locked_until'] and user['locked_until'] > now.strftime("%Y-%m-%d %H:%M:%S"):
+                self.login_throttle.lock(username, datetime.strptime(
+                    user['locked_until'], "%Y-%m-%d %H:%M:%S").timestamp())
+                logger.warning(f"Account locked due to too many failed attempts: {username}")
+                raise ValidationError("Account temporarily locked. Please try again later.")
+            
+            # Verify without holding a connection
+            if not verify_password(password, user['password_hash']):
+                locked_until = self.login_throttle.record_failure(username, source)
+                if locked_until is not None:
+                    self._write(lambda conn: conn.execute(
+                        "UPDATE users SET locked_until = ? WHERE id = ?",
+                        (datetime.fromtimestamp(locked_until).strftime("%Y-%m-%d %H:%M:%S"), user['id'])))
+                return None
+
+            self.login_throttle.record_success(username)
+
+            # Upgrade hashes made with outdated Argon2 parameters while the password is known
+            new_hash = None
+            if password_needs_rehash(user['password_hash']):
+                new_hash = hash_password(password)
+
+            if new_hash is not None or user['locked_until']:
+                def on_success(conn):
+                    conn.execute("UPDATE users SET locked_until = NULL WHERE id = ?", (user['id'],))
+                    if new_hash is not None:
+                        # Skip if the hash changed meanwhile, e.g. a password reset
+                        conn.execute("UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                                     (new_hash, user['id'], user['password_hash']))
+
+                self._write(on_success)
+                if new_hash is not None:
+                    logger.info(f"Upgraded password hash parameters for user: {username}")
+            
+            result = {
+                'id': user['id'],
+                'username': user['username'],
+                'role': user['role']
+            }
+            result['token'] = self.session_tokens.issue(result)
+            return result
             
         except ValidationError as e:
             logger.error(f"Validation error in authenticate_user: {e}")
@@ -316,13 +735,10 @@ class DatabaseHandler:
         Add a new user with Argon2 hashed password
         """
         try:
-            with self.pool.get_connection() as conn:
-                cursor = conn.cursor()
-                password_hash = hash_password(password)  # Using new Argon2 hash function
-                query = "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)"
-                cursor.execute(query, (username, password_hash, role))
-                conn.commit()
-                return True
+            password_hash = hash_password(password)  # Using new Argon2 hash function
+            query = "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)"
+            self._write(lambda conn: conn.execute(query, (username, password_hash, role)))
+            return True
         except Exception as e:
             logger.error(f"Error adding user: {e}")
             return False
@@ -338,7 +754,7 @@ class DatabaseHandler:
                 result = cursor.fetchone()
                 return dict(result) if result else None
                 
-            return self._execute_with_retry(operation)
+            return self.cache.get_or_load(('book', isbn), lambda: self._execute_with_retry(operation))
                 
         except Exception as e:
             logger.error(f"Error getting book by ISBN: {e}")
@@ -354,25 +770,108 @@ class DatabaseHandler:
             logger.error(f"Error getting book by ISBN: {e}")
             raise
 
-    def search_books(self, query: str, page: int = 1) -> List[Dict[str, Any]]:
-        """Search books with pagination"""
+    def search_books(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The first page of search_books_page, for callers that only need the top matches"""
+        return self.search_books_page(query, limit)['items']
+
+    def search_books_page(self, query: str, limit: Optional[int] = None,
+                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Search books using keyset pagination
+
+        With FTS5 results come in bm25 relevance order, keyed on (rank, id);
+        the LIKE fallback has no ranking and pages in (title, id) order.
+        Returns a dict with the page 'items' and an opaque 'next_cursor',
+        which is None on the last page.
+        """
         try:
-            offset = (page - 1) * Config.ROWS_PER_PAGE
+            limit = self._validate_page_size(limit)
+            match_query = self._build_match_query(query)
+            if match_query:
+                return self._search_books_ranked(match_query, limit, cursor)
+
+            after = _decode_cursor(cursor, 'search') if cursor else None
+            search_query = f'%{query}%'
+            where = "(b.title LIKE ? OR b.author LIKE ? OR b.isbn LIKE ? OR b.category LIKE ?)"
+            params: List[Any] = [search_query] * 4
+            if after:
+                where += " AND (b.title, b.id) > (?, ?)"
+                params += [after['after_title'], after['after_id']]
+
             with self.pool.get_connection() as conn:
-                cursor = conn.cursor()
-                search_query = f'%{query}%'
-                cursor.execute('''
-                    SELECT * FROM books 
-                    WHERE title LIKE ? OR author LIKE ? OR isbn LIKE ? OR category LIKE ?
-                    LIMIT ? OFFSET ?
-                ''', (search_query, search_query, search_query, search_query,
-                      Config.ROWS_PER_PAGE, offset))
-                books = cursor.fetchall()
-                return [dict(row) for row in books]
+                rows = conn.execute(f'''
+                    SELECT b.* FROM books b
+                    WHERE {where}
+                    ORDER BY b.title, b.id
+                    LIMIT ?
+                ''', (*params, limit + 1)).fetchall()
+            return self._build_page(rows, limit, lambda last: _encode_cursor(
+                'search', after_title=last['title'], after_id=last['id']))
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error searching books: {e}")
             raise Exception("Failed to search books")
 
+    def _search_books_ranked(self, match_query: str, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        """One page of FTS5 matches in bm25 order, continuing after (rank, id)"""
+        after = _decode_cursor(cursor, 'search_rank') if cursor else None
+        where, params = "", ()
+        if after:
+            where, params = "WHERE (rank, id) > (?, ?)", (after['after_rank'], after['after_id'])
+        with self.pool.get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT * FROM (
+                    SELECT b.*, bm25(books_fts) AS rank FROM books_fts
+                    JOIN books b ON b.id = books_fts.rowid
+                    WHERE books_fts MATCH ?
+                )
+                {where}
+                ORDER BY rank, id
+                LIMIT ?
+            ''', (match_query, *params, limit + 1)).fetchall()
+        page = self._build_page(rows, limit, lambda last: _encode_cursor(
+            'search_rank', after_rank=last['rank'], after_id=last['id']))
+        for item in page['items']:
+            del item['rank']
+        return page
+
+    def _validate_page_size(self, limit: Optional[int]) -> int:
+        return DataValidator.validate_integer(
+            limit if limit is not None else Config.ROWS_PER_PAGE,
+            "Page size", min_value=1, max_value=Config.MAX_PAGE_SIZE)
+
+    @staticmethod
+    def _fetch_keyset(conn: sqlite3.Connection, select: str, table: str, column: str, descending: bool,
+                      after: Optional[Dict[str, Any]], limit: int) -> List[sqlite3.Row]:
+        """Read up to limit + 1 rows after a keyset position, phase by phase"""
+        rows: List[sqlite3.Row] = []
+        for where, order, params in _keyset_phases(table, column, descending, after):
+            where = f"WHERE {where}" if where else ""
+            rows += conn.execute(f"{select} {where} {order} LIMIT ?",
+                                 (*params, limit + 1 - len(rows))).fetchall()
+            if len(rows) > limit:
+                break
+        return rows
+
+    def _build_page(self, rows: List[sqlite3.Row], limit: int, make_cursor) -> Dict[str, Any]:
+        """Trim the look-ahead row and build the next-page token from the last item"""
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = make_cursor(items[-1]) if len(rows) > limit else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def _build_match_query(self, query: str) -> Optional[str]:
+        """Turn free text into an FTS5 prefix query, or None to use LIKE instead"""
+        if not self.has_fts or not isinstance(query, str):
+            return None
+        # ISBNs are stored without separators
+        if re.fullmatch(r'[\d\-\s]+[\dXx]', query.strip()):
+            query = query.replace('-', '').replace(' ', '')
+        # Quote every token so user input can't inject FTS5 query syntax
+        tokens = re.findall(r'\w+', query)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+
     def backup_database(self, backup_path: str) -> None:
         try:
             with self.pool.get_connection() as conn:
@@ -410,10 +909,9 @@ class DatabaseHandler:
                     validated_data['phone'],
                     datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 ))
-                conn.commit()
-                logger.info(f"Member '{validated_data['name']}' added successfully")
                 
-            self._execute_with_retry(operation)
+            self._write(operation)
+            logger.info(f"Member '{validated_data['name']}' added successfully")
             
         except ValidationError as e:
             logger.error(f"Validation error while adding member: {e}")
@@ -422,33 +920,49 @@ class DatabaseHandler:
             logger.error(f"Error adding member: {e}")
             raise
 
-    def get_total_books(self) -> int:
+    def get_dashboard_snapshot(self) -> Dict[str, int]:
+        """Get all dashboard counters in one constant-time query
+
+        The library_stats row is maintained by triggers on books, members
+        and transactions, so no aggregate scan is needed here.
+        """
         with self.pool.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) as count FROM books')
+            cursor.execute('''
+                SELECT total_books, available_books, total_members, active_loans
+                FROM library_stats WHERE id = 1
+            ''')
             result = cursor.fetchone()
-            return result['count'] if result else 0
+            if result:
+                return dict(result)
+            return {'total_books': 0, 'available_books': 0, 'total_members': 0, 'active_loans': 0}
 
-    def get_available_books(self) -> int:
+    def get_data_version(self) -> int:
+        """Counter that changes whenever the data behind the dashboard charts changes"""
         with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT SUM(available) as count FROM books')
-            result = cursor.fetchone()
-            return result['count'] if result else 0
+            row = conn.execute("SELECT data_version FROM library_stats WHERE id = 1").fetchone()
+            return row[0] if row else 0
+
+    def refresh_dashboard_snapshot(self) -> None:
+        """Recompute the dashboard counters from the underlying tables"""
+        def operation(conn):
+            conn.execute(REFRESH_LIBRARY_STATS_SQL)
+            # Whatever bypassed the triggers may also have changed chart data
+            conn.execute("UPDATE library_stats SET data_version = data_version + 1 WHERE id = 1")
+
+        self._write(operation)
+
+    def get_total_books(self) -> int:
+        return self.get_dashboard_snapshot()['total_books']
+
+    def get_available_books(self) -> int:
+        return self.get_dashboard_snapshot()['available_books']
 
     def get_total_members(self) -> int:
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) as count FROM members')
-            result = cursor.fetchone()
-            return result['count'] if result else 0
+        return self.get_dashboard_snapshot()['total_members']
 
     def get_active_loans(self) -> int:
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) as count FROM transactions WHERE return_date IS NULL')
-            result = cursor.fetchone()
-            return result['count'] if result else 0
+        return self.get_dashboard_snapshot()['active_loans']
 
     def get_book_categories(self) -> List[Dict[str, Any]]:
         with self.pool.get_connection() as conn:
@@ -474,33 +988,27 @@ class DatabaseHandler:
             
             def operation(conn):
                 cursor = conn.cursor()
-                conn.execute("BEGIN")
-                try:
-                    # Check for duplicate ISBN
-                    cursor.execute("SELECT id FROM books WHERE isbn = ?", (validated_data['isbn'],))
-                    if cursor.fetchone():
-                        raise ValidationError("Book with this ISBN already exists")
-                    
-                    # Insert new book with quantity as initial available count
-                    cursor.execute('''
-                        INSERT INTO books (title, author, isbn, quantity, available, category)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        validated_data['title'],
-                        validated_data['author'],
-                        validated_data['isbn'],
-                        validated_data['quantity'],
-                        validated_data['quantity'],  # Set initial available to quantity
-                        validated_data['category']
-                    ))
-                    conn.commit()
-                    logger.info(f"Book '{validated_data['title']}' added successfully")
-                    
-                except Exception as e:
-                    conn.rollback()
-                    raise e
+                # Check for duplicate ISBN
+                cursor.execute("SELECT id FROM books WHERE isbn = ?", (validated_data['isbn'],))
+                if cursor.fetchone():
+                    raise ValidationError("Book with this ISBN already exists")
+                
+                # Insert new book with quantity as initial available count
+                cursor.execute('''
+                    INSERT INTO books (title, author, isbn, quantity, available, category)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    validated_data['title'],
+                    validated_data['author'],
+                    validated_data['isbn'],
+                    validated_data['quantity'],
+                    validated_data['quantity'],  # Set initial available to quantity
+                    validated_data['category']
+                ))
                     
-            self._execute_with_retry(operation)
+            self._write(operation)
+            self.cache.invalidate(('book', validated_data['isbn']), ('categories',))
+            logger.info(f"Book '{validated_data['title']}' added successfully")
             
         except ValidationError as e:
             logger.error(f"Validation error while adding book: {e}")
@@ -509,6 +1017,187 @@ class DatabaseHandler:
             logger.error(f"Error adding book: {e}")
             raise
 
+    def add_books_bulk(self, rows: Iterable[Dict[str, Any]], chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """Add or update many books, writing each chunk in a single transaction
+
+        Args:
+            rows: Iterable of book dictionaries with the same keys as add_book
+            chunk_size: Rows validated and written per transaction
+
+        Returns:
+            Import report with counts, per-row errors and throughput
+        """
+        return self._bulk_import_books(enumerate(rows, 1), chunk_size)
+
+    def import_catalog(self, path: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """Stream a CSV or JSONL catalog file into the books table"""
+        if not os.path.isfile(path):
+            raise ValidationError(f"Catalog file not found: {path}")
+        report = self._bulk_import_books(_iter_catalog_file(path), chunk_size)
+        logger.info(f"Imported catalog {path}: {report['imported']} rows, "
+                    f"{report['failed']} errors, {report['rows_per_sec']:.0f} rows/sec")
+        return report
+
+    def _bulk_import_books(self, numbered_rows: Iterable[Tuple[int, Any]],
+                           chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """Validate and upsert (row_number, record) pairs chunk by chunk"""
+        chunk_size = DataValidator.validate_integer(
+            chunk_size or Config.IMPORT_CHUNK_SIZE, "Chunk size", min_value=1)
+        errors: List[Dict[str, Any]] = []
+        total = imported = 0
+        start = time.perf_counter()
+        numbered_rows = iter(numbered_rows)
+
+        while True:
+            chunk = list(islice(numbered_rows, chunk_size))
+            if not chunk:
+                break
+            total += len(chunk)
+
+            params = []
+            row_numbers = []
+            for row_number, record in chunk:
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    validated = validate_book_data({
+                        **record,
+                        'category': record.get('category') or 'General'
+                    })
+                    params.append((
+                        validated['title'],
+                        validated['author'],
+                        validated['isbn'],
+                        validated['quantity'],
+                        validated['quantity'],  # Set initial available to quantity
+                        validated['category']
+                    ))
+                    row_numbers.append(row_number)
+                except Exception as e:
+                    errors.append({'row': row_number, 'error': str(e)})
+
+            if not params:
+                continue
+
+            def operation(conn, params=params):
+                # Existing ISBNs are updated in place; available shifts by the quantity delta
+                conn.executemany('''
+                    INSERT INTO books (title, author, isbn, quantity, available, category)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(isbn) DO UPDATE SET
+                        title = excluded.title,
+                        author = excluded.author,
+                        category = excluded.category,
+                        available = MAX(0, available + excluded.quantity - quantity),
+                        quantity = excluded.quantity
+                ''', params)
+
+            try:
+                self._write(operation)
+                imported += len(params)
+            except Exception as e:
+                logger.error(f"Bulk import chunk failed: {e}")
+                errors.extend({'row': row_number, 'error': f"Database error: {e}"}
+                              for row_number in row_numbers)
+            finally:
+                # Upserts can touch any cached book or category
+                self.cache.clear()
+
+        elapsed = time.perf_counter() - start
+        return {
+            'total': total,
+            'imported': imported,
+            'failed': len(errors),
+            'errors': sorted(errors, key=lambda error: error['row']),
+            'elapsed': elapsed,
+            'rows_per_sec': imported / elapsed if elapsed > 0 else 0.0
+        }
+
+    def _return_loan(self, cursor: sqlite3.Cursor, member_id: int, isbn: str, returned_at: str) -> None:
+        """Close the open loan for a member/book pair inside the caller's transaction"""
+        # Get book details
+        cursor.execute("SELECT id FROM books WHERE isbn = ?", (isbn,))
+        book = cursor.fetchone()
+        if not book:
+            raise ValidationError("Book does not exist")
+        
+        # Check loan record
+        cursor.execute("""
+            SELECT id FROM transactions 
+            WHERE member_id = ? AND book_id = ? AND return_date IS NULL
+        """, (member_id, book['id']))
+        loan = cursor.fetchone()
+        if not loan:
+            raise ValidationError("No matching unreturned loan record found")
+        
+        # Update loan record
+        cursor.execute("""
+            UPDATE transactions
+            SET return_date = ?, status = 'returned'
+            WHERE id = ?
+        """, (returned_at, loan['id']))
+        
+        # Update book availability - simplified logic
+        cursor.execute("""
+            UPDATE books
+            SET available = available + 1
+            WHERE id = ?
+        """, (book['id'],))
+
+    def _issue_loan(self, cursor: sqlite3.Cursor, member_id: int, isbn: str, issued_at: datetime,
+                    member_checked: bool = False) -> None:
+        """Issue one copy inside the caller's transaction, due per the category's loan period"""
+        # Get book details
+        cursor.execute("""
+            SELECT id, available, category FROM books WHERE isbn = ?
+        """, (isbn,))
+        book = cursor.fetchone()
+        
+        if not book:
+            raise ValidationError("Book does not exist")
+        if book['available'] <= 0:
+            raise ValidationError("Book is not available")
+        
+        # Check if member exists
+        if not member_checked:
+            cursor.execute("SELECT id FROM members WHERE id = ?", (member_id,))
+            if not cursor.fetchone():
+                raise ValidationError("Member does not exist")
+        
+        # Update book availability first
+        cursor.execute("""
+            UPDATE books 
+            SET available = available - 1 
+            WHERE id = ? AND available > 0
+            """, (book['id'],))
+        
+        if cursor.rowcount != 1:
+            raise ValidationError("Failed to update book availability")
+        
+        # Create loan record
+        due_at = issued_at + timedelta(days=Config.loan_period_days(book['category']))
+        cursor.execute("""
+            INSERT INTO transactions (book_id, member_id, issue_date, due_date, status)
+            VALUES (?, ?, ?, ?, 'issued')
+            """, (book['id'], member_id, issued_at.strftime("%Y-%m-%d %H:%M:%S"),
+                  due_at.strftime("%Y-%m-%d %H:%M:%S")))
+
+    def _run_basket(self, conn: sqlite3.Connection, pending: List[Dict[str, Any]], apply_item) -> None:
+        """Apply each pending item under its own savepoint so failures roll back alone"""
+        cursor = conn.cursor()
+        for result in pending:
+            # Reset in case the whole transaction is being retried
+            result['success'], result['error'] = False, None
+            cursor.execute("SAVEPOINT basket_item")
+            try:
+                apply_item(cursor, result)
+                cursor.execute("RELEASE basket_item")
+                result['success'] = True
+            except (ValidationError, sqlite3.IntegrityError) as e:
+                cursor.execute("ROLLBACK TO basket_item")
+                cursor.execute("RELEASE basket_item")
+                result['error'] = str(e)
+
     def return_book(self, member_id: int, isbn: str) -> None:
         """Return a book with enhanced validation and error handling"""
         try:
@@ -517,46 +1206,11 @@ class DatabaseHandler:
             isbn = DataValidator.validate_isbn(isbn)
             
             def operation(conn):
-                cursor = conn.cursor()
-                conn.execute("BEGIN")
-                try:
-                    # Get book details
-                    cursor.execute("SELECT id FROM books WHERE isbn = ?", (isbn,))
-                    book = cursor.fetchone()
-                    if not book:
-                        raise ValidationError("Book does not exist")
-                    
-                    # Check loan record
-                    cursor.execute("""
-                        SELECT id FROM transactions 
-                        WHERE member_id = ? AND book_id = ? AND return_date IS NULL
-                    """, (member_id, book['id']))
-                    loan = cursor.fetchone()
-                    if not loan:
-                        raise ValidationError("No matching unreturned loan record found")
-                    
-                    # Update loan record
-                    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    cursor.execute("""
-                        UPDATE transactions
-                        SET return_date = ?, status = 'returned'
-                        WHERE id = ?
-                    """, (current_time, loan['id']))
-                    
-                    # Update book availability - simplified logic
-                    cursor.execute("""
-                        UPDATE books
-                        SET available = available + 1
-                        WHERE id = ?
-                    """, (book['id'],))
-                    
-                    conn.commit()
+                self._return_loan(conn.cursor(), member_id, isbn,
+                                  datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
                     
-                except Exception as e:
-                    conn.rollback()
-                    raise e
-                    
-            self._execute_with_retry(operation)
+            self._write(operation)
+            self.cache.invalidate(('book', isbn))
             
         except ValidationError as e:
             logger.error(f"Validation error in return_book: {e}")
@@ -565,6 +1219,45 @@ class DatabaseHandler:
             logger.error(f"Error returning book: {e}")
             raise
 
+    def return_books(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return a basket of loans in one write transaction
+
+        Args:
+            items: Dictionaries with 'member_id' and 'isbn'
+
+        Returns:
+            One result per item, in order, with 'success' and an 'error' reason
+        """
+        results = []
+        for item in items:
+            result = {'member_id': item.get('member_id'), 'isbn': item.get('isbn'),
+                      'success': False, 'error': None}
+            try:
+                result['member_id'] = DataValidator.validate_integer(
+                    item.get('member_id'), "Member ID", min_value=1)
+                result['isbn'] = DataValidator.validate_isbn(item.get('isbn'))
+            except ValidationError as e:
+                result['error'] = str(e)
+            results.append(result)
+
+        returned_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def apply_item(cursor, result):
+            self._return_loan(cursor, result['member_id'], result['isbn'], returned_at)
+
+        pending = [result for result in results if not result['error']]
+        try:
+            if pending:
+                self._write(lambda conn: self._run_basket(conn, pending, apply_item))
+        except Exception as e:
+            logger.error(f"Error returning books: {e}")
+            raise
+        finally:
+            self.cache.invalidate(*(('book', result['isbn']) for result in pending))
+
+        logger.info(f"Returned {sum(r['success'] for r in results)} of {len(results)} items")
+        return results
+
     def issue_book(self, member_id: int, isbn: str) -> None:
         """Issue a book with enhanced validation and error handling"""
         try:
@@ -573,48 +1266,10 @@ class DatabaseHandler:
             isbn = DataValidator.validate_isbn(isbn)
             
             def operation(conn):
-                cursor = conn.cursor()
-                cursor.execute("BEGIN IMMEDIATE")
-                try:
-                    # Get book details
-                    cursor.execute("""
-                        SELECT id, available FROM books WHERE isbn = ?
-                    """, (isbn,))
-                    book = cursor.fetchone()
-                    
-                    if not book:
-                        raise ValidationError("Book does not exist")
-                    if book['available'] <= 0:
-                        raise ValidationError("Book is not available")
-                    
-                    # Check if member exists
-                    cursor.execute("SELECT id FROM members WHERE id = ?", (member_id,))
-                    if not cursor.fetchone():
-                        raise ValidationError("Member does not exist")
+                self._issue_loan(conn.cursor(), member_id, isbn, datetime.now())
                     
-                    # Update book availability first
-                    cursor.execute("""
-                        UPDATE books 
-                        SET available = available - 1 
-                        WHERE id = ? AND available > 0
-                        """, (book['id'],))
-                    
-                    if cursor.rowcount != 1:
-                        raise ValidationError("Failed to update book availability")
-                    
-                    # Create loan record
-                    cursor.execute("""
-                        INSERT INTO transactions (book_id, member_id, issue_date, status)
-                        VALUES (?, ?, ?, 'issued')
-                        """, (book['id'], member_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                    
-                    conn.commit()
-                    
-                except Exception as e:
-                    conn.rollback()
-                    raise e
-                    
-            self._execute_with_retry(operation)
+            self._write(operation)
+            self.cache.invalidate(('book', isbn))
             
         except ValidationError as e:
             logger.error(f"Validation error in issue_book: {e}")
@@ -623,6 +1278,54 @@ class DatabaseHandler:
             logger.error(f"Error issuing book: {e}")
             raise
 
+    def issue_books(self, member_id: int, isbns: Iterable[str]) -> List[Dict[str, Any]]:
+        """Issue a basket of books to one member in one write transaction
+
+        The member is validated once; each ISBN succeeds or fails on its own.
+
+        Returns:
+            One result per ISBN, in order, with 'success' and an 'error' reason
+
+        Raises:
+            ValidationError: If the member ID is invalid or the member does not exist
+        """
+        member_id = DataValidator.validate_integer(member_id, "Member ID", min_value=1)
+        results = []
+        for isbn in isbns:
+            result = {'member_id': member_id, 'isbn': isbn, 'success': False, 'error': None}
+            try:
+                result['isbn'] = DataValidator.validate_isbn(isbn)
+            except ValidationError as e:
+                result['error'] = str(e)
+            results.append(result)
+
+        issued_at = datetime.now()
+
+        def apply_item(cursor, result):
+            self._issue_loan(cursor, member_id, result['isbn'], issued_at, member_checked=True)
+
+        pending = [result for result in results if not result['error']]
+
+        def operation(conn):
+            if not conn.execute("SELECT id FROM members WHERE id = ?", (member_id,)).fetchone():
+                raise ValidationError("Member does not exist")
+            self._run_basket(conn, pending, apply_item)
+
+        try:
+            self._write(operation)
+        except ValidationError as e:
+            logger.error(f"Validation error in issue_books: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error issuing books: {e}")
+            raise
+        finally:
+            self.cache.invalidate(*(('book', result['isbn']) for result in pending))
+
+        logger.info(f"Issued {sum(r['success'] for r in results)} of {len(results)} items "
+                    f"to member {member_id}")
+        return results
+
     def get_all_members(self) -> List[Dict[str, Any]]:
         """Get all member records"""
         try:
@@ -644,6 +1347,88 @@ class DatabaseHandler:
             logger.error(f"Error getting members: {e}")
             raise Exception("Failed to retrieve members")
 
+    def get_members_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         sort: str = 'id', descending: Optional[bool] = None) -> Dict[str, Any]:
+        """Get one page of members using keyset pagination, newest first by default
+
+        Args:
+            sort: One of MEMBER_SORT_COLUMNS; ties are broken by id
+            descending: Sort direction, by default descending only for id;
+                a cursor only continues its own order
+        """
+        try:
+            limit = self._validate_page_size(limit)
+            sort = _validate_sort(sort, MEMBER_SORT_COLUMNS)
+            descending = sort == 'id' if descending is None else bool(descending)
+            after = _decode_sorted_cursor(cursor, 'members', sort, descending)
+            with self.pool.get_connection() as conn:
+                rows = self._fetch_keyset(conn, '''
+                    SELECT 
+                        id,
+                        name,
+                        email,
+                        phone,
+                        datetime(join_date) as join_date
+                    FROM members
+                ''', 'members', sort, descending, after, limit)
+            return self._build_page(rows, limit, lambda last: _encode_cursor(
+                'members', sort=sort, desc=descending, after_value=last[sort], after_id=last['id']))
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting members: {e}")
+            raise Exception("Failed to retrieve members")
+
+    def search_members(self, query: str, limit: Optional[int] = None,
+                       cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Find members by name or email prefix, or phone prefix, in (name, id) order
+
+        Matching is case-insensitive and each branch is an index range scan,
+        so lookups stay fast on large member tables. A query containing '@'
+        only matches email; one made of digits (and phone punctuation) only
+        matches phone.
+        """
+        try:
+            limit = self._validate_page_size(limit)
+            after = _decode_cursor(cursor, 'member_search') if cursor else None
+            query = (query or '').strip()
+            digits = re.sub(r'[\s\-().]', '', query)
+            # Every string with the prefix sorts below prefix + the highest code point
+            conditions: List[str] = []
+            params: List[Any] = []
+            if not query:
+                pass
+            elif re.fullmatch(r'\+?\d+', digits):
+                conditions.append("(phone >= ? AND phone < ?)")
+                params += [digits, digits + '\U0010ffff']
+            elif '@' in query:
+                conditions.append("(email COLLATE NOCASE >= ? AND email COLLATE NOCASE < ?)")
+                params += [query, query + '\U0010ffff']
+            else:
+                conditions.append("((name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?)"
+                                  " OR (email COLLATE NOCASE >= ? AND email COLLATE NOCASE < ?))")
+                params += [query, query + '\U0010ffff'] * 2
+            if after:
+                conditions.append("(name COLLATE NOCASE, id) > (?, ?)")
+                params += [after['after_name'], after['after_id']]
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            with self.pool.get_connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, name, email, phone, datetime(join_date) as join_date
+                    FROM members
+                    {where}
+                    ORDER BY name COLLATE NOCASE, id
+                    LIMIT ?
+                ''', (*params, limit + 1)).fetchall()
+            return self._build_page(rows, limit, lambda last: _encode_cursor(
+                'member_search', after_name=last['name'], after_id=last['id']))
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching members: {e}")
+            raise Exception("Failed to search members")
+
     def get_book_loan_history(self, isbn: str) -> List[Dict[str, Any]]:
         """Get loan history for specified book"""
         with self.pool.get_connection() as conn:
@@ -672,6 +1457,24 @@ class DatabaseHandler:
             books = cursor.fetchall()
             return [dict(book) for book in books]
 
+    def get_books_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                       sort: str = 'title', descending: bool = False) -> Dict[str, Any]:
+        """Get one page of books using keyset pagination, by title by default
+
+        Args:
+            sort: One of BOOK_SORT_COLUMNS; ties are broken by id
+            descending: Sort direction; a cursor only continues its own order
+        """
+        limit = self._validate_page_size(limit)
+        sort = _validate_sort(sort, BOOK_SORT_COLUMNS)
+        descending = bool(descending)
+        after = _decode_sorted_cursor(cursor, 'books', sort, descending)
+        with self.pool.get_connection() as conn:
+            rows = self._fetch_keyset(conn, "SELECT * FROM books", 'books', sort,
+                                      descending, after, limit)
+        return self._build_page(rows, limit, lambda last: _encode_cursor(
+            'books', sort=sort, desc=descending, after_value=last[sort], after_id=last['id']))
+
     def get_books_by_category(self) -> List[tuple]:
         with self.pool.get_connection() as conn:
             cursor = conn.cursor()
@@ -695,37 +1498,77 @@ class DatabaseHandler:
             return cursor.fetchall()
 
     def get_categories(self) -> List[str]:
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT category FROM books")
-            return [row[0] for row in cursor.fetchall()]
+        def load():
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT DISTINCT category FROM books")
+                return [row[0] for row in cursor.fetchall()]
+
+        return self.cache.get_or_load(('categories',), load)
+
+    def get_overdue_loans(self, as_of: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get open loans past their due date, most overdue first
 
-    def get_overdue_loans(self) -> List[Dict[str, Any]]:
-        """Get all overdue book loans"""
+        Args:
+            as_of: Local time to compare due dates against, defaults to now
+        """
+        now = (as_of or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
         try:
             with self.pool.get_connection() as conn:
                 cursor = conn.cursor()
+                # Range scan on idx_transactions_due; days are computed only for hits
                 cursor.execute("""
                     SELECT 
                         t.id,
+                        t.member_id,
+                        b.isbn,
                         b.title as book_title,
                         m.name as member_name,
                         m.email as member_email,
                         t.issue_date,
-                        JULIANDAY('now') - JULIANDAY(t.issue_date) as days_overdue
+                        t.due_date,
+                        CAST(JULIANDAY(?) - JULIANDAY(t.due_date) AS INTEGER) as days_overdue
                     FROM transactions t
                     JOIN books b ON t.book_id = b.id
                     JOIN members m ON t.member_id = m.id
                     WHERE t.return_date IS NULL 
-                    AND JULIANDAY('now') - JULIANDAY(t.issue_date) > ?
-                    ORDER BY days_overdue DESC
-                """, (Config.LOAN_PERIOD_DAYS,))
+                    AND t.due_date < ?
+                    ORDER BY t.due_date
+                """, (now, now))
                 overdue = cursor.fetchall()
                 return [dict(loan) for loan in overdue]
         except Exception as e:
             logger.error(f"Error getting overdue loans: {e}")
             return []
 
+    def get_loan_contacts(self, loans: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], Dict[str, Any]]:
+        """Member and book details for many (member_id, isbn) pairs in one joined query per chunk
+
+        Returns:
+            {(member_id, isbn): {'member_name', 'member_email', 'book_title'}} for pairs
+            whose member and book both exist
+        """
+        pairs = list(dict.fromkeys(loans))
+        contacts: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        with self.pool.get_connection() as conn:
+            for start in range(0, len(pairs), LOAN_CONTACT_CHUNK):
+                chunk = pairs[start:start + LOAN_CONTACT_CHUNK]
+                rows = conn.execute(f"""
+                    WITH wanted(member_id, isbn) AS (VALUES {", ".join("(?, ?)" for _ in chunk)})
+                    SELECT w.member_id, w.isbn,
+                           m.name AS member_name, m.email AS member_email, b.title AS book_title
+                    FROM wanted w
+                    JOIN members m ON m.id = w.member_id
+                    JOIN books b ON b.isbn = w.isbn
+                """, [value for pair in chunk for value in pair]).fetchall()
+                for row in rows:
+                    contacts[(row['member_id'], row['isbn'])] = {
+                        'member_name': row['member_name'],
+                        'member_email': row['member_email'],
+                        'book_title': row['book_title'],
+                    }
+        return contacts
+
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """
         Execute a SQL query and return results as a list of dictionaries
@@ -793,7 +1636,7 @@ class DatabaseHandler:
                 result = cursor.fetchone()
                 return dict(result) if result else None
                 
-            return self._execute_with_retry(operation)
+            return self.cache.get_or_load(('member', member_id), lambda: self._execute_with_retry(operation))
                 
         except Exception as e:
             logger.error(f"Error getting member by ID: {e}")
@@ -0,0 +1,242 @@
+import argparse
+import json
+import logging
+import random
+import sqlite3
+import time
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from config import Config
+from database import DatabaseHandler, ValidationError
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class DatasetSpec(NamedTuple):
+    """Size and shape of a generated library"""
+    books: int
+    members: int
+    loans: int
+    history_days: int = 730  # Returned loans are spread over this many past days
+    open_share: float = 0.08  # Share of loans still out
+    overdue_share: float = 0.25  # Share of open loans past their due date
+    popularity_skew: float = 1.0  # Zipf exponent of loans over books
+    member_skew: float = 0.5  # Zipf exponent of loans over members
+    author_skew: float = 0.7  # Zipf exponent of books over authors
+
+PRESETS: Dict[str, DatasetSpec] = {
+    'small_branch': DatasetSpec(books=20_000, members=3_000, loans=80_000),
+    'city_system': DatasetSpec(books=500_000, members=150_000, loans=2_500_000),
+}
+
+TITLE_WORDS = ('River', 'Shadow', 'Garden', 'Empire', 'Winter', 'Signal', 'Harbor', 'Silver', 'Forest',
+               'Machine', 'Letters', 'Island', 'Mirror', 'Engine', 'Storm', 'Castle', 'Lantern', 'Voyage',
+               'Orchard', 'Circuit', 'Desert', 'Archive', 'Comet', 'Meadow', 'Thunder', 'Violet', 'Quarry',
+               'Beacon', 'Canyon', 'Harvest', 'Labyrinth', 'Glacier', 'Kingdom', 'Promise', 'Atlas',
+               'Echo', 'Horizon', 'Tide', 'Ember', 'Compass', 'Citadel', 'Whisper', 'Frontier')
+TITLE_PATTERNS = ('The {0}', 'The {0} of the {1}', '{0} and {1}', 'A {0} in {1}', '{0}', 'Beyond the {0}',
+                  'The Last {0}', '{0} {1}')
+FIRST_NAMES = ('Ada', 'Ben', 'Chloe', 'Daniel', 'Elena', 'Farid', 'Grace', 'Hiro', 'Isla', 'Jonas', 'Kemi',
+               'Liam', 'Maya', 'Noah', 'Olga', 'Priya', 'Quinn', 'Rosa', 'Sami', 'Tara', 'Umar', 'Vera',
+               'Wei', 'Ximena', 'Yusuf', 'Zoe')
+SURNAMES = ('Smith', 'Garcia', 'Okafor', 'Nakamura', 'Ivanova', 'Silva', 'Chen', 'Novak', 'Haddad',
+            'Larsen', 'Moreau', 'Kowalski', 'Patel', 'Reyes', 'Schmidt', 'Adeyemi', 'Murphy', 'Rossi',
+            'Kim', 'Nguyen', 'Jensen', 'Cohen', 'Dubois', 'Mensah', 'Sato', 'Walsh')
+CATEGORIES = ('Fiction', 'Children', 'Science', 'History', 'Biography', 'Reference', 'Travel', 'Poetry')
+CATEGORY_WEIGHTS = (40, 20, 10, 9, 8, 5, 5, 3)
+
+BOOKS_PER_AUTHOR = 6  # On average; the Zipf skew gives a few prolific authors and a long tail
+# Rank offset of the Zipf-Mandelbrot weights; flattens the head so the top
+# book or member doesn't take an implausible share of all loans
+ZIPF_OFFSET = 50
+MIN_MEMBER_TENURE_DAYS = 180
+MAX_MEMBER_TENURE_DAYS = 3650
+MAX_DAYS_OVERDUE = 60
+CHUNK_SIZE = 50_000  # Rows generated per batch of random draws
+DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+
+# Local timestamps are generated as seconds since EPOCH in local wall-clock
+# time and formatted by SQLite, which is much faster than strftime per row
+LOCAL_TIME = "datetime(?, 'unixepoch')"
+
+def generate(db: DatabaseHandler, spec: DatasetSpec, seed: int = 0,
+             now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Fill an empty library with synthetic books, members and loans
+
+    The same spec and seed always give the same rows. Loans favour popular
+    books and active members following Zipf distributions; a share of them
+    is still open and some of those are overdue against the category's loan
+    period. Each book gets at least as many copies as it has open loans.
+
+    Everything is written in one transaction: the triggers and secondary
+    indexes on the three tables are dropped, the rows bulk-inserted, then
+    the indexes and triggers recreated and the search index rebuilt, which
+    is far cheaper than maintaining them row by row. The dashboard counters
+    are recomputed at the end.
+
+    Returns:
+        Row counts, open and overdue loans, elapsed seconds and rows per second
+
+    Raises:
+        ValidationError: If the library already has books, members or loans
+    """
+    start = time.perf_counter()
+    existing = db.execute_query("""
+        SELECT EXISTS (SELECT 1 FROM books) OR EXISTS (SELECT 1 FROM members)
+               OR EXISTS (SELECT 1 FROM transactions) AS found
+    """)
+    if existing and existing[0]['found']:
+        raise ValidationError("Synthetic data can only be generated into an empty library")
+    if min(spec.books, spec.members) < 1 or spec.loans < 0:
+        raise ValidationError("A dataset needs at least one book and one member")
+
+    now_ts = int(((now or datetime.now()) - EPOCH).total_seconds())
+    generator = None
+
+    def load(conn: sqlite3.Connection) -> None:
+        nonlocal generator
+        # Fresh state per attempt, so a retried transaction writes the same rows
+        generator = _LibraryGenerator(spec, seed, now_ts)
+        schema = _drop_derived_schema(conn, ('books', 'members', 'transactions'))
+        conn.executemany(f"INSERT INTO members (id, name, email, phone, join_date) "
+                         f"VALUES (?, ?, ?, ?, {LOCAL_TIME})", generator.member_rows())
+        # Loans go in before books so each book's copies can cover its open loans
+        conn.executemany(f"INSERT INTO transactions (book_id, member_id, issue_date, return_date, status, due_date) "
+                         f"VALUES (?, ?, {LOCAL_TIME}, {LOCAL_TIME}, ?, {LOCAL_TIME})", generator.loan_rows())
+        conn.executemany("INSERT INTO books (id, title, author, isbn, quantity, available, category) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", generator.book_rows())
+        for sql in schema:
+            conn.execute(sql)
+        if db.has_fts:
+            conn.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+    db.run_write(load)
+    db.refresh_dashboard_snapshot()
+    db.cache.clear()
+
+    elapsed = time.perf_counter() - start
+    rows = spec.books + spec.members + spec.loans
+    report = {'books': spec.books, 'members': spec.members, 'loans': spec.loans, **generator.counts,
+              'seconds': round(elapsed, 3), 'rows_per_second': round(rows / elapsed) if elapsed else 0}
+    logger.info(f"Generated {rows} rows in {elapsed:.1f}s (seed {seed})")
+    return report
+
+class _LibraryGenerator:
+    """Row streams for one generated library; books must be drawn after loans"""
+
+    def __init__(self, spec: DatasetSpec, seed: int, now_ts: int):
+        self.spec = spec
+        self.now_ts = now_ts
+        self.rng = rng = random.Random(seed)
+        self.categories = rng.choices(CATEGORIES, weights=CATEGORY_WEIGHTS, k=spec.books)
+        self.periods = {category: Config.loan_period_days(category) * DAY for category in CATEGORIES}
+        self.tenures = [int(rng.uniform(MIN_MEMBER_TENURE_DAYS, MAX_MEMBER_TENURE_DAYS) * DAY)
+                        for _ in range(spec.members)]
+        self.open_loans = [0] * spec.books
+        self.counts = {'open_loans': 0, 'overdue_loans': 0}
+
+    def member_rows(self) -> Iterator[Tuple]:
+        rng = self.rng
+        for member_id, tenure in enumerate(self.tenures, 1):
+            first, surname = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+            yield (member_id, f"{first} {surname}", f"{first}.{surname}{member_id}@example.org".lower(),
+                   f"07{member_id:09d}", self.now_ts - tenure)
+
+    def loan_rows(self) -> Iterator[Tuple]:
+        spec, rng, now_ts, counts = self.spec, self.rng, self.now_ts, self.counts
+        categories, periods, tenures, open_loans = self.categories, self.periods, self.tenures, self.open_loans
+        # Popularity ranks map to shuffled ids so popular rows are spread through the tables
+        book_ids, member_ids = list(range(spec.books)), list(range(spec.members))
+        rng.shuffle(book_ids)
+        rng.shuffle(member_ids)
+        book_weights = _zipf_cum_weights(spec.books, spec.popularity_skew)
+        member_weights = _zipf_cum_weights(spec.members, spec.member_skew)
+        history = spec.history_days * DAY
+        # random() scaled to a range is several times faster than randint per row
+        draw = rng.random
+        for chunk_start in range(0, spec.loans, CHUNK_SIZE):
+            k = min(CHUNK_SIZE, spec.loans - chunk_start)
+            books = rng.choices(book_ids, cum_weights=book_weights, k=k)
+            members = rng.choices(member_ids, cum_weights=member_weights, k=k)
+            for book, member in zip(books, members):
+                period = periods[categories[book]]
+                if draw() < spec.open_share:
+                    if draw() < spec.overdue_share:
+                        age = period + DAY + int(draw() * (MAX_DAYS_OVERDUE - 1) * DAY)
+                        counts['overdue_loans'] += 1
+                    else:
+                        age = int(draw() * period)
+                    issued, returned = now_ts - age, None
+                    open_loans[book] += 1
+                    counts['open_loans'] += 1
+                else:
+                    issued = now_ts - int(draw() * min(history, tenures[member]))
+                    returned = min(issued + DAY // 2 + int(draw() * (period + 10 * DAY)), now_ts)
+                yield (book + 1, member + 1, issued, returned,
+                       'issued' if returned is None else 'returned', issued + period)
+
+    def book_rows(self) -> Iterator[Tuple]:
+        spec, rng, open_loans = self.spec, self.rng, self.open_loans
+        authors = max(spec.books // BOOKS_PER_AUTHOR, 1)
+        author_weights = _zipf_cum_weights(authors, spec.author_skew)
+        for chunk_start in range(0, spec.books, CHUNK_SIZE):
+            k = min(CHUNK_SIZE, spec.books - chunk_start)
+            for offset, author in enumerate(rng.choices(range(authors), cum_weights=author_weights, k=k)):
+                book = chunk_start + offset
+                title = rng.choice(TITLE_PATTERNS).format(rng.choice(TITLE_WORDS), rng.choice(TITLE_WORDS))
+                quantity = max(rng.choice((1, 1, 1, 2, 2, 3)), open_loans[book])
+                yield (book + 1, title, _author_name(author), _isbn13(book), quantity,
+                       quantity - open_loans[book], self.categories[book])
+
+def _drop_derived_schema(conn: sqlite3.Connection, tables: Tuple[str, ...]) -> List[str]:
+    """Drop the triggers and secondary indexes on tables, returning SQL to recreate them"""
+    placeholders = ', '.join('?' * len(tables))
+    rows = conn.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND tbl_name IN ({placeholders}) AND sql IS NOT NULL
+        ORDER BY type = 'trigger', name
+    """, tables).fetchall()
+    for kind, name, _ in rows:
+        conn.execute(f'DROP {kind.upper()} "{name}"')
+    return [sql for _, _, sql in rows]
+
+def _zipf_cum_weights(n: int, skew: float) -> List[float]:
+    return list(accumulate((rank + ZIPF_OFFSET) ** -skew for rank in range(n)))
+
+def _author_name(author: int) -> str:
+    """A distinct name for each author index, double-barrelled past the simple names"""
+    author, first = divmod(author, len(FIRST_NAMES))
+    author, initial = divmod(author, 26)
+    author, surname = divmod(author, len(SURNAMES))
+    name = f"{FIRST_NAMES[first]} {chr(ord('A') + initial)}. {SURNAMES[surname]}"
+    return f"{name}-{SURNAMES[author % len(SURNAMES)]}" if author else name
+
+def _isbn13(n: int) -> str:
+    """A valid, unique ISBN-13 for the n-th book"""
+    digits = f"978{n % 10 ** 9:09d}" if n < 10 ** 9 else f"979{n % 10 ** 9:09d}"
+    check = -(sum(map(int, digits[::2])) + 3 * sum(map(int, digits[1::2]))) % 10
+    return digits + str(check)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic library into an empty database")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small_branch')
+    parser.add_argument('--db', default=Config.DB_PATH, help="Database file (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    for field in ('books', 'members', 'loans'):
+        parser.add_argument(f'--{field}', type=int, help=f"Override the preset's number of {field}")
+    args = parser.parse_args()
+
+    spec = PRESETS[args.preset]._replace(**{field: getattr(args, field) for field in ('books', 'members', 'loans')
+                                            if getattr(args, field) is not None})
+    Config.setup_logging()
+    Config.DB_PATH = args.db
+    db = DatabaseHandler()
+    try:
+        print(json.dumps(generate(db, spec, args.seed), indent=2))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import sqlite3
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+_STOP = object()
+
+# Attempts at a batch whose BEGIN or COMMIT finds the database locked, as in _execute_with_retry
+BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.5  # Seconds, times the attempt number
+
+class DatabaseWriter:
+    """Single writer thread that serializes all mutations on one connection
+
+    Requests queued while a transaction is being committed are coalesced into
+    the next transaction (group commit). Each request runs inside its own
+    SAVEPOINT, so a failing request is rolled back without affecting the
+    others in its batch. Futures resolve only after the batch commits.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection],
+                 max_batch: Optional[int] = None, batch_window: Optional[float] = None):
+        self._connect = connect
+        self.max_batch = max(max_batch or Config.WRITER_MAX_BATCH, 1)
+        self.batch_window = (Config.WRITER_BATCH_WINDOW_MS / 1000
+                             if batch_window is None else batch_window)
+        self._queue: Queue = Queue()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._metrics = {'requests': 0, 'batches': 0, 'max_batch': 0, 'failed_batches': 0}
+
+        # Open the connection up front so configuration errors surface here
+        ready = threading.Event()
+        startup: List[BaseException] = []
+        self._thread = threading.Thread(target=self._run, args=(ready, startup),
+                                        name="db-writer", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if startup:
+            raise startup[0]
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """Queue a write; the operation must not BEGIN/COMMIT itself"""
+        if threading.current_thread() is self._thread:
+            # Nested write from inside a running operation: join its transaction
+            future: Future = Future()
+            future.set_result(operation(self._conn))
+            return future
+        if self._closed:
+            raise RuntimeError("Database writer is closed")
+        future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def execute(self, operation: WriteOperation, timeout: Optional[float] = None) -> Any:
+        """Submit a write and wait for its committed result"""
+        return self.submit(operation).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request and group-commit batch counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['queued'] = self._queue.qsize()
+        metrics['avg_batch'] = metrics['requests'] / metrics['batches'] if metrics['batches'] else 0.0
+        return metrics
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish queued writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self, ready: threading.Event, startup: List[BaseException]) -> None:
+        try:
+            self._conn = self._connect()
+        except BaseException as e:
+            startup.append(e)
+            ready.set()
+            return
+        ready.set()
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+
+        self._conn.close()
+
+    def _commit_batch(self, batch: List[Tuple[WriteOperation, Future]]) -> None:
+        batch = [(operation, future) for operation, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        for attempt in range(BUSY_RETRIES):
+            try:
+                outcomes = self._run_batch(batch)
+                break
+            except Exception as e:
+                try:
+                    if self._conn.in_transaction:
+                        self._conn.rollback()
+                except sqlite3.Error:
+                    pass
+                # Another process holds the write lock past busy_timeout: retry the whole batch
+                if (isinstance(e, sqlite3.OperationalError) and "database is locked" in str(e)
+                        and attempt < BUSY_RETRIES - 1):
+                    logger.warning(f"Database locked, group commit attempt {attempt + 1} of {BUSY_RETRIES}")
+                    time.sleep(BUSY_BACKOFF * (attempt + 1))
+                    continue
+                logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+                with self._lock:
+                    self._metrics['failed_batches'] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        with self._lock:
+            self._metrics['requests'] += len(outcomes)
+            self._metrics['batches'] += 1
+            self._metrics['max_batch'] = max(self._metrics['max_batch'], len(outcomes))
+        # Results are only published once they are durable
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _run_batch(self, batch: List[Tuple[WriteOperation, Future]]) -> List[Tuple[Future, bool, Any]]:
+        """Run a batch in one transaction, each request in its own savepoint"""
+        conn = self._conn
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        for operation, future in batch:
+            conn.execute("SAVEPOINT write_request")
+            try:
+                result = operation(conn)
+                conn.execute("RELEASE write_request")
+                outcomes.append((future, True, result))
+            except Exception as e:
+                conn.execute("ROLLBACK TO write_request")
+                conn.execute("RELEASE write_request")
+                outcomes.append((future, False, e))
+        conn.commit()
+        return outcomes
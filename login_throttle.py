@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class LoginThrottle:
+    """In-memory sliding-window login failure counter with lockouts
+
+    Failures are counted per username and per source (e.g. a client
+    address) over the last ``window`` seconds. Reaching the limit locks the
+    key for ``lockout`` seconds. Nothing here touches the database: callers
+    persist a username lockout only when record_failure reports a new one,
+    so a brute-force burst costs at most one write.
+
+    Failures for usernames that do not exist count against the source only,
+    so a flood of junk names cannot grow the table or push out a real
+    account's count. Past max_keys, keys with no failures inside the window
+    are dropped, least recently failed first; a key that still has recent
+    failures is never evicted. If every key is active, new sources go
+    untracked (usernames are always tracked, as they are bounded by the
+    accounts that exist).
+    """
+
+    def __init__(self, max_failures: Optional[int] = None, max_source_failures: Optional[int] = None,
+                 window: Optional[float] = None, lockout: Optional[float] = None,
+                 max_keys: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_failures = max_failures or Config.LOGIN_MAX_FAILURES
+        self.max_source_failures = max_source_failures or Config.LOGIN_MAX_SOURCE_FAILURES
+        self.window = window if window is not None else Config.LOGIN_FAILURE_WINDOW
+        self.lockout = lockout if lockout is not None else Config.LOGIN_LOCKOUT_SECONDS
+        self.max_keys = max_keys
+        self.clock = clock
+        self._failures: "OrderedDict[Tuple[str, str], Deque[float]]" = OrderedDict()
+        self._locked: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._metrics = {'failures': 0, 'lockouts': 0, 'rejected': 0, 'untracked': 0}
+
+    def locked_until(self, username: str, source: Optional[str] = None) -> Optional[float]:
+        """Epoch time the username or source stays locked until, or None"""
+        now = self.clock()
+        with self._lock:
+            until = max((self._locked.get(key, 0.0) for key in self._keys(username, source)), default=0.0)
+            if until > now:
+                self._metrics['rejected'] += 1
+                return until
+            return None
+
+    def record_failure(self, username: str, source: Optional[str] = None,
+                       known: bool = True) -> Optional[float]:
+        """Count a failed login
+
+        Args:
+            username: Username tried
+            source: Client address or similar, if any
+            known: False if no such user exists; only the source is counted
+
+        Returns:
+            The lockout expiry if this failure newly locked the username, else None
+        """
+        now = self.clock()
+        new_lockout = None
+        keys = self._keys(username, source) if known else self._keys(None, source)
+        with self._lock:
+            self._metrics['failures'] += 1
+            for key in keys:
+                failures = self._failures.pop(key, None)
+                if failures is None:
+                    if not self._make_room(now) and key[0] == 'source':
+                        self._metrics['untracked'] += 1
+                        logger.warning(f"Login throttle full, not tracking source {key[1]}")
+                        continue
+                    failures = deque()
+                self._failures[key] = failures
+                while failures and failures[0] <= now - self.window:
+                    failures.popleft()
+                failures.append(now)
+                limit = self.max_failures if key[0] == 'user' else self.max_source_failures
+                if len(failures) >= limit and self._locked.get(key, 0.0) <= now:
+                    self._locked[key] = now + self.lockout
+                    failures.clear()
+                    self._metrics['lockouts'] += 1
+                    logger.warning(f"Locked {key[0]} {key[1]} after {limit} failed logins")
+                    if key[0] == 'user':
+                        new_lockout = now + self.lockout
+        return new_lockout
+
+    def record_success(self, username: str) -> None:
+        """Forget the username's failures and lockout"""
+        key = ('user', username)
+        with self._lock:
+            self._failures.pop(key, None)
+            self._locked.pop(key, None)
+
+    def lock(self, username: str, until: float) -> None:
+        """Apply a lockout read back from storage, e.g. after a restart"""
+        with self._lock:
+            key = ('user', username)
+            self._locked[key] = max(self._locked.get(key, 0.0), until)
+
+    def stats(self) -> Dict[str, int]:
+        now = self.clock()
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['locked'] = sum(until > now for until in self._locked.values())
+            metrics['tracked'] = len(self._failures)
+        return metrics
+
+    def _make_room(self, now: float) -> bool:
+        """Drop stale keys until one more fits; False if all keys are active
+
+        Keys are kept in order of their latest failure, so the first one is
+        the stalest and the scan stops at the first active key.
+        """
+        while len(self._failures) >= self.max_keys:
+            key, failures = next(iter(self._failures.items()))
+            if failures and failures[-1] > now - self.window:
+                return False
+            del self._failures[key]
+            # A lockout outlives its failure history
+            if self._locked.get(key, 0.0) <= now:
+                self._locked.pop(key, None)
+        return True
+
+    @staticmethod
+    def _keys(username: Optional[str], source: Optional[str]):
+        keys = [('user', username)] if username is not None else []
+        if source:
+            keys.append(('source', source))
+        return keys
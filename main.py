@@ -1,13 +1,19 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from config import Config
 from database import DatabaseHandler 
 from session import Session
 from ui import LoginWindow
 import sys
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -20,6 +26,46 @@ except ImportError:
     print("ttkthemes not installed")
     HAS_TTKTHEMES = False
 
+# Modules that should not be loaded before the login window is shown
+DEFERRED_MODULES = ('matplotlib', 'PIL.ImageTk', 'notification', 'pandas')
+
+class StartupProfiler:
+    """Collects wall time per startup phase when profiling is enabled
+
+    Enable with ``python main.py --profile-startup`` or PROFILE_STARTUP=1.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self) -> str:
+        """Format the per-phase timings, the total against the budget and any early heavy imports"""
+        lines = ["Startup profile:"]
+        lines += [f"  {name:<20} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        total_ms = self.total() * 1000
+        status = "over budget" if total_ms > Config.STARTUP_BUDGET_MS else "within budget"
+        lines.append(f"  {'total':<20} {total_ms:8.1f} ms ({status}: {Config.STARTUP_BUDGET_MS} ms)")
+        loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+        if loaded:
+            lines.append(f"  loaded before login: {', '.join(loaded)}")
+        return "\n".join(lines)
+
 def create_window() -> tk.Tk:
     """Create main window with fallback options and enhanced error handling
     
@@ -85,18 +131,34 @@ def center_window(window: tk.Tk) -> None:
 def main() -> None:
     root = None
     db = None
+    profiler = StartupProfiler('--profile-startup' in sys.argv or Config.PROFILE_STARTUP)
+    profiler.record('imports', _IMPORT_SECONDS)
     
     try:
         Config.setup_logging()
-        root = create_window()
+        with profiler.phase('create_window'):
+            root = create_window()
         
         # Initialize database with connection check
-        db = DatabaseHandler()
-        if not db.test_connection():
-            raise RuntimeError("Database connection test failed")
+        with profiler.phase('DatabaseHandler()'):
+            db = DatabaseHandler()
+        with profiler.phase('test_connection'):
+            if not db.test_connection():
+                raise RuntimeError("Database connection test failed")
         
-        app = LoginWindow(root, db)
-        center_window(root)
+        with profiler.phase('LoginWindow'):
+            app = LoginWindow(root, db)
+            center_window(root)
+            # Include the first paint of the login screen
+            root.update_idletasks()
+
+        if profiler.enabled:
+            report = profiler.report()
+            logger.info(report)
+            print(report, file=sys.stderr)
+            if profiler.total() * 1000 > Config.STARTUP_BUDGET_MS:
+                logger.warning(f"Startup took {profiler.total() * 1000:.0f} ms, "
+                               f"budget is {Config.STARTUP_BUDGET_MS} ms")
         
         def on_closing() -> None:
             if messagebox.askokcancel("Quit", "Do you want to quit?"):
@@ -0,0 +1,282 @@
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class Migration(NamedTuple):
+    """A single ordered schema change
+
+    Steps must be idempotent so a database that was partially upgraded by
+    hand (or by an older build) can still be migrated safely. A step with
+    transactional=False runs in autocommit mode and commits its own work,
+    for backfills too large to hold the write lock for; if interrupted it
+    is simply run again.
+    """
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Cursor], None]
+    transactional: bool = True
+
+def _column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+def _m001_hot_path_indexes(cursor: sqlite3.Cursor) -> None:
+    """Indexes for circulation, dashboard and catalog queries"""
+    # Formerly an ad-hoc probe in create_tables
+    if not _column_exists(cursor, 'users', 'login_attempts'):
+        cursor.execute("ALTER TABLE users ADD COLUMN login_attempts INTEGER DEFAULT 0")
+
+    # return_book: open loan for a member/book pair
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_member_book
+        ON transactions(member_id, book_id, return_date)
+    """)
+    # get_active_loans: only open loans, ordered by issue date
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_open
+        ON transactions(issue_date) WHERE return_date IS NULL
+    """)
+    # get_monthly_loans and loan history ordering
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_issue_date ON transactions(issue_date)")
+    # Category charts and filters
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_category ON books(category)")
+    # Keyset pagination walks books in (title, id) order
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)")
+
+# Recompute the dashboard counters from scratch
+REFRESH_LIBRARY_STATS_SQL = """
+    INSERT INTO library_stats (id, total_books, available_books, total_members, active_loans)
+    SELECT 1,
+           (SELECT COUNT(*) FROM books),
+           (SELECT COALESCE(SUM(available), 0) FROM books),
+           (SELECT COUNT(*) FROM members),
+           (SELECT COUNT(*) FROM transactions WHERE return_date IS NULL)
+    WHERE true
+    ON CONFLICT(id) DO UPDATE SET
+        total_books = excluded.total_books,
+        available_books = excluded.available_books,
+        total_members = excluded.total_members,
+        active_loans = excluded.active_loans
+"""
+
+def _m002_library_stats(cursor: sqlite3.Cursor) -> None:
+    """Single-row dashboard counters kept current by triggers"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS library_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_books INTEGER NOT NULL DEFAULT 0,
+            available_books INTEGER NOT NULL DEFAULT 0,
+            total_members INTEGER NOT NULL DEFAULT 0,
+            active_loans INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for statement in (
+        """CREATE TRIGGER IF NOT EXISTS library_stats_books_ai AFTER INSERT ON books BEGIN
+               UPDATE library_stats SET total_books = total_books + 1,
+                   available_books = available_books + COALESCE(new.available, 0) WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_books_ad AFTER DELETE ON books BEGIN
+               UPDATE library_stats SET total_books = total_books - 1,
+                   available_books = available_books - COALESCE(old.available, 0) WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_books_au AFTER UPDATE OF available ON books
+           WHEN new.available IS NOT old.available BEGIN
+               UPDATE library_stats SET available_books = available_books
+                   + COALESCE(new.available, 0) - COALESCE(old.available, 0) WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_members_ai AFTER INSERT ON members BEGIN
+               UPDATE library_stats SET total_members = total_members + 1 WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_members_ad AFTER DELETE ON members BEGIN
+               UPDATE library_stats SET total_members = total_members - 1 WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_transactions_ai AFTER INSERT ON transactions
+           WHEN new.return_date IS NULL BEGIN
+               UPDATE library_stats SET active_loans = active_loans + 1 WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_transactions_ad AFTER DELETE ON transactions
+           WHEN old.return_date IS NULL BEGIN
+               UPDATE library_stats SET active_loans = active_loans - 1 WHERE id = 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS library_stats_transactions_au AFTER UPDATE OF return_date ON transactions
+           WHEN (new.return_date IS NULL) != (old.return_date IS NULL) BEGIN
+               UPDATE library_stats SET active_loans = active_loans
+                   + (new.return_date IS NULL) - (old.return_date IS NULL) WHERE id = 1;
+           END""",
+    ):
+        cursor.execute(statement)
+    # Seed from the existing rows; triggers keep it current from here on
+    cursor.execute(REFRESH_LIBRARY_STATS_SQL)
+
+def _m003_sort_indexes(cursor: sqlite3.Cursor) -> None:
+    """Indexes behind the sortable book and member table columns"""
+    # (column, rowid) index order matches the keyset (column, id) order
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_author ON books(author)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_available ON books(available)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_name ON members(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_join_date ON members(join_date)")
+
+def _m004_member_search_indexes(cursor: sqlite3.Cursor) -> None:
+    """Case-insensitive prefix search on member name and email, prefix search on phone"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_name_nocase ON members(name COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_email_nocase ON members(email COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_phone ON members(phone)")
+
+def _m005_data_version(cursor: sqlite3.Cursor) -> None:
+    """Counter bumped whenever data behind the dashboard charts changes"""
+    if not _column_exists(cursor, 'library_stats', 'data_version'):
+        cursor.execute("ALTER TABLE library_stats ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+    bump = "UPDATE library_stats SET data_version = data_version + 1 WHERE id = 1;"
+    for name, event in (
+        ('books_ai', "AFTER INSERT ON books"),
+        ('books_ad', "AFTER DELETE ON books"),
+        ('books_au', "AFTER UPDATE OF category ON books"),
+        ('transactions_ai', "AFTER INSERT ON transactions"),
+        ('transactions_ad', "AFTER DELETE ON transactions"),
+        ('transactions_au', "AFTER UPDATE OF issue_date ON transactions"),
+    ):
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS data_version_{name} {event} BEGIN {bump} END")
+
+# Transactions backfilled per UPDATE by the due_date migration
+BACKFILL_CHUNK_SIZE = 5000
+
+def _m006_due_dates(cursor: sqlite3.Cursor) -> None:
+    """Store each loan's due date so overdue checks are an index range scan
+
+    Self-managed transactions: each backfill chunk is committed on its own,
+    so the write lock is released and the WAL can checkpoint between chunks.
+    """
+    conn = cursor.connection
+    cursor.execute("BEGIN IMMEDIATE")
+    if not _column_exists(cursor, 'transactions', 'due_date'):
+        cursor.execute("ALTER TABLE transactions ADD COLUMN due_date TEXT")
+    conn.commit()
+
+    # Backfill with the loan policy in force now, walking id ranges so each
+    # transaction touches a bounded number of rows; rows already filled are
+    # skipped, so a rerun resumes. Loans of since-deleted books get the
+    # default period.
+    policies = list(Config.LOAN_PERIODS_BY_CATEGORY.items())
+    period = "CASE b.category " + "WHEN ? THEN ? " * len(policies) + "ELSE ? END" if policies else "?"
+    params = [value for policy in policies for value in policy] + [Config.LOAN_PERIOD_DAYS] * 2
+    backfill = f"""
+        UPDATE transactions
+        SET due_date = datetime(issue_date, '+' || COALESCE(
+            (SELECT {period} FROM books b WHERE b.id = transactions.book_id), ?
+        ) || ' days')
+        WHERE id > ? AND id <= ? AND due_date IS NULL AND issue_date IS NOT NULL
+    """
+    last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+    for start in range(0, last_id, BACKFILL_CHUNK_SIZE):
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(backfill, (*params, start, start + BACKFILL_CHUNK_SIZE))
+        conn.commit()
+
+    # get_overdue_loans: open loans ordered by due date
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_due
+        ON transactions(due_date) WHERE return_date IS NULL
+    """)
+
+def _m007_outbox(cursor: sqlite3.Cursor) -> None:
+    """Notification outbox drained by outbox.OutboxDispatcher"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending', -- pending, sent or dead
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            sent_at TEXT,
+            last_error TEXT
+        )
+    """)
+    # Dispatcher claims: due pending messages in order
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending
+        ON outbox(next_attempt_at) WHERE status = 'pending'
+    """)
+
+def _m008_login_lockout(cursor: sqlite3.Cursor) -> None:
+    """Persisted login lockout; failure counting itself lives in memory"""
+    if not _column_exists(cursor, 'users', 'locked_until'):
+        cursor.execute("ALTER TABLE users ADD COLUMN locked_until TEXT")
+
+def _m009_outbox_status_index(cursor: sqlite3.Cursor) -> None:
+    """Per-status outbox counts, recent latency and the sent-message purge"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_status
+        ON outbox(status, sent_at)
+    """)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "hot path indexes", _m001_hot_path_indexes),
+    Migration(2, "library stats counters", _m002_library_stats),
+    Migration(3, "sort indexes", _m003_sort_indexes),
+    Migration(4, "member search indexes", _m004_member_search_indexes),
+    Migration(5, "chart data version", _m005_data_version),
+    Migration(6, "loan due dates", _m006_due_dates, transactional=False),
+    Migration(7, "notification outbox", _m007_outbox),
+    Migration(8, "login lockout", _m008_login_lockout),
+    Migration(9, "outbox status index", _m009_outbox_status_index),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration version, 0 for a new database"""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def apply_migrations(conn: sqlite3.Connection, migrations: List[Migration] = MIGRATIONS) -> int:
+    """Apply pending migrations in version order, each in its own transaction
+
+    Args:
+        conn: Connection in autocommit mode (isolation_level=None)
+        migrations: Ordered migration steps, defaults to MIGRATIONS
+
+    Returns:
+        The schema version after migrating
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= get_schema_version(conn):
+            continue
+
+        try:
+            if not migration.transactional:
+                migration.apply(conn.cursor())
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have applied it while we waited for the lock
+            if migration.version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            if migration.transactional:
+                migration.apply(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+            logger.info(f"Applied migration {migration.version}: {migration.name}")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+
+    return get_schema_version(conn)
@@ -1,42 +1,33 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-import smtplib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from email.mime.text import MIMEText
 from config import Config
+from smtp_pool import SMTPSessionPool
+from outbox import enqueue
+from rate_limiter import RateLimiter, RateLimitExceeded
 import re
 import time
-from functools import wraps
 
 class NotificationError(Exception):
     """Custom exception for notification-related errors"""
     pass
 
-def rate_limit(max_calls: int, time_frame: int):
-    """Rate limiting decorator"""
-    calls = []
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            now = time.time()
-            calls[:] = [call for call in calls if call > now - time_frame]
-            if len(calls) >= max_calls:
-                raise NotificationError("Rate limit exceeded")
-            calls.append(now)
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
-
 logger = logging.getLogger(__name__)
 
 class NotificationSystem:
     MAX_RETRY_ATTEMPTS = 3
+    OVERDUE_SUBJECT = "Library Book Overdue Notice"
+    # Loan fields needed to write a notice; looked up in bulk when missing
+    CONTACT_FIELDS = ('member_name', 'member_email', 'book_title')
     EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
-    def __init__(self, db):
+    def __init__(self, db, rate_limiter: Optional[RateLimiter] = None):
         if not db:
             raise ValueError("Database connection cannot be None")
         self.db = db
+        self.rate_limiter = rate_limiter or RateLimiter()
         self.logger = logging.getLogger(__name__)
 
     def send_message(self, message: str) -> None:
@@ -52,51 +43,128 @@ class NotificationSystem:
         required_fields = ['member_id', 'isbn', 'due_date']
         return all(field in loan and loan[field] for field in required_fields)
 
-    @rate_limit(max_calls=100, time_frame=3600)  # 100 notifications per hour
-    def notify_overdue_books(self, overdue_loans: List[Dict[str, Any]]) -> None:
-        """Send notifications for overdue books"""
+    def notify_overdue_books(self, overdue_loans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Email each overdue loan's member, spreading delivery over a bounded worker pool
+
+        Loans that lack member and book details are completed with one
+        batched lookup, and workers share pooled SMTP sessions. Sends over
+        the rate limits fail individually and are counted as throttled.
+
+        Returns:
+            Report with 'total', 'sent', 'failed', 'throttled', 'skipped', 'errors'
+            and 'elapsed' seconds
+        """
+        started = time.monotonic()
+        report: Dict[str, Any] = {'total': len(overdue_loans), 'sent': 0, 'failed': 0,
+                                  'throttled': 0, 'skipped': 0, 'errors': []}
         if not overdue_loans:
             self.logger.info("No overdue books to process")
-            return
+            report['elapsed'] = 0.0
+            return report
 
         message = f"You have {len(overdue_loans)} overdue book(s)."
         self.send_message(message)
 
+        notices = self._prepare_notices(overdue_loans, report)
+        if notices:
+            workers = max(min(Config.NOTIFY_WORKERS, len(notices)), 1)
+            with SMTPSessionPool(size=min(Config.SMTP_POOL_SIZE, workers)) as pool, \
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify") as executor:
+                futures = {
+                    executor.submit(self._send_email_with_retry, email, self.OVERDUE_SUBJECT, body, pool): email
+                    for _, email, body in notices
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        report['sent'] += 1
+                    except Exception as e:
+                        report['failed'] += 1
+                        report['throttled'] += isinstance(e, RateLimitExceeded)
+                        report['errors'].append(f"{futures[future]}: {e}")
+
+        report['elapsed'] = round(time.monotonic() - started, 3)
+        self.logger.info(f"Overdue notices: {report['sent']} sent, {report['failed']} failed, "
+                         f"{report['skipped']} skipped in {report['elapsed']}s")
+        return report
+
+    def queue_overdue_notices(self, overdue_loans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Mark loans overdue and queue their notices in the outbox in one transaction
+
+        Nothing is sent here; an outbox.OutboxDispatcher delivers the messages.
+        Each loan is queued at most once per day, so repeated checks are safe.
+
+        Returns:
+            Report with 'total', 'queued', 'duplicates' and 'skipped' counts
+        """
+        report: Dict[str, Any] = {'total': len(overdue_loans), 'queued': 0, 'duplicates': 0,
+                                  'skipped': 0, 'errors': []}
+        notices = self._prepare_notices(overdue_loans, report)
+        if not notices:
+            return report
+
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        def operation(conn) -> int:
+            queued = 0
+            for loan, email, body in notices:
+                if loan.get('id'):
+                    conn.execute("UPDATE transactions SET status = 'overdue' "
+                                 "WHERE id = ? AND return_date IS NULL", (loan['id'],))
+                loan_key = loan.get('id') or f"{loan['member_id']}:{loan['isbn']}"
+                queued += enqueue(conn, f"overdue:{loan_key}:{today}", email, self.OVERDUE_SUBJECT, body)
+            return queued
+
+        report['queued'] = self.db.run_write(operation)
+        report['duplicates'] = len(notices) - report['queued']
+        self.logger.info(f"Queued {report['queued']} overdue notice(s), "
+                         f"{report['duplicates']} already queued today")
+        return report
+
+    def _prepare_notices(self, overdue_loans: List[Dict[str, Any]],
+                         report: Dict[str, Any]) -> List[Tuple[Dict[str, Any], str, str]]:
+        """Build (loan, email, message) triples, counting unusable loans as skipped"""
+        def skip(reason: str) -> None:
+            self.logger.error(f"Error processing overdue loan: {reason}")
+            report['skipped'] += 1
+            report['errors'].append(reason)
+
+        loans = []
         for loan in overdue_loans:
-            try:
-                if not self._validate_loan_data(loan):
-                    raise ValueError(f"Invalid loan data: {loan}")
-
-                member = self.db.get_member(loan['member_id'])
-                if not member or not member.get('email') or not member.get('name'):
-                    raise ValueError(f"Invalid member data for ID: {loan['member_id']}")
-
-                if not self._validate_email(member['email']):
-                    raise ValueError(f"Invalid email address: {member['email']}")
-
-                book = self.db.get_book(loan['isbn'])
-                if not book or not book.get('title'):
-                    raise ValueError(f"Invalid book data for ISBN: {loan['isbn']}")
-
-                days_overdue = (datetime.now() - loan['due_date']).days
-                
-                message = self._create_overdue_message(
-                    member['name'],
-                    book['title'],
-                    days_overdue,
-                    loan['due_date']
-                )
-                
-                self._send_email_with_retry(
-                    member['email'],
-                    "Library Book Overdue Notice",
-                    message
-                )
-                
-            except Exception as e:
-                self.logger.error(f"Error processing overdue loan: {e}")
+            if self._validate_loan_data(loan):
+                loans.append(loan)
+            else:
+                skip(f"Invalid loan data: {loan}")
+
+        missing = [(loan['member_id'], loan['isbn']) for loan in loans
+                   if not all(loan.get(field) for field in self.CONTACT_FIELDS)]
+        contacts = self.db.get_loan_contacts(missing) if missing else {}
+
+        now = datetime.now()
+        notices = []
+        for loan in loans:
+            if all(loan.get(field) for field in self.CONTACT_FIELDS):
+                details = loan
+            else:
+                details = contacts.get((loan['member_id'], loan['isbn']))
+            if not details or not all(details.get(field) for field in self.CONTACT_FIELDS):
+                skip(f"Unknown member or book for loan: member {loan['member_id']}, ISBN {loan['isbn']}")
+                continue
+            if not self._validate_email(details['member_email']):
+                skip(f"Invalid email address: {details['member_email']}")
                 continue
 
+            due_date = loan['due_date']
+            if isinstance(due_date, str):
+                due_date = datetime.strptime(due_date, "%Y-%m-%d %H:%M:%S")
+            notices.append((loan, details['member_email'], self._create_overdue_message(
+                details['member_name'],
+                details['book_title'],
+                (now - due_date).days,
+                due_date
+            )))
+        return notices
+
     def _create_overdue_message(self, 
                               member_name: str,
                               book_title: str,
@@ -122,41 +190,48 @@ class NotificationSystem:
         Library Management System
         """
 
-    def _send_email_with_retry(self, to_email: str, subject: str, message: str) -> None:
-        """Send email with retry mechanism"""
+    def _send_email_with_retry(self, to_email: str, subject: str, message: str,
+                               pool: Optional[SMTPSessionPool] = None) -> None:
+        """Send email, retrying failed attempts on a fresh SMTP session
+
+        Raises:
+            RateLimitExceeded: If the recipient, its domain or the global limit is exhausted
+        """
         if not all([to_email, subject, message]):
             raise ValueError("Email parameters cannot be empty")
+        self.rate_limiter.check(to_email, timeout=Config.NOTIFY_RATE_WAIT)
 
         for attempt in range(self.MAX_RETRY_ATTEMPTS):
             try:
-                self._send_email(to_email, subject, message)
+                self._send_email(to_email, subject, message, pool)
                 return
+            except ValueError:
+                raise
             except Exception as e:
                 if attempt == self.MAX_RETRY_ATTEMPTS - 1:
                     raise NotificationError(f"Failed to send email after {self.MAX_RETRY_ATTEMPTS} attempts")
+                # The failed session was dropped, so the retry reconnects
                 self.logger.warning(f"Retry attempt {attempt + 1} failed: {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
 
-    def _send_email(self, to_email: str, subject: str, message: str) -> None:
-        """Send email using configured SMTP server"""
+    def _send_email(self, to_email: str, subject: str, message: str,
+                    pool: Optional[SMTPSessionPool] = None) -> None:
+        """Send email on a pooled SMTP session, or a one-off session without a pool"""
         if not self._validate_email(to_email):
             raise ValueError(f"Invalid email address: {to_email}")
+        if not all([Config.SMTP_SERVER, Config.SMTP_PORT, Config.SMTP_FROM]):
+            raise ValueError("SMTP configuration is incomplete")
 
         try:
-            if not all([Config.SMTP_SERVER, Config.SMTP_PORT, Config.SMTP_USER, 
-                       Config.SMTP_PASSWORD, Config.SMTP_FROM]):
-                raise ValueError("SMTP configuration is incomplete")
-
             msg = MIMEText(message)
             msg['Subject'] = subject
             msg['From'] = Config.SMTP_FROM
             msg['To'] = to_email
-            
-            with smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT) as server:
-                if Config.SMTP_USE_TLS:
-                    server.starttls()
-                server.login(Config.SMTP_USER, Config.SMTP_PASSWORD)
-                server.send_message(msg)
+
+            if pool is not None:
+                pool.send(msg)
+            else:
+                with SMTPSessionPool(size=1) as session_pool:
+                    session_pool.send(msg)
                 
         except Exception as e:
             self.logger.error(f"Error sending email to {to_email}: {e}")
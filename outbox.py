@@ -0,0 +1,278 @@
+import hashlib
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+from smtp_pool import SMTPSessionPool
+from rate_limiter import RateLimiter, RateLimitExceeded
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Failures a retry cannot fix; these are dead-lettered straight away
+PERMANENT_ERRORS = (ValueError, smtplib.SMTPRecipientsRefused)
+
+# Sent messages deleted per write transaction when purging
+PURGE_CHUNK_SIZE = 1000
+
+def enqueue(conn: Any, key: str, recipient: str, subject: str, body: str,
+            now: Optional[datetime] = None) -> bool:
+    """Queue an email inside the caller's write transaction
+
+    The idempotency key makes enqueueing safe to repeat: a message whose key
+    is already in the outbox, whatever its status, is ignored.
+
+    Returns:
+        True if the message was added
+    """
+    created_at = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+    cursor = conn.execute("""
+        INSERT OR IGNORE INTO outbox
+            (idempotency_key, recipient, subject, body, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (key, recipient, subject, body, created_at, created_at))
+    return cursor.rowcount == 1
+
+class OutboxDispatcher:
+    """Background sender that drains the notification outbox
+
+    Due messages are claimed in batches. Claiming pushes next_attempt_at out
+    by a lease, so a message held by a dispatcher that dies is retried once
+    the lease expires instead of being lost. Each message carries a
+    Message-ID derived from its idempotency key, letting a resend after such
+    a crash be deduplicated downstream. Failures back off exponentially with
+    the schedule stored on the row; after max_attempts, or on a permanent
+    error, the message is dead-lettered. A send held back by the rate
+    limiter is rescheduled for when a token frees up and does not count as
+    an attempt. Sent messages are purged once they are older than the
+    retention period, checked every purge_interval while idle; dead
+    letters are kept for inspection.
+    """
+
+    def __init__(self, db: Any, batch_size: Optional[int] = None, max_attempts: Optional[int] = None,
+                 backoff: Optional[float] = None, max_backoff: Optional[float] = None,
+                 poll_interval: Optional[float] = None, lease: Optional[float] = None,
+                 workers: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None,
+                 retention_days: Optional[float] = None, purge_interval: Optional[float] = None,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.db = db
+        self.batch_size = max(batch_size or Config.OUTBOX_BATCH_SIZE, 1)
+        self.max_attempts = max(max_attempts or Config.OUTBOX_MAX_ATTEMPTS, 1)
+        self.backoff = Config.OUTBOX_BACKOFF_SECONDS if backoff is None else backoff
+        self.max_backoff = Config.OUTBOX_MAX_BACKOFF_SECONDS if max_backoff is None else max_backoff
+        self.poll_interval = Config.OUTBOX_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.lease = Config.OUTBOX_LEASE_SECONDS if lease is None else lease
+        self.workers = max(workers or Config.NOTIFY_WORKERS, 1)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retention = timedelta(days=Config.OUTBOX_RETENTION_DAYS if retention_days is None
+                                   else retention_days)
+        self.purge_interval = Config.OUTBOX_PURGE_INTERVAL if purge_interval is None else purge_interval
+        self.clock = clock
+        self._next_purge: Optional[datetime] = None
+
+        self._pool: Optional[SMTPSessionPool] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics = {'batches': 0, 'sent': 0, 'retried': 0, 'throttled': 0, 'dead': 0, 'purged': 0}
+
+    def start(self) -> None:
+        """Start draining on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish the current batch, stop the thread and close SMTP sessions"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_pool()
+
+    def wake(self) -> None:
+        """Check the outbox now instead of at the next poll"""
+        self._wake.set()
+
+    def dispatch_once(self) -> Dict[str, int]:
+        """Claim and send one batch of due messages
+
+        Returns:
+            Counts of messages 'claimed', 'sent', 'retried', 'throttled' and 'dead'
+        """
+        messages = self._claim()
+        counts = {'claimed': len(messages), 'sent': 0, 'retried': 0, 'throttled': 0, 'dead': 0}
+        if not messages:
+            return counts
+
+        if self._pool is None:
+            self._pool = SMTPSessionPool(size=min(Config.SMTP_POOL_SIZE, self.workers))
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(messages)),
+                                thread_name_prefix="outbox-send") as executor:
+            errors = list(executor.map(self._send, messages))
+
+        now = self.clock()
+        updates = []
+        for message, error in zip(messages, errors):
+            attempts = message['attempts']
+            if error is None:
+                counts['sent'] += 1
+                updates.append(("sent", now.strftime(TIMESTAMP_FORMAT), None,
+                                message['next_attempt_at'], attempts, message['id']))
+            elif isinstance(error, RateLimitExceeded):
+                counts['throttled'] += 1
+                retry_at = now + timedelta(seconds=max(error.retry_after, 1))
+                updates.append(("pending", None, str(error),
+                                retry_at.strftime(TIMESTAMP_FORMAT), attempts - 1, message['id']))
+            elif isinstance(error, PERMANENT_ERRORS) or attempts >= self.max_attempts:
+                counts['dead'] += 1
+                logger.error(f"Outbox message {message['id']} dead-lettered after "
+                             f"{attempts} attempt(s): {error}")
+                updates.append(("dead", None, str(error), message['next_attempt_at'], attempts, message['id']))
+            else:
+                counts['retried'] += 1
+                retry_at = now + timedelta(seconds=self._retry_delay(attempts))
+                updates.append(("pending", None, str(error),
+                                retry_at.strftime(TIMESTAMP_FORMAT), attempts, message['id']))
+
+        self.db.run_write(lambda conn: conn.executemany("""
+            UPDATE outbox SET status = ?, sent_at = ?, last_error = ?, next_attempt_at = ?, attempts = ?
+            WHERE id = ?
+        """, updates))
+
+        with self._lock:
+            self._metrics['batches'] += 1
+            for name in ('sent', 'retried', 'throttled', 'dead'):
+                self._metrics[name] += counts[name]
+        return counts
+
+    def status(self) -> Dict[str, Any]:
+        """Queue depth, dead letters and delivery latency for display
+
+        Every count is an index lookup; 'sent' covers the retention period.
+        """
+        now = self.clock().strftime(TIMESTAMP_FORMAT)
+        rows = self.db.execute_query("""
+            SELECT
+                (SELECT COUNT(*) FROM outbox WHERE status = 'pending') AS pending,
+                (SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND next_attempt_at <= ?) AS due,
+                (SELECT COUNT(*) FROM outbox WHERE status = 'sent') AS sent,
+                (SELECT COUNT(*) FROM outbox WHERE status = 'dead') AS dead,
+                (SELECT MIN(created_at) FROM outbox WHERE status = 'pending') AS oldest_pending,
+                (SELECT AVG((JULIANDAY(sent_at) - JULIANDAY(created_at)) * 86400) FROM outbox
+                 WHERE status = 'sent' AND sent_at >= datetime(?, '-1 hour')) AS latency
+        """, (now, now))
+        row = rows[0] if rows else {}
+        oldest = row.get('oldest_pending')
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {
+            'pending': row.get('pending', 0),
+            'due': row.get('due', 0),
+            'sent': row.get('sent', 0),
+            'dead': row.get('dead', 0),
+            'oldest_pending_seconds': (
+                (self.clock() - datetime.strptime(oldest, TIMESTAMP_FORMAT)).total_seconds()
+                if oldest else 0.0),
+            'avg_latency_seconds': round(row.get('latency') or 0.0, 3),
+            'running': self._thread is not None and self._thread.is_alive(),
+            **metrics,
+        }
+
+    def purge_sent(self) -> int:
+        """Delete sent messages older than the retention period
+
+        Returns:
+            The number of messages deleted
+        """
+        cutoff = (self.clock() - self.retention).strftime(TIMESTAMP_FORMAT)
+        purged = 0
+        while True:
+            deleted = self.db.run_write(lambda conn: conn.execute("""
+                DELETE FROM outbox WHERE id IN (
+                    SELECT id FROM outbox WHERE status = 'sent' AND sent_at < ? LIMIT ?
+                )
+            """, (cutoff, PURGE_CHUNK_SIZE)).rowcount)
+            purged += deleted
+            if deleted < PURGE_CHUNK_SIZE:
+                break
+        with self._lock:
+            self._metrics['purged'] += purged
+        if purged:
+            logger.info(f"Purged {purged} sent outbox message(s) older than {cutoff}")
+        return purged
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                counts = self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+                counts = {'claimed': 0}
+            if counts['claimed'] < self.batch_size:
+                # Caught up: release SMTP sessions until there is more to send
+                self._close_pool()
+                self._purge_if_due()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _purge_if_due(self) -> None:
+        now = self.clock()
+        if self._next_purge is not None and now < self._next_purge:
+            return
+        self._next_purge = now + timedelta(seconds=self.purge_interval)
+        try:
+            self.purge_sent()
+        except Exception as e:
+            logger.error(f"Outbox purge failed: {e}")
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        now = self.clock()
+        lease_until = (now + timedelta(seconds=self.lease)).strftime(TIMESTAMP_FORMAT)
+
+        def claim(conn) -> List[Dict[str, Any]]:
+            rows = conn.execute("""
+                SELECT id, idempotency_key, recipient, subject, body, attempts
+                FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+            """, (now.strftime(TIMESTAMP_FORMAT), self.batch_size)).fetchall()
+            conn.executemany("UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                             [(lease_until, row['id']) for row in rows])
+            return [dict(row, attempts=row['attempts'] + 1, next_attempt_at=lease_until) for row in rows]
+
+        return self.db.run_write(claim)
+
+    def _send(self, message: Dict[str, Any]) -> Optional[Exception]:
+        try:
+            self.rate_limiter.check(message['recipient'])
+            msg = MIMEText(message['body'])
+            msg['Subject'] = message['subject']
+            msg['From'] = Config.SMTP_FROM
+            msg['To'] = message['recipient']
+            digest = hashlib.sha1(message['idempotency_key'].encode('utf-8')).hexdigest()
+            msg['Message-ID'] = f"<outbox-{digest}@{Config.SMTP_FROM.rpartition('@')[2] or 'localhost'}>"
+            self._pool.send(msg)
+            return None
+        except Exception as e:
+            logger.warning(f"Outbox message {message['id']} attempt {message['attempts']} failed: {e}")
+            return e
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    def _close_pool(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
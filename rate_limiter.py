@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# (max sends, per seconds); a max of 0 disables the limit
+Limit = Tuple[int, float]
+
+class RateLimitExceeded(Exception):
+    """Raised for a send that is throttled; retry_after is in seconds"""
+    def __init__(self, recipient: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {recipient}, retry in {retry_after:.0f}s")
+        self.recipient = recipient
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity / period tokens per second"""
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: int, period: float, now: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, after refill()"""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Thread-safe send limiter with global, per-domain and per-recipient buckets
+
+    A send takes one token from each bucket that applies, or from none, so
+    a throttled recipient does not use up the domain or global allowance.
+    acquire is O(1). Buckets are created on first use, and the least
+    recently used ones are dropped past max_keys; a dropped bucket comes
+    back full, which an idle recipient would have been anyway.
+    """
+
+    def __init__(self, per_recipient: Optional[Limit] = None, per_domain: Optional[Limit] = None,
+                 global_limit: Optional[Limit] = None, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        window = Config.NOTIFY_LIMIT_WINDOW
+        self.limits: Dict[str, Limit] = {
+            'recipient': per_recipient or (Config.NOTIFY_RECIPIENT_LIMIT, window),
+            'domain': per_domain or (Config.NOTIFY_DOMAIN_LIMIT, window),
+            'global': global_limit or (Config.NOTIFY_GLOBAL_LIMIT, window),
+        }
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._metrics = {'allowed': 0, 'throttled': 0, 'waited': 0}
+
+    def acquire(self, recipient: str, timeout: float = 0.0) -> bool:
+        """Take a send token for recipient, waiting up to timeout seconds
+
+        Returns:
+            True if the send may go ahead, False if it is throttled
+        """
+        deadline = self.clock() + timeout
+        waited = False
+        with self._cond:
+            while True:
+                now = self.clock()
+                buckets = self._buckets_for(recipient, now)
+                wait = max((bucket.wait_time() for bucket in buckets), default=0.0)
+                if wait == 0.0:
+                    for bucket in buckets:
+                        bucket.tokens -= 1
+                    self._metrics['allowed'] += 1
+                    self._metrics['waited'] += waited
+                    return True
+                if now + wait > deadline:
+                    self._metrics['throttled'] += 1
+                    return False
+                waited = True
+                self._cond.wait(wait)
+
+    def check(self, recipient: str, timeout: float = 0.0) -> None:
+        """acquire, raising RateLimitExceeded instead of returning False"""
+        if not self.acquire(recipient, timeout):
+            raise RateLimitExceeded(recipient, self.wait_time(recipient))
+
+    def wait_time(self, recipient: str) -> float:
+        """Seconds until a send to recipient would be allowed"""
+        with self._cond:
+            buckets = self._buckets_for(recipient, self.clock())
+            return max((bucket.wait_time() for bucket in buckets), default=0.0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics['buckets'] = len(self._buckets)
+        return metrics
+
+    def _buckets_for(self, recipient: str, now: float) -> List[TokenBucket]:
+        recipient = recipient.strip().lower()
+        keys = (('global', ''), ('domain', recipient.rpartition('@')[2]), ('recipient', recipient))
+        buckets = []
+        for key in keys:
+            capacity, period = self.limits[key[0]]
+            if capacity <= 0:
+                continue
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(capacity, period, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.refill(now)
+            buckets.append(bucket)
+        return buckets
@@ -1,7 +1,112 @@
 import time
-from typing import Optional, Dict, Any
+import uuid
+import secrets
+import logging
+from typing import Callable, Optional, Dict, Any, Union
+import jwt
+from cache import TTLCache
 from config import Config
 
+# Setup logging
+logger = logging.getLogger(__name__)
+
+TOKEN_ALGORITHM = 'HS256'
+# RFC 7518: an HS256 key must be at least as long as the hash output
+MIN_SECRET_BYTES = 32
+
+class SessionTokens:
+    """Signed, expiring session tokens (HS256 JWTs)
+
+    Tokens carry the user id, username and role, so any front end holding
+    the secret can authenticate a request without a database lookup.
+    Verified tokens are kept in an LRU cache, letting repeat requests skip
+    the signature check; expiry is still checked on every call. refresh
+    implements sliding sessions: a token used after refresh_after seconds
+    is exchanged for a new one with a full lifetime.
+
+    The secret defaults to Config.JWT_SECRET and must be at least
+    MIN_SECRET_BYTES long. With allow_ephemeral and no JWT_SECRET set, a
+    random per-process key is used instead, so tokens only verify in the
+    process that issued them.
+    """
+
+    def __init__(self, secret: Optional[Union[str, bytes]] = None, timeout: Optional[float] = None,
+                 refresh_after: Optional[float] = None, cache_size: Optional[int] = None,
+                 clock: Callable[[], float] = time.time, allow_ephemeral: bool = False):
+        secret = secret or Config.JWT_SECRET
+        self.ephemeral = not secret
+        if self.ephemeral:
+            if not allow_ephemeral:
+                raise ValueError("JWT_SECRET is not set; configure a secret of at least "
+                                 f"{MIN_SECRET_BYTES} bytes")
+            secret = secrets.token_bytes(MIN_SECRET_BYTES)
+        elif len(secret.encode('utf-8') if isinstance(secret, str) else secret) < MIN_SECRET_BYTES:
+            raise ValueError(f"JWT secret must be at least {MIN_SECRET_BYTES} bytes")
+        self.secret = secret
+        self.timeout = timeout or Config.SESSION_TIMEOUT
+        self.refresh_after = Config.SESSION_REFRESH_AFTER if refresh_after is None else refresh_after
+        self.clock = clock
+        self._verified = TTLCache(max_size=cache_size or Config.SESSION_TOKEN_CACHE_SIZE,
+                                  ttl=self.timeout, clock=clock)
+
+    def issue(self, user: Dict[str, Any]) -> str:
+        """Sign a token for a user dict with 'id', 'username' and 'role'"""
+        now = int(self.clock())
+        claims = {
+            'sub': str(user['id']),
+            'username': user.get('username'),
+            'role': user.get('role'),
+            'iat': now,
+            'exp': now + int(self.timeout),
+            'jti': uuid.uuid4().hex,
+        }
+        return jwt.encode(claims, self.secret, algorithm=TOKEN_ALGORITHM)
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the token's claims, or None if it is invalid or expired"""
+        if not token:
+            return None
+        claims = self._verified.get(token)
+        if claims is None:
+            try:
+                # Expiry is checked below against our own clock, cached or not
+                claims = jwt.decode(token, self.secret, algorithms=[TOKEN_ALGORITHM],
+                                    options={'require': ['sub', 'iat', 'exp'],
+                                             'verify_exp': False, 'verify_iat': False})
+            except jwt.InvalidTokenError as e:
+                logger.warning(f"Rejected session token: {e}")
+                return None
+            self._verified.set(token, claims)
+        if claims['exp'] <= self.clock():
+            self._verified.invalidate(token)
+            return None
+        return claims
+
+    def get_user(self, token: str) -> Optional[Dict[str, Any]]:
+        """The user a valid token was issued to, in authenticate_user's shape"""
+        claims = self.verify(token)
+        if claims is None:
+            return None
+        return {'id': int(claims['sub']), 'username': claims['username'], 'role': claims['role']}
+
+    def refresh(self, token: str) -> Optional[str]:
+        """Sliding refresh: reissue a valid token once it is refresh_after seconds old
+
+        Returns:
+            The same token while it is fresh, a new one past refresh_after,
+            or None if the token is invalid or expired
+        """
+        claims = self.verify(token)
+        if claims is None:
+            return None
+        if self.clock() - claims['iat'] < self.refresh_after:
+            return token
+        return self.issue({'id': claims['sub'], 'username': claims['username'], 'role': claims['role']})
+
+    def stats(self) -> Dict[str, Any]:
+        """Verification cache counters"""
+        return self._verified.stats()
+
 class Session:
     def __init__(self, user: Dict[str, Any]):
         if not isinstance(user, dict):
@@ -12,6 +117,8 @@ class Session:
             raise ValueError("User dictionary must contain 'id' key")
             
         self.user = user.copy()  # Create a copy to prevent external modifications
+        # Signed token from authenticate_user, for handing to other front ends
+        self.token: Optional[str] = self.user.pop('token', None)
         try:
             self.start_time = time.time()
         except Exception as e:
@@ -0,0 +1,128 @@
+import logging
+import smtplib
+import threading
+from contextlib import contextmanager
+from email.message import Message
+from queue import LifoQueue, Empty
+from typing import Any, Dict, Iterator, Optional
+from config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class SMTPSessionPool:
+    """Bounded pool of connected, logged-in SMTP sessions
+
+    Sessions are opened on demand (connect, STARTTLS, login) up to ``size``
+    and handed back after each message, so a batch of notices pays the
+    handshake once per session instead of once per message. A session that
+    raises is closed and dropped; the next checkout opens a fresh one.
+    Login is skipped when no SMTP user is configured (local relays).
+    """
+
+    def __init__(self, size: Optional[int] = None, host: Optional[str] = None,
+                 port: Optional[int] = None, use_tls: Optional[bool] = None,
+                 user: Optional[str] = None, password: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        self.size = max(size or Config.SMTP_POOL_SIZE, 1)
+        self.host = host or Config.SMTP_SERVER
+        self.port = port or Config.SMTP_PORT
+        self.use_tls = Config.SMTP_USE_TLS if use_tls is None else use_tls
+        self.user = Config.SMTP_USER if user is None else user
+        self.password = Config.SMTP_PASSWORD if password is None else password
+        self.timeout = timeout if timeout is not None else Config.SMTP_TIMEOUT
+
+        # Most recently used first, so a lightly loaded pool keeps few sessions warm
+        self._idle: LifoQueue = LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._metrics = {'connects': 0, 'reuses': 0, 'discarded': 0, 'sent': 0}
+
+    def __enter__(self) -> "SMTPSessionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextmanager
+    def session(self) -> Iterator[smtplib.SMTP]:
+        """Check out a session, blocking while all ``size`` sessions are busy"""
+        if self._closed:
+            raise RuntimeError("SMTP session pool is closed")
+        self._slots.acquire()
+        server = None
+        try:
+            try:
+                server = self._idle.get_nowait()
+                self._count('reuses')
+            except Empty:
+                server = self._connect()
+            yield server
+        except Exception:
+            if server is not None:
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                if self._closed:
+                    self._discard(server, count=False)
+                else:
+                    self._idle.put(server)
+            self._slots.release()
+
+    def send(self, message: Message) -> None:
+        """Send one message on a pooled session"""
+        with self.session() as server:
+            server.send_message(message)
+        self._count('sent')
+
+    def close(self) -> None:
+        """QUIT every idle session; sessions in use are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(server, count=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['idle'] = self._idle.qsize()
+        metrics['size'] = self.size
+        return metrics
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        self._count('connects')
+        return server
+
+    def _discard(self, server: smtplib.SMTP, count: bool = True) -> None:
+        if count:
+            self._count('discarded')
+        self._quit(server)
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
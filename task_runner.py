@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Queue, Empty
+from typing import Any, Callable, Dict, Optional
+import tkinter as tk
+from config import Config
+from utils import create_loading_indicator
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class UITaskRunner:
+    """Run blocking work off the Tk main thread and deliver results back to it
+
+    Workers never touch widgets: each finished task is put on a queue that the
+    main thread drains with root.after, where the success or error callback
+    runs. Tasks submitted on a channel remember the channel's generation;
+    cancel() starts a new generation, and results from earlier ones are
+    dropped instead of delivered (e.g. when the user navigates away).
+    """
+
+    def __init__(self, root: Any, max_workers: Optional[int] = None,
+                 poll_interval_ms: Optional[int] = None):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms or Config.UI_POLL_INTERVAL_MS
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or Config.UI_WORKERS,
+                                            thread_name_prefix="ui-task")
+        self._results: Queue = Queue()
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+        self._metrics = {'submitted': 0, 'delivered': 0, 'dropped': 0, 'failed': 0}
+
+    def submit(self, func: Callable[..., Any], *args: Any,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               channel: Optional[str] = None,
+               loading_parent: Optional[tk.Widget] = None,
+               **kwargs: Any) -> Future:
+        """Run func(*args, **kwargs) on a worker; call on_success/on_error on the main thread
+
+        Must be called from the main thread.
+        """
+        if self._closed:
+            raise RuntimeError("Task runner is closed")
+        generation = self._current_generation(channel) if channel else None
+        indicator = create_loading_indicator(loading_parent) if loading_parent is not None else None
+
+        def task() -> None:
+            try:
+                outcome = (True, func(*args, **kwargs))
+            except Exception as e:
+                outcome = (False, e)
+            self._results.put((channel, generation, indicator, on_success, on_error, outcome))
+
+        def cancelled(future: Future) -> None:
+            # A future cancelled before it ran never reports back on its own
+            if future.cancelled():
+                self._results.put((channel, generation, indicator, None, None, None))
+
+        self._pending += 1
+        self._metrics['submitted'] += 1
+        future = self._executor.submit(task)
+        future.add_done_callback(cancelled)
+        self._schedule_poll()
+        return future
+
+    def cancel(self, channel: str) -> None:
+        """Drop any results still in flight on channel"""
+        self._next_generation(channel)
+
+    def stats(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['pending'] = self._pending
+        return metrics
+
+    def shutdown(self) -> None:
+        """Stop polling and discard queued work"""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _current_generation(self, channel: str) -> int:
+        with self._lock:
+            return self._generations.setdefault(channel, 0)
+
+    def _next_generation(self, channel: str) -> int:
+        with self._lock:
+            self._generations[channel] = self._generations.get(channel, 0) + 1
+            return self._generations[channel]
+
+    def _is_current(self, channel: Optional[str], generation: Optional[int]) -> bool:
+        if channel is None:
+            return True
+        with self._lock:
+            return self._generations.get(channel) == generation
+
+    def _schedule_poll(self) -> None:
+        if self._polling or self._closed:
+            return
+        try:
+            self.root.after(self.poll_interval_ms, self._poll)
+            self._polling = True
+        except tk.TclError:
+            # Window is gone; nothing left to deliver to
+            self.shutdown()
+
+    def _poll(self) -> None:
+        self._polling = False
+        while True:
+            try:
+                channel, generation, indicator, on_success, on_error, outcome = self._results.get_nowait()
+            except Empty:
+                break
+            self._pending -= 1
+            self._destroy_indicator(indicator)
+            if outcome is None or not self._is_current(channel, generation):
+                self._metrics['dropped'] += 1
+                continue
+            self._deliver(on_success, on_error, outcome)
+        if self._pending > 0:
+            self._schedule_poll()
+
+    def _deliver(self, on_success, on_error, outcome) -> None:
+        ok, value = outcome
+        try:
+            if ok:
+                self._metrics['delivered'] += 1
+                if on_success is not None:
+                    on_success(value)
+            else:
+                self._metrics['failed'] += 1
+                if on_error is not None:
+                    on_error(value)
+                else:
+                    logger.error(f"Background task failed: {value}")
+        except Exception as e:
+            logger.error(f"Error in task callback: {e}")
+
+    @staticmethod
+    def _destroy_indicator(indicator: Optional[tk.Widget]) -> None:
+        try:
+            if indicator is not None and indicator.winfo_exists():
+                indicator.destroy()
+        except tk.TclError:
+            pass
@@ -2,12 +2,20 @@ import unittest
 from database import DatabaseHandler, ValidationError
 from config import Config
 import os
+import socketserver
 import sqlite3
+import threading
 import time
 import logging
+import jwt
 from datetime import datetime, timedelta
 from notification import NotificationSystem
-from session import Session
+from rate_limiter import RateLimiter, RateLimitExceeded
+from async_database import AsyncDatabaseHandler
+from cache import TTLCache
+from migrations import MIGRATIONS, apply_migrations, get_schema_version
+from session import Session, SessionTokens
+from task_runner import UITaskRunner
 from ui import LoginWindow, MainWindow
 import tkinter as tk
 from unittest.mock import Mock, patch
@@ -15,6 +23,50 @@ from unittest.mock import Mock, patch
 # Setup logging
 logger = logging.getLogger(__name__)
 
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server recording recipients, connections and logins"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubSMTPHandler)
+        self.port = self.server_address[1]
+        self.lock = threading.Lock()
+        self.recipients = []
+        self.connections = 0
+        self.logins = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.wfile.write(b"220 stub ESMTP\r\n")
+        recipients = []
+        for line in self.rfile:
+            verb = line[:4].upper()
+            if verb == b'RCPT':
+                recipients.append(line.split(b':', 1)[1].strip(b' <>\r\n').decode())
+            elif verb == b'AUTH':
+                with self.server.lock:
+                    self.server.logins += 1
+            elif verb == b'DATA':
+                self.wfile.write(b"354 end with .\r\n")
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                with self.server.lock:
+                    self.server.recipients.extend(recipients)
+                recipients = []
+            elif verb == b'QUIT':
+                self.wfile.write(b"221 bye\r\n")
+                return
+            self.wfile.write(b"250 OK\r\n")
+
 class TestLibrarySystem(unittest.TestCase):
     def setUp(self):
         """Setup test environment"""
@@ -88,8 +140,7 @@ class TestLibrarySystem(unittest.TestCase):
         try:
             # Close all connections first
             if hasattr(self, 'db'):
-                for conn in self.db.pool.pool.queue:
-                    conn.close()
+                self.db.close()
             
             # Try to remove test database with retries
             max_retries = 3
@@ -97,8 +148,9 @@ class TestLibrarySystem(unittest.TestCase):
             
             for attempt in range(max_retries):
                 try:
-                    if os.path.exists(Config.DB_PATH):
-                        os.remove(Config.DB_PATH)
+                    for path in (Config.DB_PATH, f"{Config.DB_PATH}-wal", f"{Config.DB_PATH}-shm"):
+                        if os.path.exists(path):
+                            os.remove(path)
                     break
                 except PermissionError:
                     if attempt < max_retries - 1:
@@ -116,6 +168,97 @@ class TestLibrarySystem(unittest.TestCase):
         self.assertEqual(user['username'], "1")
         self.assertEqual(user['role'], "1")
 
+    def test_password_rehash_on_login(self):
+        """Test hashes with outdated Argon2 parameters are upgraded on login"""
+        from argon2 import PasswordHasher
+        from utils import PASSWORD_HASHER, password_needs_rehash
+        self.assertEqual(PASSWORD_HASHER.time_cost, Config.ARGON2_TIME_COST)
+        self.assertEqual(PASSWORD_HASHER.memory_cost, Config.ARGON2_MEMORY_COST)
+
+        old_hash = PasswordHasher(time_cost=1, memory_cost=1024, parallelism=1).hash("secret")
+        self.assertTrue(password_needs_rehash(old_hash))
+        self.db.run_write(lambda conn: conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES ('legacy', ?, 'user')", (old_hash,)))
+
+        def stored_hash():
+            return self.db.execute_query("SELECT password_hash FROM users WHERE username = 'legacy'")[0]['password_hash']
+
+        self.assertIsNone(self.db.authenticate_user("legacy", "wrong"))
+        self.assertEqual(stored_hash(), old_hash)
+
+        self.assertEqual(self.db.authenticate_user("legacy", "secret")['username'], "legacy")
+        new_hash = stored_hash()
+        self.assertNotEqual(new_hash, old_hash)
+        self.assertFalse(password_needs_rehash(new_hash))
+        self.assertIsNotNone(self.db.authenticate_user("legacy", "secret"))
+        self.assertEqual(stored_hash(), new_hash)
+
+    def test_login_throttling(self):
+        """Test failed logins lock out without a write per attempt"""
+        from login_throttle import LoginThrottle
+        self.db.add_user("reader", "correct-horse", "user")
+
+        def locked_until():
+            return self.db.execute_query("SELECT locked_until FROM users WHERE username = 'reader'")[0]['locked_until']
+
+        with patch.object(self.db, '_write', wraps=self.db._write) as writes:
+            for _ in range(Config.LOGIN_MAX_FAILURES - 1):
+                self.assertIsNone(self.db.authenticate_user("reader", "wrong", source="10.0.0.1"))
+            self.assertEqual(writes.call_count, 0)
+            # The attempt that starts the lockout is the only one persisted
+            self.assertIsNone(self.db.authenticate_user("reader", "wrong", source="10.0.0.1"))
+            self.assertEqual(writes.call_count, 1)
+            for _ in range(10):
+                with self.assertRaises(ValidationError):
+                    self.db.authenticate_user("reader", "correct-horse")
+            self.assertEqual(writes.call_count, 1)
+        self.assertIsNotNone(locked_until())
+
+        # The lockout survives a restart through the users table
+        self.db.login_throttle = LoginThrottle()
+        with self.assertRaises(ValidationError):
+            self.db.authenticate_user("reader", "correct-horse")
+
+        # Once it expires the user can log in, which clears it
+        self.db.run_write(lambda conn: conn.execute(
+            "UPDATE users SET locked_until = '2000-01-01 00:00:00' WHERE username = 'reader'"))
+        self.db.login_throttle = LoginThrottle()
+        self.assertIsNotNone(self.db.authenticate_user("reader", "correct-horse"))
+        self.assertIsNone(locked_until())
+
+        # Sliding window and per-source limits
+        now = [1000.0]
+        throttle = LoginThrottle(max_failures=3, max_source_failures=4, window=60, lockout=30,
+                                 clock=lambda: now[0])
+        throttle.record_failure("alice")
+        throttle.record_failure("alice")
+        now[0] += 61
+        self.assertIsNone(throttle.record_failure("alice"))
+        for name in ("bob", "carol", "dave", "erin"):
+            self.assertIsNone(throttle.record_failure(name, source="10.0.0.2"))
+        self.assertIsNotNone(throttle.locked_until("frank", source="10.0.0.2"))
+        self.assertIsNone(throttle.locked_until("frank", source="10.0.0.3"))
+        now[0] += 31
+        self.assertIsNone(throttle.locked_until("frank", source="10.0.0.2"))
+        self.assertEqual(throttle.stats()['lockouts'], 1)
+
+        # Junk usernames and other accounts cannot evict a target's recent failures
+        throttle = LoginThrottle(max_failures=3, max_source_failures=1000, window=60, lockout=30,
+                                 max_keys=4, clock=lambda: now[0])
+        throttle.record_failure("target")
+        throttle.record_failure("target")
+        for n in range(50):
+            throttle.record_failure(f"junk{n}", known=False)
+            throttle.record_failure(f"junk{n}", source=f"10.1.0.{n}", known=False)
+            throttle.record_failure(f"user{n % 10}")
+        self.assertGreater(throttle.stats()['untracked'], 0)
+        self.assertIsNotNone(throttle.record_failure("target"))
+        self.assertIsNotNone(throttle.locked_until("target"))
+        # Keys whose failures have aged out of the window make room again
+        now[0] += 61
+        throttle.record_failure("someone", source="10.2.0.1")
+        self.assertLessEqual(throttle.stats()['tracked'], 4)
+
     def test_book_management(self):
         """Test book operations"""
         # Test adding a book
@@ -133,6 +276,54 @@ class TestLibrarySystem(unittest.TestCase):
         self.assertEqual(books[0]['title'], "Test Book")
         self.assertEqual(books[0]['available'], 5)
 
+    def test_bulk_book_import(self):
+        """Test bulk book import with per-row error reporting"""
+        report = self.db.add_books_bulk([
+            {'title': "Bulk One", 'author': "Author", 'isbn': "1234567801", 'quantity': 2, 'category': "Bulk"},
+            {'title': "Bulk Two", 'author': "Author", 'isbn': "invalid", 'quantity': 1, 'category': "Bulk"},
+            {'title': "Bulk Three", 'author': "Author", 'isbn': "1234567802", 'quantity': 3},
+            {'title': "Bulk One Revised", 'author': "Author", 'isbn': "1234567801", 'quantity': 4, 'category': "Bulk"},
+        ], chunk_size=2)
+
+        self.assertEqual(report['total'], 4)
+        self.assertEqual(report['imported'], 3)
+        self.assertEqual([e['row'] for e in report['errors']], [2])
+        self.assertGreater(report['rows_per_sec'], 0)
+
+        # Duplicate ISBN updates the existing row instead of failing
+        book = self.db.get_book_by_isbn("1234567801")
+        self.assertEqual(book['title'], "Bulk One Revised")
+        self.assertEqual(book['quantity'], 4)
+        self.assertEqual(book['available'], 4)
+        self.assertEqual(self.db.get_book_by_isbn("1234567802")['category'], "General")
+
+    def test_catalog_file_import(self):
+        """Test streaming catalog import from CSV and JSONL files"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'catalog.csv')
+            with open(csv_path, 'w', newline='') as f:
+                f.write("title,author,isbn,quantity,category\n")
+                f.write("CSV Book,CSV Author,1234567803,2,Import\n")
+                f.write("Bad Quantity,CSV Author,1234567804,many,Import\n")
+            jsonl_path = os.path.join(tmp, 'catalog.jsonl')
+            with open(jsonl_path, 'w') as f:
+                f.write('{"title": "JSON Book", "author": "JSON Author", "isbn": "1234567805", "quantity": 1}\n')
+                f.write('not json\n')
+
+            csv_report = self.db.import_catalog(csv_path)
+            jsonl_report = self.db.import_catalog(jsonl_path)
+
+            xml_path = os.path.join(tmp, 'catalog.xml')
+            open(xml_path, 'w').close()
+            with self.assertRaises(ValidationError):
+                self.db.import_catalog(xml_path)
+
+        self.assertEqual((csv_report['imported'], csv_report['failed']), (1, 1))
+        self.assertEqual(csv_report['errors'][0]['row'], 2)
+        self.assertEqual((jsonl_report['imported'], jsonl_report['failed']), (1, 1))
+        self.assertIsNotNone(self.db.get_book_by_isbn("1234567805"))
+
     def test_member_management(self):
         """Test member operations"""
         # Test adding a member
@@ -188,6 +379,265 @@ class TestLibrarySystem(unittest.TestCase):
         book = self.db.get_book_by_isbn("9876543210")
         self.assertEqual(book['available'], 1, "Available count should be 1 after return")
 
+    def test_basket_circulation(self):
+        """Test issuing and returning a basket in one transaction with per-item results"""
+        self.db.add_book("Basket One", "Author", "9781234567897", 1, "Test")
+        self.db.add_book("Basket Two", "Author", "0306406152", 2, "Test")
+        self.db.add_member("Basket Member", "basket@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+
+        results = self.db.issue_books(member_id, [
+            "9781234567897", "0306406152", "9781234567897", "not-an-isbn", "1234567890"])
+        self.assertEqual([r['success'] for r in results], [True, True, False, False, False])
+        self.assertEqual(results[2]['error'], "Book is not available")
+        self.assertEqual(results[4]['error'], "Book does not exist")
+        self.assertEqual(self.db.get_book_by_isbn("0306406152")['available'], 1)
+        self.assertEqual(self.db.get_active_loans(), 2)
+
+        with self.assertRaises(ValidationError):
+            self.db.issue_books(999, ["0306406152"])
+
+        results = self.db.return_books([
+            {'member_id': member_id, 'isbn': "9781234567897"},
+            {'member_id': member_id, 'isbn': "9781234567897"},
+            {'member_id': member_id, 'isbn': "0306406152"},
+        ])
+        self.assertEqual([r['success'] for r in results], [True, False, True])
+        self.assertEqual(results[1]['error'], "No matching unreturned loan record found")
+        self.assertEqual(self.db.get_active_loans(), 0)
+        self.assertEqual(self.db.get_book_by_isbn("9781234567897")['available'], 1)
+
+    def test_dashboard_snapshot(self):
+        """Test trigger-maintained dashboard counters stay in sync"""
+        def aggregates():
+            with self.db.pool.get_connection() as conn:
+                return {
+                    'total_books': conn.execute("SELECT COUNT(*) FROM books").fetchone()[0],
+                    'available_books': conn.execute(
+                        "SELECT COALESCE(SUM(available), 0) FROM books").fetchone()[0],
+                    'total_members': conn.execute("SELECT COUNT(*) FROM members").fetchone()[0],
+                    'active_loans': conn.execute(
+                        "SELECT COUNT(*) FROM transactions WHERE return_date IS NULL").fetchone()[0],
+                }
+
+        self.assertEqual(self.db.get_dashboard_snapshot(), aggregates())
+
+        self.db.add_book("Stats Book", "Author", "9781234567897", 3, "Test")
+        self.db.add_books_bulk([
+            {'title': "Stats Book", 'author': "Author", 'isbn': "9781234567897", 'quantity': 5},
+            {'title': "Other Book", 'author': "Author", 'isbn': "0306406152", 'quantity': 2},
+        ])
+        self.db.add_member("Stats Member", "stats@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+        self.db.issue_book(member_id, "9781234567897")
+        self.db.issue_book(member_id, "0306406152")
+        self.db.return_book(member_id, "0306406152")
+
+        snapshot = self.db.get_dashboard_snapshot()
+        self.assertEqual(snapshot, aggregates())
+        self.assertEqual(snapshot, {'total_books': 2, 'available_books': 6,
+                                    'total_members': 1, 'active_loans': 1})
+        self.assertEqual(self.db.get_active_loans(), 1)
+
+        # Direct deletes are tracked as well
+        with self.db.pool.get_connection() as conn:
+            conn.execute("DELETE FROM transactions")
+            conn.execute("DELETE FROM books WHERE isbn = '0306406152'")
+        self.assertEqual(self.db.get_dashboard_snapshot(), aggregates())
+
+        self.db.refresh_dashboard_snapshot()
+        self.assertEqual(self.db.get_dashboard_snapshot(), aggregates())
+
+    def test_chart_service_cache(self):
+        """Test dashboard charts are re-rendered only when the data version changes"""
+        from chart_service import ChartService
+        charts = ChartService(self.db)
+
+        key, png = charts.render()
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        self.assertEqual(charts.render(), (key, png))
+        self.assertEqual(charts.stats()['renders'], 1)
+        self.assertEqual(charts.stats()['hits'], 1)
+
+        # Themes are cached separately
+        dark_key, _ = charts.render(dark=True)
+        self.assertNotEqual(dark_key, key)
+        self.assertEqual(charts.stats()['renders'], 2)
+
+        # Cataloguing or lending bumps the data version; member changes do not
+        version = self.db.get_data_version()
+        self.db.add_member("Chart Member", "chart@example.com", "1234567890")
+        self.assertEqual(self.db.get_data_version(), version)
+        self.db.add_book("Chart Book", "Author", "9781234567897", 1, "Test")
+        self.assertGreater(self.db.get_data_version(), version)
+        new_key, _ = charts.render()
+        self.assertNotEqual(new_key, key)
+        self.assertEqual(charts.stats()['renders'], 3)
+
+        # A full stats refresh keeps the version increasing
+        version = self.db.get_data_version()
+        self.db.refresh_dashboard_snapshot()
+        self.assertGreater(self.db.get_data_version(), version)
+
+    def test_keyset_pagination(self):
+        """Test cursor-based paging of books, members and search results"""
+        for i, title in enumerate(["Delta", "Alpha", "Echo", "Charlie", "Bravo"]):
+            self.db.add_book(title=f"Paging {title}", author="Test Author",
+                             isbn=f"123456781{i}", quantity=1, category="Paging")
+            self.db.add_member(name=f"Paging Member {i}", email=f"paging{i}@test.com",
+                               phone="1234567890")
+
+        def collect(fetch_page):
+            items, cursor, pages = [], None, 0
+            while True:
+                page = fetch_page(limit=2, cursor=cursor)
+                items.extend(page['items'])
+                pages += 1
+                cursor = page['next_cursor']
+                if cursor is None:
+                    return items, pages
+
+        books, pages = collect(self.db.get_books_page)
+        self.assertEqual(pages, 3)
+        self.assertEqual([b['title'] for b in books],
+                         sorted(f"Paging {t}" for t in ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]))
+
+        members, _ = collect(self.db.get_members_page)
+        self.assertEqual([m['id'] for m in members], sorted((m['id'] for m in members), reverse=True))
+        self.assertEqual(len(members), 5)
+
+        # Search pages follow the same order as a single page holding every match
+        results, _ = collect(lambda **kw: self.db.search_books_page("paging", **kw))
+        self.assertEqual(results, self.db.search_books("paging", limit=10))
+        self.assertEqual(len(results), 5)
+
+        # Tokens are opaque and bound to the listing that produced them
+        members_cursor = self.db.get_members_page(limit=2)['next_cursor']
+        with self.assertRaises(ValidationError):
+            self.db.get_books_page(cursor=members_cursor)
+        with self.assertRaises(ValidationError):
+            self.db.get_books_page(cursor="not-a-cursor")
+
+    def test_sorted_pagination(self):
+        """Test keyset paging in every whitelisted sort order, including NULLs"""
+        self.db.add_books_bulk([
+            {'title': f"Sort {i}", 'author': f"Author {i % 3}", 'isbn': f"123456782{i}",
+             'quantity': i % 4 + 1, 'category': ["B", "A", "C"][i % 3]}
+            for i in range(7)
+        ])
+        with self.db.pool.get_connection() as conn:
+            conn.execute("INSERT INTO books (title, author, isbn, quantity, available) "
+                         "VALUES ('No Author', NULL, '1234567830', 1, 1)")
+            conn.execute("INSERT INTO books (title, author, isbn, quantity, available) "
+                         "VALUES ('No Author Either', NULL, '1234567831', 1, 1)")
+
+        def collect(**sort):
+            ids, cursor = [], None
+            while True:
+                page = self.db.get_books_page(limit=3, cursor=cursor, **sort)
+                ids.extend(b['id'] for b in page['items'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    return ids
+
+        books = self.db.execute_query("SELECT * FROM books")
+        for column in ('title', 'author', 'category', 'available', 'id'):
+            for descending in (False, True):
+                # SQLite orders NULLs before any value
+                expected = sorted(books, key=lambda b: (b[column] is not None, b[column] or 0, b['id']),
+                                  reverse=descending)
+                self.assertEqual(collect(sort=column, descending=descending),
+                                 [b['id'] for b in expected], (column, descending))
+
+        with self.assertRaises(ValidationError):
+            self.db.get_books_page(sort="title; DROP TABLE books")
+        cursor = self.db.get_books_page(limit=2, sort='author')['next_cursor']
+        with self.assertRaises(ValidationError):
+            self.db.get_books_page(cursor=cursor, sort='author', descending=True)
+
+        for name in ("Carol", "Alice", "Bob"):
+            self.db.add_member(f"Member {name}", f"{name}@example.com", "1234567890")
+        page = self.db.get_members_page(limit=2, sort='name')
+        page2 = self.db.get_members_page(limit=2, cursor=page['next_cursor'], sort='name')
+        self.assertEqual([m['name'] for m in page['items'] + page2['items']],
+                         ["Member Alice", "Member Bob", "Member Carol"])
+
+        # Every keyset phase, deep pages included, is an index range seek in both directions
+        from database import _keyset_phases
+        with self.db.pool.get_connection() as conn:
+            for descending in (False, True):
+                for after in (None, {'after_value': "M", 'after_id': 5}, {'after_value': None, 'after_id': 5}):
+                    for where, order, params in _keyset_phases('books', 'author', descending, after):
+                        plan = " ".join(row[3] for row in conn.execute(
+                            f"EXPLAIN QUERY PLAN SELECT * FROM books WHERE {where} {order} LIMIT 10", params))
+                        self.assertIn("SEARCH books USING INDEX idx_books_author", plan, (descending, where))
+                        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_member_search(self):
+        """Test indexed prefix search over member name, email and phone"""
+        for name, email, phone in [("Alice Smith", "alice@example.com", "5551234567"),
+                                   ("alan Turing", "turing@example.org", "5559876543"),
+                                   ("Bob Alison", "bob@alpha.com", "4441234567"),
+                                   ("Carol", "carol@example.com", "+15551112222")]:
+            self.db.add_member(name, email, phone)
+
+        def names(query, limit=None):
+            items, cursor = [], None
+            while True:
+                page = self.db.search_members(query, limit=limit or 10, cursor=cursor)
+                items.extend(m['name'] for m in page['items'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    return items
+
+        # Case-insensitive name prefix, ordered by name
+        self.assertEqual(names("AL", limit=1), ["alan Turing", "Alice Smith"])
+        self.assertEqual(names("bob"), ["Bob Alison"])
+        self.assertEqual(names("turing@"), ["alan Turing"])
+        self.assertEqual(names("555-123"), ["Alice Smith"])
+        self.assertEqual(names("smith"), [])
+        self.assertEqual(len(names("")), 4)
+        self.assertEqual(names("'; DROP TABLE members; --"), [])
+
+        with self.db.pool.get_connection() as conn:
+            def plan(query, params):
+                return " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+            self.assertIn("idx_members_name_nocase", plan(
+                "SELECT id FROM members WHERE name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?",
+                ("al", "al\U0010ffff")))
+            self.assertIn("idx_members_phone", plan(
+                "SELECT id FROM members WHERE phone >= ? AND phone < ?", ("555", "555\U0010ffff")))
+
+    def test_schema_migrations(self):
+        """Test versioned migrations and hot-path index usage"""
+        latest = max(m.version for m in MIGRATIONS)
+        with self.db.pool.get_connection() as conn:
+            self.assertEqual(get_schema_version(conn), latest)
+            # Re-running is a no-op
+            self.assertEqual(apply_migrations(conn), latest)
+            applied = conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0]
+            self.assertEqual(applied, len(MIGRATIONS))
+
+            def plan(query, params=()):
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+                return " ".join(row[3] for row in rows)
+
+            self.assertIn("idx_transactions_member_book", plan(
+                "SELECT id FROM transactions WHERE member_id = ? AND book_id = ? AND return_date IS NULL",
+                (1, 1)))
+            self.assertIn("INDEX idx_transactions", plan(
+                "SELECT COUNT(*) FROM transactions WHERE return_date IS NULL"))
+            self.assertIn("idx_books_category", plan(
+                "SELECT category, COUNT(*) FROM books GROUP BY category"))
+
+    def test_fresh_database_initialization(self):
+        """Test the handler can create a database from scratch"""
+        self.db.close()
+        os.remove(Config.DB_PATH)
+
+        self.db = DatabaseHandler()
+        self.assertIsNotNone(self.db.authenticate_user("1", "1"))
+
     def test_validation(self):
         """Test input validation"""
         # Test invalid ISBN
@@ -208,16 +658,71 @@ class TestLibrarySystem(unittest.TestCase):
                 phone="1234567890"
             )
 
+        # A missing member id is a validation error, not a TypeError
+        with self.assertRaises(ValidationError):
+            self.db.issue_book(None, "1234567890")
+
     def test_database_pool(self):
         """Test database connection pool functionality"""
-        # Test pool size
-        self.assertEqual(len(self.db.pool.pool.queue), Config.CONNECTION_POOL_SIZE)
+        # Connections are opened lazily, never beyond the configured size
+        stats = self.db.pool_stats()
+        self.assertGreaterEqual(stats['size'], 1)
+        self.assertLessEqual(stats['size'], Config.CONNECTION_POOL_SIZE)
+        idle = len(self.db.pool.pool.queue)
         
         # Test connection acquisition and release
         with self.db.pool.get_connection() as conn:
             self.assertIsInstance(conn, sqlite3.Connection)
-            self.assertEqual(len(self.db.pool.pool.queue), Config.CONNECTION_POOL_SIZE - 1)
-        self.assertEqual(len(self.db.pool.pool.queue), Config.CONNECTION_POOL_SIZE)
+            self.assertEqual(len(self.db.pool.pool.queue), idle - 1)
+            self.assertEqual(self.db.pool_stats()['in_use'], 1)
+        self.assertEqual(len(self.db.pool.pool.queue), idle)
+        self.assertGreater(self.db.pool_stats()['checkouts'], 0)
+
+    def test_database_pool_limits(self):
+        """Test checkout timeout, unhealthy connection discard and autoscaling"""
+        from database import DatabasePool, PoolTimeoutError
+        import threading
+
+        pool = DatabasePool(max_size=1)
+        with pool.get_connection():
+            with self.assertRaises(PoolTimeoutError):
+                with pool.get_connection(timeout=0.1):
+                    pass
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        # A connection that failed and no longer works is not reused
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with pool.get_connection() as conn:
+                conn.close()
+                conn.execute("SELECT 1")
+        self.assertEqual(pool.stats()['discarded'], 1)
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.close_all()
+
+        # Waiting callers grow the pool up to max_size, idle ones shrink it back
+        pool = DatabasePool(max_size=3)
+        pool.base_size = pool.target_size = 1
+        pool.grow_wait = 0.01
+        pool.scale_interval = 0
+        acquired = threading.Event()
+
+        def contender():
+            with pool.get_connection(timeout=2):
+                acquired.set()
+
+        with pool.get_connection():
+            thread = threading.Thread(target=contender)
+            thread.start()
+            self.assertTrue(acquired.wait(2))
+            thread.join()
+        self.assertEqual(pool.stats()['target_size'], 2)
+
+        for _ in range(20):
+            with pool.get_connection():
+                pass
+        self.assertEqual(pool.stats()['target_size'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+        pool.close_all()
 
     def test_book_loan_edge_cases(self):
         """Test edge cases for book loans"""
@@ -273,6 +778,52 @@ class TestLibrarySystem(unittest.TestCase):
         # Get overdue loans
         overdue_loans = self.db.get_overdue_loans()
         self.assertIsInstance(overdue_loans, list)
+        self.assertEqual(overdue_loans, [])
+
+        # Due dates follow the category policy and drive the overdue check
+        self.db.add_book("Reference Book", "Test Author", "0306406152", 1, "Reference")
+        with patch.dict(Config.LOAN_PERIODS_BY_CATEGORY, {'Reference': 3}):
+            self.db.issue_book(member_id, "0306406152")
+        loans = {loan['isbn']: loan for loan in self.db.execute_query("""
+            SELECT b.isbn, t.issue_date, t.due_date FROM transactions t JOIN books b ON t.book_id = b.id
+        """)}
+        def period(isbn):
+            loan = loans[isbn]
+            issued, due = (datetime.strptime(loan[k], "%Y-%m-%d %H:%M:%S") for k in ('issue_date', 'due_date'))
+            return (due - issued).days
+        self.assertEqual(period("1234567892"), Config.LOAN_PERIOD_DAYS)
+        self.assertEqual(period("0306406152"), 3)
+
+        overdue_loans = self.db.get_overdue_loans(as_of=datetime.now() + timedelta(days=5))
+        self.assertEqual([loan['isbn'] for loan in overdue_loans], ["0306406152"])
+        self.assertEqual(overdue_loans[0]['member_id'], member_id)
+        self.assertEqual(overdue_loans[0]['days_overdue'], 2)
+        late = self.db.get_overdue_loans(as_of=datetime.now() + timedelta(days=Config.LOAN_PERIOD_DAYS + 1))
+        self.assertEqual([loan['isbn'] for loan in late], ["0306406152", "1234567892"])
+
+        with self.db.pool.get_connection() as conn:
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE return_date IS NULL AND due_date < ?",
+                ("2030-01-01 00:00:00",)))
+            self.assertIn("idx_transactions_due", plan)
+
+            # Rows from before the migration are backfilled when it runs
+            conn.execute("UPDATE transactions SET due_date = NULL")
+            conn.execute("DELETE FROM schema_version WHERE version >= 6")
+            # The backfill commits chunk by chunk rather than in one transaction
+            statements = []
+            conn.set_trace_callback(statements.append)
+            with patch('migrations.BACKFILL_CHUNK_SIZE', 1):
+                apply_migrations(conn)
+            conn.set_trace_callback(None)
+            self.assertEqual(conn.execute(
+                "SELECT COUNT(*) FROM transactions WHERE due_date IS NULL").fetchone()[0], 0)
+            chunks = [i for i, sql in enumerate(statements) if "SET due_date" in sql]
+            self.assertGreater(len(chunks), 1)
+            for start, end in zip(chunks, chunks[1:]):
+                self.assertIn("COMMIT", statements[start:end])
+        late = self.db.get_overdue_loans(as_of=datetime.now() + timedelta(days=Config.LOAN_PERIOD_DAYS + 1))
+        self.assertEqual(len(late), 2)
 
     def test_category_management(self):
         """Test category management functionality"""
@@ -296,6 +847,58 @@ class TestLibrarySystem(unittest.TestCase):
         category_counts = self.db.get_books_by_category()
         self.assertGreaterEqual(len(category_counts), len(categories))
 
+    def test_lookup_cache(self):
+        """Test cached lookups, invalidation on writes and hit/miss stats"""
+        self.db.add_book("Cached Book", "Author", "9781234567897", 2, "Cache")
+        self.db.add_member("Cache Member", "cache@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+
+        book = self.db.get_book_by_isbn("9781234567897")
+        book['available'] = 99  # Callers get copies
+        self.assertEqual(self.db.get_book("9781234567897")['available'], 2)
+        self.assertEqual(self.db.get_member(member_id)['name'], "Cache Member")
+        self.db.get_member(member_id)
+        stats = self.db.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+        # Writes through the handler invalidate stale entries
+        self.db.issue_book(member_id, "9781234567897")
+        self.assertEqual(self.db.get_book_by_isbn("9781234567897")['available'], 1)
+        self.assertIn("Cache", self.db.get_categories())
+        self.db.add_book("Other Book", "Author", "0306406152", 1, "Fresh")
+        self.assertIn("Fresh", self.db.get_categories())
+        self.db.add_books_bulk([{'title': "Cached Book", 'author': "Author",
+                                 'isbn': "9781234567897", 'quantity': 5, 'category': "Bulk"}])
+        self.assertEqual(self.db.get_book_by_isbn("9781234567897")['available'], 4)
+
+        # Missing rows are not cached
+        misses = self.db.cache_stats()['misses']
+        self.assertIsNone(self.db.get_member(999))
+        self.assertIsNone(self.db.get_member(999))
+        self.assertEqual(self.db.cache_stats()['misses'], misses + 2)
+
+    def test_ttl_cache_expiry_and_eviction(self):
+        """Test TTLCache expiry, LRU bound and stale-load protection"""
+        now = [0.0]
+        cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)  # Evicts 'b', the least recently used
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        stats = cache.stats()
+        self.assertEqual((stats['evictions'], stats['expirations']), (1, 1))
+
+        # A load racing with an invalidation is not stored
+        def loader():
+            cache.invalidate('d')
+            return 'stale'
+        self.assertEqual(cache.get_or_load('d', loader), 'stale')
+        self.assertIsNone(cache.get('d'))
+
     def test_search_functionality(self):
         """Test search functionality with filters"""
         # Add test books
@@ -326,6 +929,43 @@ class TestLibrarySystem(unittest.TestCase):
         results = self.db.search_books("Programming")
         self.assertEqual(len(results), 2)
 
+    def test_full_text_search(self):
+        """Test FTS5-backed search ranking, prefixes and index sync"""
+        if not self.db.has_fts:
+            self.skipTest("SQLite build has no FTS5")
+        self.db.add_book(title="Python Cookbook", author="David Beazley",
+                         isbn="1234567806", quantity=1, category="Python")
+        self.db.add_book(title="Learning Python", author="Mark Lutz",
+                         isbn="1234567807", quantity=1, category="Programming")
+        self.db.add_book(title="Gardening Basics", author="Pat Green",
+                         isbn="1234567808", quantity=1, category="Hobby")
+
+        # Prefix query; title and category matches rank first
+        results = self.db.search_books("pyth")
+        self.assertEqual([b['isbn'] for b in results], ["1234567806", "1234567807"])
+        self.assertEqual(len(self.db.search_books("123456780")), 3)
+        self.assertEqual(self.db.search_books('"garden*('), self.db.search_books("garden"))
+        # Keyset pages keep relevance order rather than falling back to title order
+        page = self.db.search_books_page("pyth", limit=1)
+        self.assertEqual([b['isbn'] for b in page['items']], ["1234567806"])
+        self.assertNotIn('rank', page['items'][0])
+        page = self.db.search_books_page("pyth", limit=1, cursor=page['next_cursor'])
+        self.assertEqual([b['isbn'] for b in page['items']], ["1234567807"])
+        self.assertIsNone(page['next_cursor'])
+
+        # Updates through the bulk upsert keep the index in sync
+        self.db.add_books_bulk([{'title': "Vegetable Gardens", 'author': "Pat Green",
+                                 'isbn': "1234567808", 'quantity': 1, 'category': "Hobby"}])
+        self.assertEqual(self.db.search_books("basics"), [])
+        self.assertEqual(len(self.db.search_books("vegetable")), 1)
+
+    def test_search_like_fallback(self):
+        """Test search falls back to LIKE when FTS5 is unavailable"""
+        self.db.add_book(title="Fallback Search", author="Test Author",
+                         isbn="1234567809", quantity=1, category="Test")
+        self.db.has_fts = False
+        self.assertEqual(len(self.db.search_books("back Sea")), 1)
+
     def test_transaction_history(self):
         """Test transaction history tracking"""
         # Add test book and member
@@ -357,7 +997,7 @@ class TestLibrarySystem(unittest.TestCase):
     def test_notification_system(self):
         """Test notification system functionality"""
         # Setup notification system
-        notification = NotificationSystem(self.db)
+        notification = NotificationSystem(self.db, rate_limiter=RateLimiter(per_recipient=(100, 3600)))
         
         # Setup test data
         self.db.add_member(
@@ -389,10 +1029,143 @@ class TestLibrarySystem(unittest.TestCase):
             notification.notify_overdue_books([loan])
             self.assertTrue(instance.send_message.called)
 
-        # Test rate limiting
-        with self.assertRaises(Exception):
-            for _ in range(101):  # Exceed rate limit of 100 per hour
-                notification.notify_overdue_books([loan])
+            # Test rate limiting: the 101st notice to one recipient within the hour is throttled
+            reports = [notification.notify_overdue_books([loan]) for _ in range(100)]
+            self.assertEqual(sum(report['sent'] for report in reports), 99)
+            self.assertEqual(sum(report['throttled'] for report in reports), 1)
+            self.assertEqual(notification.rate_limiter.stats()['throttled'], 1)
+
+    def test_rate_limiter(self):
+        """Test token buckets per recipient, domain and globally"""
+        now = [0.0]
+        limiter = RateLimiter(per_recipient=(2, 60), per_domain=(3, 60), global_limit=(100, 60),
+                              clock=lambda: now[0])
+        self.assertTrue(limiter.acquire("a@example.com"))
+        self.assertTrue(limiter.acquire("A@Example.com"))
+        self.assertFalse(limiter.acquire("a@example.com"))
+        # The domain allows one more send, to another recipient
+        self.assertTrue(limiter.acquire("b@example.com"))
+        self.assertFalse(limiter.acquire("c@example.com"))
+        self.assertTrue(limiter.acquire("c@other.org"))
+        self.assertAlmostEqual(limiter.wait_time("a@example.com"), 30.0)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.check("a@example.com")
+
+        now[0] += 30
+        self.assertTrue(limiter.acquire("a@example.com"))
+        stats = limiter.stats()
+        self.assertEqual((stats['allowed'], stats['throttled']), (5, 3))
+
+        # Blocking acquire waits for a token until its deadline
+        limiter = RateLimiter(per_recipient=(1, 0.2), per_domain=(0, 1), global_limit=(0, 1))
+        self.assertTrue(limiter.acquire("a@example.com"))
+        self.assertFalse(limiter.acquire("a@example.com", timeout=0.05))
+        self.assertTrue(limiter.acquire("a@example.com", timeout=1))
+        self.assertEqual(limiter.stats()['waited'], 1)
+
+        # Concurrent sends never exceed the global allowance
+        limiter = RateLimiter(per_recipient=(0, 1), per_domain=(0, 1), global_limit=(200, 3600))
+        allowed = []
+        def send(worker):
+            allowed.extend(limiter.acquire(f"r{worker}-{i}@example.com") for i in range(50))
+        threads = [threading.Thread(target=send, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(allowed), 200)
+
+    def test_overdue_notice_pipeline(self):
+        """Test overdue notices batch their lookups and share pooled SMTP sessions"""
+        server = StubSMTPServer()
+        self.addCleanup(server.close)
+
+        self.db.add_book("Pipeline Book", "Author", "1234567897", 10, "Test")
+        self.db.add_book("Other Book", "Author", "0306406152", 10, "Test")
+        emails = [f"reader{i}@example.com" for i in range(6)]
+        for i, email in enumerate(emails):
+            self.db.add_member(f"Reader {i}", email, "1234567890")
+        for member in self.db.get_all_members():
+            self.db.issue_books(member['id'], ["1234567897", "0306406152"])
+
+        overdue = self.db.get_overdue_loans(as_of=datetime.now() + timedelta(days=30))
+        self.assertEqual(len(overdue), 12)
+        # Bare loans, as queued by other callers, plus one for an unknown member
+        loans = [{'member_id': loan['member_id'], 'isbn': loan['isbn'], 'due_date': loan['due_date']}
+                 for loan in overdue]
+        loans.append({'member_id': 999, 'isbn': "1234567897", 'due_date': datetime.now()})
+
+        notification = NotificationSystem(self.db)
+        with patch.multiple(Config, SMTP_SERVER='127.0.0.1', SMTP_PORT=server.port, SMTP_USE_TLS=False,
+                            SMTP_USER='', NOTIFY_WORKERS=3, SMTP_POOL_SIZE=2), \
+                patch.object(self.db, 'get_loan_contacts', wraps=self.db.get_loan_contacts) as lookup:
+            report = notification.notify_overdue_books(loans)
+
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual((report['total'], report['sent'], report['failed'], report['skipped']), (13, 12, 0, 1))
+        self.assertEqual(sorted(server.recipients), sorted(emails * 2))
+        self.assertLessEqual(server.connections, 2)
+        self.assertEqual(server.logins, 0)
+
+    def test_notification_outbox(self):
+        """Test overdue notices are queued transactionally and drained with backoff"""
+        import socket
+        from outbox import OutboxDispatcher, enqueue
+        server = StubSMTPServer()
+        self.addCleanup(server.close)
+
+        self.db.add_book("Outbox Book", "Author", "1234567897", 1, "Test")
+        self.db.add_member("Outbox Reader", "outbox@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+        self.db.issue_book(member_id, "1234567897")
+        loans = self.db.get_overdue_loans(as_of=datetime.now() + timedelta(days=30))
+
+        notification = NotificationSystem(self.db)
+        self.assertEqual(notification.queue_overdue_notices(loans)['queued'], 1)
+        # Checking again the same day does not queue a second notice
+        self.assertEqual(notification.queue_overdue_notices(loans)['duplicates'], 1)
+        self.assertEqual(self.db.execute_query("SELECT status FROM transactions")[0]['status'], 'overdue')
+
+        now = [datetime.now()]
+        dispatcher = OutboxDispatcher(self.db, max_attempts=2, backoff=60, clock=lambda: now[0])
+        self.assertEqual(dispatcher.status()['pending'], 1)
+        with patch.multiple(Config, SMTP_SERVER='127.0.0.1', SMTP_PORT=server.port,
+                            SMTP_USE_TLS=False, SMTP_USER=''):
+            self.assertEqual(dispatcher.dispatch_once()['sent'], 1)
+        self.assertEqual(server.recipients, ["outbox@example.com"])
+        status = dispatcher.status()
+        self.assertEqual((status['pending'], status['sent'], status['dead']), (0, 1, 0))
+
+        # An unreachable server backs off, then dead-letters after max_attempts
+        self.db.run_write(lambda conn: enqueue(conn, "test:1", "reader@example.com", "Subject", "Body"))
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            closed_port = probe.getsockname()[1]
+        dispatcher.stop()
+        with patch.multiple(Config, SMTP_SERVER='127.0.0.1', SMTP_PORT=closed_port,
+                            SMTP_USE_TLS=False, SMTP_USER=''):
+            self.assertEqual(dispatcher.dispatch_once()['retried'], 1)
+            self.assertEqual(dispatcher.dispatch_once()['claimed'], 0)
+            self.assertEqual(dispatcher.status()['due'], 0)
+            now[0] += timedelta(seconds=61)
+            self.assertEqual(dispatcher.dispatch_once()['dead'], 1)
+        status = dispatcher.status()
+        self.assertEqual((status['pending'], status['dead']), (0, 1))
+        self.assertEqual(status['retried'], 1)
+
+        # Sent messages are purged after the retention period; dead letters stay
+        def outbox_statuses():
+            return sorted(row['status'] for row in self.db.execute_query("SELECT status FROM outbox"))
+        self.assertEqual(dispatcher.purge_sent(), 0)
+        now[0] += timedelta(days=Config.OUTBOX_RETENTION_DAYS + 1)
+        with patch('outbox.PURGE_CHUNK_SIZE', 1):
+            self.assertEqual(dispatcher.purge_sent(), 1)
+        self.assertEqual(outbox_statuses(), ['dead'])
+        self.assertEqual(dispatcher.status()['purged'], 1)
+        with self.db.pool.get_connection() as conn:
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM outbox WHERE status = 'sent'"))
+        self.assertIn("idx_outbox_status", plan)
 
     def test_session_management(self):
         """Test session management"""
@@ -413,6 +1186,53 @@ class TestLibrarySystem(unittest.TestCase):
         session.refresh()
         self.assertTrue(session.is_valid())
 
+    def test_session_tokens(self):
+        """Test signed session tokens, the verification cache and sliding refresh"""
+        user = self.db.authenticate_user("1", "1")
+        token = user['token']
+        session = Session(user)
+        self.assertEqual(session.token, token)
+        self.assertNotIn('token', session.get_user())
+
+        self.assertEqual(self.db.session_tokens.get_user(token),
+                         {'id': user['id'], 'username': "1", 'role': user['role']})
+        self.assertIsNotNone(self.db.session_tokens.verify(token))
+        self.assertGreaterEqual(self.db.session_tokens.stats()['hits'], 1)
+
+        # Tampered or foreign tokens are rejected
+        self.assertIsNone(self.db.session_tokens.verify(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')))
+        self.assertIsNone(SessionTokens(secret="other-secret-" + "x" * 32).verify(token))
+        self.assertIsNone(self.db.session_tokens.verify("not-a-token"))
+
+        now = [1_000_000.0]
+        tokens = SessionTokens(secret="test-secret-" + "x" * 32, timeout=600, refresh_after=300, clock=lambda: now[0])
+        token = tokens.issue(user)
+        self.assertEqual(tokens.refresh(token), token)
+        now[0] += 301
+        refreshed = tokens.refresh(token)
+        self.assertNotEqual(refreshed, token)
+        now[0] += 400
+        # Expiry is enforced even for cached tokens
+        self.assertIsNone(tokens.verify(token))
+        self.assertIsNone(tokens.refresh(token))
+        self.assertEqual(tokens.get_user(refreshed)['id'], user['id'])
+        now[0] += 600
+        self.assertIsNone(tokens.get_user(refreshed))
+
+        # No hardcoded fallback: short or missing secrets are refused
+        with self.assertRaises(ValueError):
+            SessionTokens(secret='MY_SUPER_SECRET_JWT_456!@#$%^&*')
+        with patch.object(Config, 'JWT_SECRET', ''):
+            with self.assertRaises(ValueError):
+                SessionTokens()
+            ephemeral = SessionTokens(allow_ephemeral=True)
+            self.assertTrue(ephemeral.ephemeral)
+            self.assertGreaterEqual(len(ephemeral.secret), 32)
+            self.assertNotEqual(ephemeral.secret, SessionTokens(allow_ephemeral=True).secret)
+        forged = jwt.encode({'sub': '1', 'username': "1", 'role': '1', 'iat': int(time.time()),
+                             'exp': int(time.time()) + 600}, 'x' * 32, algorithm='HS256')
+        self.assertIsNone(self.db.session_tokens.get_user(forged))
+
     def test_error_recovery(self):
         """Test error recovery scenarios"""
         # Test database connection loss
@@ -469,6 +1289,180 @@ class TestLibrarySystem(unittest.TestCase):
         
         root.destroy()
 
+    def test_main_window_services(self):
+        """Test the outbox dispatcher is started once across threads and stopped on close"""
+        window = MainWindow.__new__(MainWindow)
+        window.db = self.db
+        window._services_lock = threading.Lock()
+        window._notification_system = None
+        window._outbox_dispatcher = None
+        window.books_table = window.members_table = None
+        window.tasks, window.root, window.app_root = Mock(), Mock(), Mock()
+
+        def slow_dispatcher(db):
+            time.sleep(0.05)
+            return Mock()
+
+        with patch('outbox.OutboxDispatcher', side_effect=slow_dispatcher) as factory:
+            threads = [threading.Thread(target=lambda: window.outbox_dispatcher) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(factory.call_count, 1)
+        dispatcher = window._outbox_dispatcher
+        dispatcher.start.assert_called_once()
+
+        window.close()
+        dispatcher.stop.assert_called_once()
+        window.tasks.shutdown.assert_called_once()
+        window.app_root.quit.assert_called_once()
+        self.assertIsNone(window._outbox_dispatcher)
+
+    def test_virtual_table_window(self):
+        """Test the table keeps a bounded window of pages and refetches dropped ones"""
+        from virtual_table import MAX_LOADED_PAGES, VirtualTable
+
+        class FakeTree:
+            def __init__(self):
+                self.rows, self.top, self.next_id = [], 0, 0
+            def insert(self, parent, index, values):
+                self.next_id += 1
+                iid = f"I{self.next_id}"
+                self.rows.insert(len(self.rows) if index == tk.END else index, (iid, values))
+                return iid
+            def delete(self, *iids):
+                self.rows = [row for row in self.rows if row[0] not in iids]
+            def get_children(self):
+                return tuple(iid for iid, _ in self.rows)
+            def exists(self, iid):
+                return iid in self.get_children()
+            def index(self, iid):
+                return self.get_children().index(iid)
+            def yview(self):
+                count = max(len(self.rows), 1)
+                return self.top / count, min((self.top + 20) / count, 1.0)
+            def yview_moveto(self, fraction):
+                self.top = round(fraction * len(self.rows))
+            def values(self):
+                return [values[0] for _, values in self.rows]
+            configure = heading = update_idletasks = lambda self, *args, **kwargs: None
+            winfo_exists = lambda self: True
+            winfo_ismapped = lambda self: False
+
+        class Tasks:
+            def submit(self, func, *args, on_success=None, on_error=None, channel=None, **kwargs):
+                on_success(func(*args, **kwargs))
+                return Mock()
+
+        def fetch_page(limit, cursor):
+            start = int(cursor) if cursor else 0
+            end = min(start + limit, 1000)
+            return {'items': [{'n': n} for n in range(start, end)],
+                    'next_cursor': str(end) if end < 1000 else None}
+
+        tree = FakeTree()
+        with patch('virtual_table.create_treeview', return_value=(Mock(), tree, Mock())):
+            table = VirtualTable(None, fetch_page, [('n', "N")], Tasks(), page_size=10)
+        for _ in range(9):
+            tree.top = len(tree.rows) - 20
+            table.load_more()
+        # Only the last MAX_LOADED_PAGES pages stay in the widget, viewport unmoved
+        self.assertEqual(table.row_count, MAX_LOADED_PAGES * 10)
+        self.assertEqual(tree.values(), list(range(100 - MAX_LOADED_PAGES * 10, 100)))
+        self.assertEqual(tree.values()[tree.top], 70)
+
+        tree.top = 0
+        table.load_previous()
+        self.assertEqual(tree.values(), list(range(90 - MAX_LOADED_PAGES * 10, 90)))
+        self.assertEqual(tree.values()[tree.top], 50)
+        self.assertEqual(table.next_cursor, "90")
+        table.load_more()
+        self.assertEqual(tree.values()[-1], 99)
+
+        table.reload()
+        self.assertEqual(tree.values(), list(range(10)))
+
+    def test_ui_task_runner(self):
+        """Test background tasks deliver on the main loop and stale results are dropped"""
+        import threading
+
+        class FakeRoot:
+            def __init__(self):
+                self.callbacks = []
+
+            def after(self, ms, func):
+                self.callbacks.append(func)
+
+            def pump(self, runner):
+                deadline = time.time() + 5
+                while runner.stats()['pending'] and time.time() < deadline:
+                    callbacks, self.callbacks = self.callbacks, []
+                    for func in callbacks:
+                        func()
+                    time.sleep(0.01)
+
+        root = FakeRoot()
+        runner = UITaskRunner(root, max_workers=2)
+        main_thread = threading.current_thread()
+        delivered, errors, threads = [], [], []
+
+        def work(value):
+            threads.append(threading.current_thread())
+            return value
+
+        runner.submit(work, 1, on_success=lambda v: delivered.append((v, threading.current_thread())))
+        runner.submit(self.db.issue_book, 999, "9781234567897", on_error=errors.append)
+        stale = threading.Event()
+        runner.submit(stale.wait, 5, on_success=delivered.append, channel='content')
+        runner.cancel('content')  # User navigated away
+        runner.submit(work, 2, on_success=lambda v: delivered.append((v, threading.current_thread())),
+                      channel='content')
+        stale.set()
+        root.pump(runner)
+
+        self.assertEqual(sorted(v for v, _ in delivered), [1, 2])
+        self.assertTrue(all(t is main_thread for _, t in delivered))
+        self.assertTrue(all(t is not main_thread for t in threads))
+        self.assertIsInstance(errors[0], ValidationError)
+        stats = runner.stats()
+        self.assertEqual((stats['delivered'], stats['failed'], stats['dropped'], stats['pending']),
+                         (2, 1, 1, 0))
+
+        # A future cancelled while queued is dropped without running
+        release = threading.Event()
+        runner.submit(release.wait, 5)
+        runner.submit(release.wait, 5)
+        queued = runner.submit(work, 3, on_success=delivered.append)
+        self.assertTrue(queued.cancel())
+        release.set()
+        root.pump(runner)
+        self.assertNotIn(3, delivered)
+        self.assertEqual(runner.stats()['pending'], 0)
+        runner.shutdown()
+
+    def test_startup_imports_are_deferred(self):
+        """Test importing the UI does not load matplotlib or the notification stack"""
+        import subprocess
+        import sys
+        from main import DEFERRED_MODULES, StartupProfiler
+
+        check = ("import sys, ui; "
+                 f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+        profiler = StartupProfiler(enabled=True)
+        with profiler.phase('DatabaseHandler()'):
+            pass
+        profiler.record('imports', 0.25)
+        report = profiler.report()
+        self.assertIn("DatabaseHandler()", report)
+        self.assertIn("imports", report)
+        self.assertEqual([name for name, _ in StartupProfiler().phases], [])
+
     def test_concurrent_operations(self):
         """Test concurrent database operations"""
         import threading
@@ -501,5 +1495,310 @@ class TestLibrarySystem(unittest.TestCase):
         isbns = [b['isbn'] for b in books]
         self.assertEqual(len(isbns), len(set(isbns)))  # No duplicates
 
+    def test_async_database_handler(self):
+        """Test the asyncio facade: concurrency, timeouts and cancellation"""
+        import asyncio
+        import threading
+
+        self.db.add_book("Async Book", "Author", "9781234567897", 3, "Async")
+        self.db.add_member("Async Member", "async@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+
+        async def scenario():
+            adb = AsyncDatabaseHandler(self.db, max_workers=2)
+            results = await asyncio.gather(
+                adb.issue_book(member_id, "9781234567897"),
+                adb.search_books("Async"),
+                adb.get_dashboard_snapshot())
+            self.assertEqual(results[1][0]['title'], "Async Book")
+            self.assertEqual(results[2]['total_books'], 1)
+            with self.assertRaises(ValidationError):
+                await adb.issue_book(999, "9781234567897")
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await adb.run(time.sleep, 0.3, timeout=0.05)
+
+            # A queued call is dropped when its task is cancelled
+            release = threading.Event()
+            ran = []
+            blockers = [asyncio.ensure_future(adb.run(release.wait, 5)) for _ in range(2)]
+            queued = asyncio.ensure_future(adb.run(ran.append, True))
+            await asyncio.sleep(0.05)
+            queued.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+            release.set()
+            await asyncio.gather(*blockers)
+            self.assertEqual(ran, [])
+
+            stats = adb.stats()
+            self.assertEqual((stats['timeouts'], stats['cancelled'], stats['in_flight']), (1, 1, 0))
+            await adb.close()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.db.get_active_loans(), 1)
+
+    def test_synthetic_data_generator(self):
+        """Test generated data is reproducible and leaves triggers, indexes and counters intact"""
+        from datagen import DatasetSpec, generate
+
+        def schema():
+            return self.db.execute_query(
+                "SELECT type, name FROM sqlite_master WHERE type IN ('index', 'trigger') ORDER BY name")
+
+        before = schema()
+        spec = DatasetSpec(books=500, members=50, loans=3000, open_share=0.2)
+        now = datetime(2026, 3, 1, 12, 0, 0)
+        report = generate(self.db, spec, seed=7, now=now)
+        self.assertEqual(schema(), before)
+        self.assertEqual(self.db.get_dashboard_snapshot()['active_loans'], report['open_loans'])
+        self.assertEqual(self.db.get_total_books(), 500)
+        self.assertEqual(len(self.db.get_overdue_loans(as_of=now)), report['overdue_loans'])
+        self.assertEqual(self.db.execute_query("SELECT COUNT(*) AS n FROM books WHERE available < 0")[0]['n'], 0)
+        self.assertTrue(self.db.search_books(self.db.get_book_by_isbn(
+            self.db.execute_query("SELECT isbn FROM books WHERE id = 1")[0]['isbn'])['title']))
+
+        # Triggers are back: circulation keeps the counters in step
+        loan = self.db.execute_query("""
+            SELECT t.member_id, b.isbn FROM transactions t JOIN books b ON b.id = t.book_id
+            WHERE t.return_date IS NULL LIMIT 1
+        """)[0]
+        self.db.return_book(loan['member_id'], loan['isbn'])
+        self.assertEqual(self.db.get_active_loans(), report['open_loans'] - 1)
+
+        with self.assertRaises(ValidationError):
+            generate(self.db, spec, seed=7, now=now)
+
+        def rows():
+            return [tuple(row.values()) for row in self.db.execute_query(
+                "SELECT book_id, member_id, issue_date, due_date FROM transactions ORDER BY id LIMIT 50")]
+
+        first = rows()
+        self.db.run_write(lambda conn: [conn.execute(f"DELETE FROM {table}")
+                                        for table in ('transactions', 'books', 'members')])
+        self.assertEqual(generate(self.db, spec, seed=7, now=now)['open_loans'], report['open_loans'])
+        self.assertEqual(rows(), first)
+
+    def test_benchmark_suite(self):
+        """Test the benchmark runner on a tiny database"""
+        import tempfile
+        from bench.run import HEAVY_OPERATIONS, OPERATIONS, compare, parse_size, run_size
+
+        self.assertEqual([parse_size(size) for size in ("10k", "1M", "250")], [10_000, 1_000_000, 250])
+        with tempfile.TemporaryDirectory() as workdir:
+            run = run_size(300, workdir, iterations=5, heavy_iterations=2)
+        self.assertEqual(Config.DB_PATH, 'test_library.db')
+        self.assertEqual(run['rows'], {'books': 300, 'members': 100, 'loans': 300})
+        self.assertEqual(list(run['results']), list(OPERATIONS))
+        for name, result in run['results'].items():
+            self.assertEqual(result['iterations'], 2 if name in HEAVY_OPERATIONS else 5, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        report = {'runs': [run]}
+        self.assertEqual(len(compare(report, report)), len(OPERATIONS))
+
+    def test_api_server(self):
+        """Test the JSON API: token auth, keep-alive, circulation endpoints and errors"""
+        import asyncio
+        import http.client
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+        from api_server import ApiServer
+
+        self.db.add_book("API Book", "Author", "9781234567897", 2, "API")
+        self.db.add_member("API Member", "api@example.com", "1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        # Refuses to start without a configured secret
+        with patch.object(Config, 'JWT_SECRET', ''):
+            with self.assertRaises(ValueError):
+                ApiServer(self.db, port=0)
+        with self.assertRaises(ValueError):
+            ApiServer(self.db, port=0, tokens=self.db.session_tokens)
+
+        with patch.object(Config, 'JWT_SECRET', "api-test-secret-" + "x" * 32):
+            server = ApiServer(self.db, host='127.0.0.1', port=0, request_timeout=5)
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+
+        def call(conn, method, path, body=None, token=None):
+            headers = {'Authorization': f"Bearer {token}"} if token else {}
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+        try:
+            self.assertEqual(call(conn, 'GET', '/health')[0], 200)
+            self.assertEqual(call(conn, 'GET', '/api/books')[0], 401)
+            self.assertEqual(call(conn, 'POST', '/api/login', {'username': "1", 'password': "wrong"})[0], 401)
+            status, login = call(conn, 'POST', '/api/login', {'username': "1", 'password': "1"})
+            self.assertEqual(status, 200)
+            token = login['token']
+            self.assertEqual(call(conn, 'GET', '/api/books', token="forged")[0], 401)
+            # A token signed with the old hardcoded default secret is not accepted
+            with self.assertWarns(jwt.warnings.InsecureKeyLengthWarning):
+                forged = jwt.encode({'sub': '1', 'username': "1", 'role': '1', 'iat': int(time.time()),
+                                     'exp': int(time.time()) + 600},
+                                    'MY_SUPER_SECRET_JWT_456!@#$%^&*', algorithm='HS256')
+            self.assertEqual(call(conn, 'POST', '/api/loans', {'member_id': member_id,
+                                                                'isbn': "9781234567897"}, token=forged)[0], 401)
+
+            status, page = call(conn, 'GET', '/api/books?q=API', token=token)
+            self.assertEqual([book['isbn'] for book in page['items']], ["9781234567897"])
+            self.assertEqual(call(conn, 'GET', '/api/books/9781234567897', token=token)[1]['title'], "API Book")
+            self.assertEqual(call(conn, 'GET', f'/api/members/{member_id}', token=token)[1]['email'],
+                             "api@example.com")
+            self.assertEqual(call(conn, 'GET', '/api/members/99999', token=token)[0], 404)
+            self.assertEqual(call(conn, 'GET', '/api/members?q=api@', token=token)[1]['items'][0]['id'],
+                             member_id)
+
+            loan = {'member_id': member_id, 'isbn': "9781234567897"}
+            self.assertEqual(call(conn, 'POST', '/api/loans', loan, token)[0], 201)
+            self.assertEqual(call(conn, 'POST', '/api/loans', dict(loan, member_id=999), token),
+                             (400, {'error': "Member does not exist"}))
+            self.assertEqual(call(conn, 'GET', '/api/overdue', token=token), (200, {'items': []}))
+            self.assertEqual(call(conn, 'POST', '/api/returns', loan, token)[0], 200)
+            self.assertEqual(self.db.get_book_by_isbn("9781234567897")['available'], 2)
+
+            # Malformed bodies are a 400, not a 500 or per-character results
+            for path, body in [('/api/loans', {'isbn': "9781234567897"}),
+                               ('/api/loans', {'member_id': "x", 'isbn': "9781234567897"}),
+                               ('/api/loans', {'member_id': True, 'isbn': "9781234567897"}),
+                               ('/api/loans', {'member_id': member_id}),
+                               ('/api/loans', {'member_id': member_id, 'isbns': "9781234567897"}),
+                               ('/api/loans', {'member_id': member_id, 'isbns': [9781234567897]}),
+                               ('/api/returns', {'items': [1]}),
+                               ('/api/returns', {'items': [{'member_id': member_id}]}),
+                               ('/api/returns', {'items': {'member_id': member_id}})]:
+                status, payload = call(conn, 'POST', path, body, token)
+                self.assertEqual(status, 400, (path, body, payload))
+            self.assertEqual(self.db.get_book_by_isbn("9781234567897")['available'], 2)
+
+            self.assertEqual(call(conn, 'DELETE', '/api/loans', token=token)[0], 405)
+            self.assertEqual(call(conn, 'GET', '/missing')[0], 404)
+            # Every request so far reused one keep-alive connection
+            self.assertEqual(server.stats()['connections'], 1)
+
+            def search(_):
+                client = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+                try:
+                    return [call(client, 'GET', '/api/books?q=API', token=token)[0] for _ in range(5)]
+                finally:
+                    client.close()
+
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                statuses = [status for batch in executor.map(search, range(10)) for status in batch]
+            self.assertEqual(statuses, [200] * 50)
+            self.assertEqual(server.stats()['connections'], 11)
+        finally:
+            conn.close()
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+    def test_group_commit_writer(self):
+        """Test the single writer batches queued writes and isolates failures"""
+        import threading
+        from db_writer import DatabaseWriter
+
+        writer = DatabaseWriter(self.db.pool._connect)
+        self.addCleanup(writer.close)
+        started, release = threading.Event(), threading.Event()
+
+        def blocking(conn):
+            started.set()
+            release.wait(2)
+            conn.execute("INSERT INTO members (name, email, phone) VALUES ('Writer 0', 'w0@test.com', '1234567890')")
+
+        def failing(conn):
+            conn.execute("INSERT INTO members (name, email, phone) VALUES ('Writer 2', 'w2@test.com', '1234567890')")
+            raise ValidationError("rejected")
+
+        first = writer.submit(blocking)
+        self.assertTrue(started.wait(2))
+        # Queued while the first transaction is open, so they commit together
+        second = writer.submit(lambda conn: conn.execute(
+            "INSERT INTO members (name, email, phone) VALUES ('Writer 1', 'w1@test.com', '1234567890')").lastrowid)
+        third = writer.submit(failing)
+        release.set()
+
+        self.assertIsNone(first.result(2))
+        self.assertIsInstance(second.result(2), int)
+        with self.assertRaises(ValidationError):
+            third.result(2)
+        names = {m['name'] for m in self.db.get_all_members()}
+        self.assertEqual(names, {'Writer 0', 'Writer 1'})
+        stats = writer.stats()
+        self.assertEqual((stats['requests'], stats['batches'], stats['max_batch']), (3, 2, 2))
+        writer.close()
+
+        # A batch that cannot take the write lock is retried, then fails every request
+        def connect():
+            conn = self.db.pool._connect()
+            conn.execute("PRAGMA busy_timeout = 50")
+            return conn
+        writer = DatabaseWriter(connect)
+        self.addCleanup(writer.close)
+        insert = lambda conn: conn.execute(
+            "INSERT INTO members (name, email, phone) VALUES ('Locked', 'locked@test.com', '1234567890')").lastrowid
+        holder = sqlite3.connect(Config.DB_PATH, isolation_level=None)
+        self.addCleanup(holder.close)
+        with patch('db_writer.BUSY_BACKOFF', 0.01):
+            holder.execute("BEGIN IMMEDIATE")
+            futures = [writer.submit(insert) for _ in range(3)]
+            for future in futures:
+                with self.assertRaises(sqlite3.OperationalError):
+                    future.result(3)
+            self.assertEqual(writer.stats()['failed_batches'], 1)
+            holder.rollback()
+
+            # Released during the backoff: the retry commits
+            with patch('db_writer.BUSY_BACKOFF', 0.2):
+                holder.execute("BEGIN IMMEDIATE")
+                future = writer.submit(insert)
+                time.sleep(0.1)
+                holder.rollback()
+                self.assertIsInstance(future.result(3), int)
+        writer.close()
+
+class TestLibrarySystemSerializedWrites(TestLibrarySystem):
+    """Run the full suite with writes routed through the single writer thread"""
+    def setUp(self):
+        patcher = patch.object(Config, 'DB_SERIALIZE_WRITES', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+        self.assertIsNotNone(self.db.writer)
+
+    def test_concurrent_circulation(self):
+        """Test concurrent desk writes never surface 'database is locked'"""
+        import threading
+        for i in range(10):
+            self.db.add_book(title=f"Desk Book {i}", author="Test Author",
+                             isbn=f"12345678{i:02d}", quantity=1, category="Desk")
+        self.db.add_member(name="Desk Member", email="desk@test.com", phone="1234567890")
+        member_id = self.db.get_all_members()[0]['id']
+        errors = []
+
+        def circulate(i):
+            try:
+                self.db.issue_book(member_id, f"12345678{i:02d}")
+                self.db.return_book(member_id, f"12345678{i:02d}")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=circulate, args=(i,)) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.db.get_available_books(), 10)
+        self.assertGreaterEqual(self.db.writer.stats()['requests'], 31)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
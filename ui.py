@@ -1,20 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, List, Union, Optional, cast
+import base64
 import logging
+import threading
 from config import Config
-from database import DatabaseHandler
+from database import DatabaseHandler, BOOK_SORT_COLUMNS, MEMBER_SORT_COLUMNS
 from session import Session
 from utils import (
     hash_password, validate_email, validate_phone, 
     validate_isbn, create_loading_indicator,
-    show_status_message, create_tooltip
+    show_status_message, create_tooltip, create_treeview
 )
-from matplotlib.figure import Figure
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-from notification import NotificationSystem
+from task_runner import UITaskRunner
+from chart_service import ChartService
+from virtual_table import VirtualTable
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -27,10 +28,11 @@ try:
 except ImportError:
     print("ttkthemes not found - using default theme")
 
-try:
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-except ImportError:
-    print("matplotlib not found - charts will be disabled")
+# The notification stack is imported on first use, and matplotlib only on a
+# chart worker thread, so the login window only pays for Tk
+
+# Seconds closing the main window waits for an outbox batch in progress
+OUTBOX_STOP_TIMEOUT = 5
 
 class ValidationError(Exception):
     """Custom exception for validation errors"""
@@ -296,6 +298,7 @@ class UIBase(SafeWidgetMixin):
         if "Books" in title: return "📚"
         if "Members" in title: return "👥"
         if "Loans" in title: return "📋"
+        if "Notices" in title: return "✉️"
         return "📊"
 
     def create_table(self, parent: ttk.Frame, data: List[Dict[str, Any]], headers: Optional[List[str]] = None) -> None:
@@ -304,24 +307,15 @@ class UIBase(SafeWidgetMixin):
             ttk.Label(parent, text="No data to display").pack()
             return
             
-        # If headers not provided, use dictionary keys from first row
+        # If headers not provided, use dictionary keys from first row;
+        # a header like 'Join Date' maps to the 'join_date' key
         table_headers: List[str] = headers if headers is not None else list(data[0].keys())
-        table_frame = ttk.Frame(parent)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        # Create headers
-        for i, header in enumerate(table_headers):
-            ttk.Label(table_frame, 
-                    text=header.title(),
-                    font=(Config.FONT_FAMILY, 10, 'bold')).grid(
-                        row=0, column=i, padx=5, pady=5, sticky='w')
-        
-        # Create rows
-        for i, row in enumerate(data, 1):
-            for j, (key, value) in enumerate(row.items()):
-                if key in table_headers:
-                    ttk.Label(table_frame, text=str(value)).grid(
-                        row=i, column=j, padx=5, pady=2, sticky='w')
+        columns = [(header.lower().replace(' ', '_'), header.title() if headers is None else header)
+                   for header in table_headers]
+        _, tree, _ = create_treeview(parent, columns, height=min(len(data), 20))
+        for row in data:
+            tree.insert('', tk.END, values=['' if row.get(key) is None else row.get(key)
+                                            for key, _ in columns])
 
     def safe_execute(self, operation, context: str = ""):
         """Execute UI operation with error handling"""
@@ -364,6 +358,7 @@ class LoginWindow(UIBase):
         self.db: DatabaseHandler = db
         # Don't create a new root window, use the passed one
         self.root = root
+        self.tasks = UITaskRunner(root)
         super().__init__(root)
         self.setup_login_window()
 
@@ -374,6 +369,7 @@ class LoginWindow(UIBase):
         
         main_frame = ttk.Frame(self.root, padding="30")
         main_frame.pack(fill=tk.BOTH, expand=True)
+        self.main_frame = main_frame
         
         # Logo
         ttk.Label(main_frame, text="📚", font=('Segoe UI', 48)).pack(pady=20)
@@ -412,7 +408,7 @@ class LoginWindow(UIBase):
         ttk.Button(parent, text="Sign In", command=self.login, style='Accent.TButton', width=20).pack(pady=20)
 
     def login(self) -> None:
-        """Handle login with enhanced security"""
+        """Handle login with enhanced security; credentials are checked off the UI thread"""
         def operation():
             try:
                 # Rate limiting check
@@ -431,42 +427,94 @@ class LoginWindow(UIBase):
                 if not password:
                     raise ValidationError("Password cannot be empty")
 
-                # Attempt authentication with timeout
-                user = self.db.authenticate_user(username, password)
-                
-                if user:
-                    logger.info(f"User {username} logged in successfully")
-                    MainWindow(self.root, self.db, Session(user))
-                    self.root.withdraw()
-                else:
-                    logger.warning(f"Failed login attempt for user {username}")
-                    show_status_message(self.root, "Invalid username or password", "error")
+                self.tasks.submit(self.db.authenticate_user, username, password,
+                                  on_success=lambda user: self._on_login_result(username, user),
+                                  on_error=self._on_login_error,
+                                  loading_parent=self.main_frame)
 
             except ValidationError as e:
                 show_status_message(self.root, str(e), "error")
-            except Exception as e:
-                logger.error(f"Login error: {e}")
-                show_status_message(self.root, "An error occurred during login", "error")
-                raise
                 
         self.safe_execute(operation, "login")
 
+    def _on_login_result(self, username: str, user: Optional[Dict[str, Any]]) -> None:
+        if user:
+            logger.info(f"User {username} logged in successfully")
+            MainWindow(self.root, self.db, Session(user))
+            self.root.withdraw()
+        else:
+            logger.warning(f"Failed login attempt for user {username}")
+            show_status_message(self.root, "Invalid username or password", "error")
+
+    def _on_login_error(self, error: Exception) -> None:
+        if isinstance(error, ValidationError):
+            show_status_message(self.root, str(error), "error")
+        else:
+            logger.error(f"Login error: {error}")
+            show_status_message(self.root, "An error occurred during login", "error")
+
 class MainWindow(UIBase):
     def __init__(self, root: tk.Tk, db: DatabaseHandler, session: Session):
         self.root: tk.Toplevel = tk.Toplevel()
+        self.app_root: tk.Tk = root
         self.db: DatabaseHandler = db
         self.session: Session = session
         self._is_dark_mode = False
-        self.notification_system: NotificationSystem = NotificationSystem(db)
-        self.current_page: int = 1
-        self.table_frame: Optional[ttk.Frame] = None
-        self.members_table: Optional[ttk.Treeview] = None
-        self.sort_var: tk.BooleanVar = tk.BooleanVar(value=False)
+        # The lazy services below are first used from task runner threads
+        self._services_lock = threading.Lock()
+        self._notification_system = None
+        self._outbox_dispatcher = None
+        self.books_frame: Optional[ttk.Frame] = None
+        self.books_table: Optional[VirtualTable] = None
+        self.members_table: Optional[VirtualTable] = None
+        self._member_search_after: Optional[str] = None
+        # Rendered off the UI thread and cached by data version
+        self.chart_service: ChartService = ChartService(db)
+        self._chart_key: Optional[tuple] = None
+        self._chart_image: Optional[tk.PhotoImage] = None
+        # Database calls run here; results for a view are dropped once it is left
+        self.tasks: UITaskRunner = UITaskRunner(self.root)
         super().__init__(self.root)
         self.setup_main_window()
         self.center_window()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.check_overdue_books()
 
+    @property
+    def notification_system(self):
+        """NotificationSystem, created (and its module imported) on first use"""
+        if self._notification_system is None:
+            with self._services_lock:
+                if self._notification_system is None:
+                    from notification import NotificationSystem
+                    self._notification_system = NotificationSystem(self.db)
+        return self._notification_system
+
+    @property
+    def outbox_dispatcher(self):
+        """Running OutboxDispatcher that delivers queued notices, started on first use"""
+        if self._outbox_dispatcher is None:
+            with self._services_lock:
+                if self._outbox_dispatcher is None:
+                    from outbox import OutboxDispatcher
+                    dispatcher = OutboxDispatcher(self.db)
+                    dispatcher.start()
+                    self._outbox_dispatcher = dispatcher
+        return self._outbox_dispatcher
+
+    def close(self) -> None:
+        """Stop background work and quit; claimed outbox messages retry after their lease"""
+        self.tasks.shutdown()
+        for table in (self.books_table, self.members_table):
+            if table is not None:
+                table.close()
+        with self._services_lock:
+            dispatcher, self._outbox_dispatcher = self._outbox_dispatcher, None
+        if dispatcher is not None:
+            dispatcher.stop(timeout=OUTBOX_STOP_TIMEOUT)
+        self.safe_destroy(self.root)
+        self.app_root.quit()
+
     def setup_main_window(self) -> None:
         """Setup the main window with proper dimensions"""
         self.root.title("Library Management System")
@@ -578,54 +626,55 @@ class MainWindow(UIBase):
         stats_frame = ttk.Frame(self.content_frame)
         stats_frame.pack(fill=tk.X, padx=20, pady=10)
         
-        try:
+        def load() -> Dict[str, Any]:
+            return {
+                'snapshot': self.db.get_dashboard_snapshot(),
+                'charts': self.chart_service.render(self._is_dark_mode),
+                'outbox': self.outbox_dispatcher.status(),
+                'activities': self.load_recent_activities()
+            }
+
+        def render(data: Dict[str, Any]) -> None:
+            snapshot = data['snapshot']
             stats = [
-                ("Total Books", self.db.get_total_books()),
-                ("Available Books", self.db.get_available_books()),
-                ("Total Members", self.db.get_total_members()),
-                ("Active Loans", self.db.get_active_loans())
+                ("Total Books", snapshot['total_books']),
+                ("Available Books", snapshot['available_books']),
+                ("Total Members", snapshot['total_members']),
+                ("Active Loans", snapshot['active_loans']),
+                ("Queued Notices", data['outbox']['pending'])
             ]
             
             for title, value in stats:
                 card = self.create_card(stats_frame, title, value)
                 card.pack(side=tk.LEFT, padx=10, pady=10, expand=True)
+            outbox = data['outbox']
+            create_tooltip(card, f"Oldest queued: {outbox['oldest_pending_seconds']:.0f}s\n"
+                                 f"Average delivery: {outbox['avg_latency_seconds']:.1f}s\n"
+                                 f"Failed permanently: {outbox['dead']}")
                 
             # Charts
-            if 'FigureCanvasTkAgg' in globals():
-                self.create_dashboard_charts()
+            if data['charts'] is not None:
+                self.show_dashboard_charts(*data['charts'])
             
             # Recent activities
-            self.show_recent_activities()
-            
-        except Exception as e:
+            self.show_recent_activities(data['activities'])
+
+        def failed(e: Exception) -> None:
             logger.error(f"Error loading dashboard: {e}")
             show_status_message(self.content_frame, "Error loading dashboard", "error")
 
-    def create_dashboard_charts(self) -> None:
+        self.tasks.submit(load, on_success=render, on_error=failed,
+                          channel='content', loading_parent=stats_frame)
+
+    def show_dashboard_charts(self, key: tuple, png: bytes) -> None:
+        """Show the pre-rendered chart PNG, reusing the PhotoImage if unchanged"""
         charts_frame = ttk.Frame(self.content_frame)
         charts_frame.pack(fill=tk.X, padx=20, pady=10)
-        
-        fig = Figure(figsize=(12, 4))
-        
-        # Books by category
-        categories = self.db.get_books_by_category()
-        ax1 = fig.add_subplot(121)
-        ax1.pie([count for _, count in categories], 
-                labels=[cat for cat, _ in categories],
-                autopct='%1.1f%%')
-        ax1.set_title('Books by Category')
-        
-        # Monthly loans trend
-        loans_data = self.db.get_monthly_loans()
-        ax2 = fig.add_subplot(122)
-        ax2.plot([date for date, _ in loans_data],
-                 [count for _, count in loans_data])
-        ax2.set_title('Monthly Loans Trend')
-        ax2.tick_params(axis='x', rotation=45)
-        
-        canvas = FigureCanvasTkAgg(fig, charts_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
+
+        if self._chart_image is None or key != self._chart_key:
+            self._chart_image = tk.PhotoImage(master=self.root, data=base64.b64encode(png))
+            self._chart_key = key
+        ttk.Label(charts_frame, image=self._chart_image).pack()
 
     def show_books(self) -> None:
         self.clear_content()
@@ -650,14 +699,19 @@ class MainWindow(UIBase):
         # Search
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
         self.search_var = tk.StringVar()
-        ttk.Entry(search_frame, textvariable=self.search_var, width=40).pack(side=tk.LEFT, padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind('<Return>', lambda event: self.search_books())
         
         # Category filter
         ttk.Label(search_frame, text="Category:").pack(side=tk.LEFT, padx=5)
         self.category_var = tk.StringVar(value="All")
-        ttk.Combobox(search_frame, textvariable=self.category_var,
-                    values=["All"] + self.db.get_categories(),
-                    state="readonly").pack(side=tk.LEFT, padx=5)
+        category_box = ttk.Combobox(search_frame, textvariable=self.category_var,
+                                    values=["All"], state="readonly")
+        category_box.pack(side=tk.LEFT, padx=5)
+        self.tasks.submit(self.db.get_categories,
+                          on_success=lambda categories: category_box.configure(values=["All"] + categories),
+                          channel='content')
         
         # Availability filter
         self.available_only = tk.BooleanVar()
@@ -668,13 +722,29 @@ class MainWindow(UIBase):
         ttk.Button(search_frame, text="Search",
                   command=self.search_books).pack(side=tk.LEFT, padx=5)
 
-    def display_books(self) -> None:
-        table_frame = ttk.Frame(self.content_frame)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=20)
-        
-        # Table headers
-        headers = ['Title', 'Author', 'ISBN', 'Category', 'Available', 'Actions']
-        self.create_table(table_frame, self.db.get_all_books(), headers)
+    def display_books(self, query: str = '') -> None:
+        """Show books matching query by relevance, or the full sortable listing when it is empty"""
+        if self.books_table is not None:
+            # Drop the previous query's in-flight and queued pages
+            self.books_table.close()
+        if self.books_frame is None or not self.books_frame.winfo_exists():
+            self.books_frame = ttk.Frame(self.content_frame)
+            self.books_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+        for widget in self.books_frame.winfo_children():
+            widget.destroy()
+
+        columns = [('title', 'Title'), ('author', 'Author'), ('isbn', 'ISBN'),
+                   ('category', 'Category'), ('available', 'Available')]
+        on_error = self._task_error_handler("Error loading books")
+        if query:
+            def fetch_page(limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+                return self.db.search_books_page(query, limit, cursor)
+
+            self.books_table = VirtualTable(self.books_frame, fetch_page, columns, self.tasks,
+                                            on_error=on_error)
+        else:
+            self.books_table = VirtualTable(self.books_frame, self.db.get_books_page, columns, self.tasks,
+                                            sortable=BOOK_SORT_COLUMNS, sort='title', on_error=on_error)
 
     def show_add_book(self) -> None:
         self.clear_content()
@@ -723,21 +793,17 @@ class MainWindow(UIBase):
                     'category': data['Category:']
                 })
                 
-                # Check for duplicate ISBN
-                if self.db.book_exists(validated_data['isbn']):
-                    raise ValidationError("A book with this ISBN already exists")
-
-                # Attempt database operation with transaction
-                self.db.add_book(**validated_data)
-                show_status_message(self.root, "Book added successfully!", "success")
-                self.clear_entries(self.book_entries)
+                # Duplicate ISBNs are rejected inside the write transaction
+                def added(_: None) -> None:
+                    show_status_message(self.root, "Book added successfully!", "success")
+                    self.clear_entries(self.book_entries)
+
+                self.tasks.submit(self.db.add_book, **validated_data, on_success=added,
+                                  on_error=self._task_error_handler("Failed to add book"),
+                                  loading_parent=self.content_frame)
                 
             except ValidationError as e:
                 show_status_message(self.root, str(e), "error")
-            except Exception as e:
-                logger.error(f"Error adding book: {e}")
-                show_status_message(self.root, "Failed to add book", "error")
-                raise
                 
         self.safe_execute(operation, "adding book")
 
@@ -759,15 +825,13 @@ class MainWindow(UIBase):
         ttk.Entry(search_frame, textvariable=self.member_search).pack(side=tk.LEFT, padx=5)
         ttk.Button(search_frame, text="Search",
                   command=self.search_members).pack(side=tk.LEFT, padx=5)
+        # Search as the user types, once typing pauses
+        self.member_search.trace_add('write', lambda *_: self._schedule_member_search())
 
         # Members table
-        try:
-            members = self.db.get_all_members()
-            headers = ['ID', 'Name', 'Email', 'Phone', 'Join Date', 'Actions']
-            self.create_table(self.content_frame, members, headers)
-        except Exception as e:
-            logger.error(f"Error loading members: {e}")
-            show_status_message(self.content_frame, "Error loading members", "error")
+        self.members_frame = ttk.Frame(self.content_frame)
+        self.members_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+        self.display_members()
 
     def show_add_member(self) -> None:
         self.clear_content()
@@ -809,17 +873,16 @@ class MainWindow(UIBase):
                     'phone': data['Phone:']
                 })
                 
-                # Attempt database operation
-                self.db.add_member(**validated_data)
-                show_status_message(self.root, "Member added successfully!", "success")
-                self.clear_member_entries()
+                def added(_: None) -> None:
+                    show_status_message(self.root, "Member added successfully!", "success")
+                    self.clear_member_entries()
+
+                self.tasks.submit(self.db.add_member, **validated_data, on_success=added,
+                                  on_error=self._task_error_handler("Failed to add member"),
+                                  loading_parent=self.content_frame)
                 
             except ValidationError as e:
                 show_status_message(self.root, str(e), "error")
-            except Exception as e:
-                logger.error(f"Error adding member: {e}")
-                show_status_message(self.root, "Failed to add member", "error")
-                raise
                 
         self.safe_execute(operation, "adding member")
 
@@ -860,18 +923,16 @@ class MainWindow(UIBase):
                 member_id = DataValidator.validate_integer(member_id, "Member ID", min_value=1)
                 isbn = DataValidator.validate_isbn(isbn)
 
-                # Attempt database operation
-                self.db.issue_book(member_id, isbn)
-                show_status_message(self.root, "Book issued successfully!", "success")
-                self.member_id_entry.delete(0, tk.END)
-                self.book_isbn_entry.delete(0, tk.END)
+                def issued(_: None) -> None:
+                    show_status_message(self.root, "Book issued successfully!", "success")
+                    self.clear_entries({'member': self.member_id_entry, 'isbn': self.book_isbn_entry})
+
+                self.tasks.submit(self.db.issue_book, member_id, isbn, on_success=issued,
+                                  on_error=self._task_error_handler("Failed to issue book"),
+                                  loading_parent=self.content_frame)
 
             except ValidationError as e:
                 show_status_message(self.root, str(e), "error")
-            except Exception as e:
-                logger.error(f"Error issuing book: {e}")
-                show_status_message(self.root, "Failed to issue book", "error")
-                raise
                 
         self.safe_execute(operation, "issuing book")
 
@@ -912,34 +973,55 @@ class MainWindow(UIBase):
                 member_id = DataValidator.validate_integer(member_id, "Member ID", min_value=1)
                 isbn = DataValidator.validate_isbn(isbn)
 
-                # Attempt database operation
-                self.db.return_book(member_id, isbn)
-                show_status_message(self.root, "Book returned successfully!", "success")
-                self.clear_return_entries()
+                def returned(_: None) -> None:
+                    show_status_message(self.root, "Book returned successfully!", "success")
+                    self.clear_return_entries()
+
+                self.tasks.submit(self.db.return_book, member_id, isbn, on_success=returned,
+                                  on_error=self._task_error_handler("Failed to return book"),
+                                  loading_parent=self.content_frame)
 
             except ValidationError as e:
                 show_status_message(self.root, str(e), "error")
-            except Exception as e:
-                logger.error(f"Error returning book: {e}")
-                show_status_message(self.root, "Failed to return book", "error")
-                raise
                 
         self.safe_execute(operation, "returning book")
 
     # Utility methods
     def clear_content(self) -> None:
+        # Results still loading for the old view must not render into the new one
+        self.tasks.cancel('content')
+        if self._member_search_after is not None:
+            self.root.after_cancel(self._member_search_after)
+            self._member_search_after = None
+        self.books_table = self.members_table = None
+        self.books_frame = None
         for widget in self.content_frame.winfo_children():
             widget.destroy()
 
     def clear_entries(self, entries: Dict) -> None:
         for entry in entries.values():
-            if hasattr(entry, 'delete'):
+            if hasattr(entry, 'delete') and entry.winfo_exists():
                 entry.delete(0, tk.END)
 
+    def _task_error_handler(self, message: str):
+        """Build an on_error callback that reports a failed background task"""
+        def handle(error: Exception) -> None:
+            if isinstance(error, ValidationError):
+                show_status_message(self.root, str(error), "error")
+            else:
+                logger.error(f"{message}: {error}")
+                show_status_message(self.root, message, "error")
+        return handle
+
     def check_overdue_books(self) -> None:
-        overdue_loans = self.db.get_overdue_loans()
-        if overdue_loans:
-            self.notification_system.notify_overdue_books(overdue_loans)
+        def run() -> None:
+            overdue_loans = self.db.get_overdue_loans()
+            if overdue_loans:
+                # Delivery happens on the dispatcher, so a slow SMTP server never blocks here
+                self.notification_system.queue_overdue_notices(overdue_loans)
+            self.outbox_dispatcher.wake()
+
+        self.tasks.submit(run, on_error=lambda e: logger.error(f"Overdue check failed: {e}"))
         self.root.after(24*60*60*1000, self.check_overdue_books)
 
     def toggle_theme(self) -> None:
@@ -965,41 +1047,62 @@ class MainWindow(UIBase):
         self.show_dashboard()
 
     def search_books(self) -> None:
-        """Search books based on current filters"""
-        if self.table_frame is None:
+        """Search books for the query; pages load on the task runner"""
+        if self.books_frame is None or not self.books_frame.winfo_exists():
             return
-            
-        # Clear previous results except headers
-        for widget in self.table_frame.winfo_children():
-            if type(widget) is not ttk.Label or widget.grid_info()['row'] != 0:
-                widget.destroy()
+        self.display_books(self.search_var.get().strip())
 
-        try:
-            query = self.search_var.get()
-            category = self.category_var.get()
-            available_only = self.available_only.get()
-            sort_by = self.sort_var.get()
-            
-            results = self.db.search_books(query, self.current_page)
-            self.display_books()  # Remove results parameter
-            
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            show_status_message(self.root, "Search failed", "error")
+    def _schedule_member_search(self) -> None:
+        """Debounce keystrokes so only the last query in a burst is sent"""
+        if self._member_search_after is not None:
+            self.root.after_cancel(self._member_search_after)
+        self._member_search_after = self.root.after(Config.SEARCH_DEBOUNCE_MS, self.search_members)
 
     def search_members(self) -> None:
         """Search members based on current query"""
+        if self._member_search_after is not None:
+            self.root.after_cancel(self._member_search_after)
+            self._member_search_after = None
         try:
-            query = self.member_search.get()
-            members = [m for m in self.db.get_all_members() 
-                      if query.lower() in m['name'].lower() or 
-                         query.lower() in m['email'].lower()]
-            self.display_members(members)
+            self.display_members(self.member_search.get().strip())
         except Exception as e:
             logger.error(f"Member search error: {e}")
             show_status_message(self.root, "Search failed", "error")
 
-    def show_recent_activities(self) -> None:
+    def display_members(self, query: str = '') -> None:
+        """Show members matching query, or the full sortable listing when it is empty"""
+        if self.members_table is not None:
+            # Drop the previous query's in-flight and queued pages
+            self.members_table.close()
+        for widget in self.members_frame.winfo_children():
+            widget.destroy()
+
+        columns = [('id', 'ID'), ('name', 'Name'), ('email', 'Email'),
+                   ('phone', 'Phone'), ('join_date', 'Join Date')]
+        on_error = self._task_error_handler("Error loading members")
+        if query:
+            def fetch_page(limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+                return self.db.search_members(query, limit, cursor)
+
+            self.members_table = VirtualTable(self.members_frame, fetch_page, columns, self.tasks,
+                                              on_error=on_error)
+        else:
+            self.members_table = VirtualTable(self.members_frame, self.db.get_members_page, columns,
+                                              self.tasks, sortable=MEMBER_SORT_COLUMNS, sort='id',
+                                              descending=True, on_error=on_error)
+
+    def load_recent_activities(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Fetch recent loans and returns; runs on a worker thread"""
+        try:
+            return {
+                'loans': self.db.get_loans(limit=5),
+                'returns': self.db.get_returns(limit=5)
+            }
+        except Exception as e:
+            logger.error(f"Error loading activities: {e}")
+            return None
+
+    def show_recent_activities(self, activities: Optional[Dict[str, List[Dict[str, Any]]]]) -> None:
         """Show recent library activities"""
         activities_frame = ttk.Frame(self.content_frame)
         activities_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -1009,9 +1112,10 @@ class MainWindow(UIBase):
                 font=(Config.FONT_FAMILY, 16, 'bold')).pack(pady=10)
         
         try:
-            # Use more basic database queries instead
-            loan_activities = self.db.get_loans(limit=5)  # Assuming this method exists
-            return_activities = self.db.get_returns(limit=5)  # Assuming this method exists
+            if activities is None:
+                raise RuntimeError("activities unavailable")
+            loan_activities = activities['loans']
+            return_activities = activities['returns']
             
             for activity in loan_activities:
                 activity_label = ttk.Label(
@@ -1,9 +1,10 @@
 import hashlib
 import re
 import logging
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Optional, List, Dict, Union
+from typing import Optional, List, Dict, Tuple, Union
 from datetime import datetime, timedelta
 from config import Config
 from argon2 import PasswordHasher
@@ -12,6 +13,15 @@ from argon2.exceptions import VerifyMismatchError, HashingError
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# One hasher for the process, tuned from Config. Each hash or verify takes
+# ARGON2_MEMORY_COST KiB, so concurrent calls are capped to bound memory use.
+PASSWORD_HASHER = PasswordHasher(
+    time_cost=Config.ARGON2_TIME_COST,
+    memory_cost=Config.ARGON2_MEMORY_COST,
+    parallelism=Config.ARGON2_PARALLELISM
+)
+_password_slots = threading.BoundedSemaphore(max(Config.PASSWORD_HASH_CONCURRENCY, 1))
+
 def hash_password(password: str) -> str:
     """Hash a password using Argon2"""
     if not isinstance(password, str):
@@ -20,26 +30,37 @@ def hash_password(password: str) -> str:
         raise ValueError("Password cannot be empty")
         
     try:
-        ph = PasswordHasher()
-        return ph.hash(password)
+        with _password_slots:
+            return PASSWORD_HASHER.hash(password)
     except HashingError as e:
         logger.error(f"Failed to hash password: {str(e)}")
         raise
 
 def verify_password(password: str, hash: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash
+
+    This is deliberately slow; call it from a worker thread, never the Tk thread.
+    """
     if not isinstance(password, str) or not isinstance(hash, str):
         raise TypeError("Password and hash must be strings")
     if not password or not hash:
         raise ValueError("Password and hash cannot be empty")
 
     try:
-        ph = PasswordHasher()
-        return ph.verify(hash, password)
+        with _password_slots:
+            return PASSWORD_HASHER.verify(hash, password)
     except Exception as e:
         logger.error(f"Password verification failed: {str(e)}")
         return False
 
+def password_needs_rehash(hash: str) -> bool:
+    """True when a hash was made with Argon2 parameters other than the configured ones"""
+    try:
+        return PASSWORD_HASHER.check_needs_rehash(hash)
+    except Exception as e:
+        logger.error(f"Could not inspect password hash: {str(e)}")
+        return False
+
 def validate_email(email: str) -> bool:
     if not isinstance(email, str):
         raise TypeError("Email must be a string")
@@ -155,6 +176,26 @@ def create_tooltip(widget: tk.Widget, text: str) -> None:
         logger.error(f"Failed to create tooltip: {str(e)}")
         raise
 
+def create_treeview(parent: tk.Widget, columns: List[Tuple[str, str]],
+                    height: int = 15) -> Tuple[ttk.Frame, ttk.Treeview, ttk.Scrollbar]:
+    """Create a scrollable Treeview with one (key, heading) pair per column
+
+    A Treeview is a single widget however many rows it holds, unlike a grid
+    of one Label per cell.
+    """
+    frame = ttk.Frame(parent)
+    frame.pack(fill=tk.BOTH, expand=True)
+    keys = [key for key, _ in columns]
+    tree = ttk.Treeview(frame, columns=keys, show='headings', height=height)
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    for key, heading in columns:
+        tree.heading(key, text=heading)
+        tree.column(key, anchor=tk.W, stretch=True)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    return frame, tree, scrollbar
+
 def create_table(parent: tk.Widget, data: List[Dict],
                  headers: Optional[List[str]] = None) -> ttk.Frame:
     if not isinstance(parent, tk.Widget):
@@ -169,20 +210,16 @@ def create_table(parent: tk.Widget, data: List[Dict],
         raise TypeError("All headers must be strings")
 
     try:
-        frame = ttk.Frame(parent)
-        frame.pack(fill=tk.BOTH, expand=True)
-
-        if headers:
-            for i, header in enumerate(headers):
-                ttk.Label(frame, text=header, 
-                         font=(Config.FONT_FAMILY, 10, "bold")).grid(
-                             row=0, column=i, padx=5, pady=5)
+        keys = list(data[0].keys())
+        headings = headers or keys
+        columns = [(f"col{i}", heading) for i, heading in enumerate(headings)]
+        frame, tree, _ = create_treeview(parent, columns, height=min(len(data), 20))
+
         for row_idx, row_data in enumerate(data, start=1):
             if not isinstance(row_data, dict):
                 raise TypeError(f"Row {row_idx} is not a dictionary")
-            for col_idx, (key, value) in enumerate(row_data.items()):
-                ttk.Label(frame, text=str(value)).grid(
-                    row=row_idx, column=col_idx, padx=5, pady=5)
+            values = [str(value) for value in row_data.values()]
+            tree.insert('', tk.END, values=values[:len(columns)])
 
         return frame
     except Exception as e:
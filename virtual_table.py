@@ -0,0 +1,174 @@
+import logging
+import tkinter as tk
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from config import Config
+from task_runner import UITaskRunner
+from utils import create_treeview
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Load the next page once the viewport is this close to the end of the loaded rows
+LOAD_AHEAD_FRACTION = 0.1
+# Pages held in the Treeview; pages further from the viewport are dropped and refetched
+MAX_LOADED_PAGES = 5
+
+class VirtualTable:
+    """Treeview listing that pages rows in from a keyset-paginated source
+
+    Pages are fetched on the task runner as the user scrolls towards either
+    end of the loaded rows, and the Treeview holds at most MAX_LOADED_PAGES
+    of them: scrolling down drops the first page, scrolling back up refetches
+    it from its remembered cursor and drops the last. Clicking a sortable
+    heading reloads the listing with the ORDER BY pushed down to SQL.
+
+    fetch_page is called as fetch_page(limit=, cursor=, sort=, descending=)
+    and must return {'items': [...], 'next_cursor': ...}.
+    """
+
+    def __init__(self, parent: tk.Widget, fetch_page: Callable[..., Dict[str, Any]],
+                 columns: List[Tuple[str, str]], tasks: UITaskRunner,
+                 sortable: Iterable[str] = (), sort: Optional[str] = None, descending: bool = False,
+                 page_size: Optional[int] = None, channel: str = 'content', height: int = 20,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.fetch_page = fetch_page
+        self.columns = columns
+        self.tasks = tasks
+        self.sortable = set(sortable)
+        self.sort = sort
+        self.descending = descending
+        self.page_size = page_size or Config.TABLE_PAGE_SIZE
+        self.channel = channel
+        self.on_error = on_error
+        self.frame, self.tree, self.scrollbar = create_treeview(parent, columns, height=height)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.next_cursor: Optional[str] = None
+        self.row_count = 0
+        # Item ids of the loaded pages, the first being page number _first_page
+        self._pages: Deque[List[str]] = deque()
+        self._first_page = 0
+        # _cursors[n] fetches page n
+        self._cursors: List[Optional[str]] = [None]
+        self._loading = False
+        self._future: Optional[Future] = None
+        # Bumped on reload so pages requested for an old sort order are ignored
+        self._request = 0
+
+        for key, heading in columns:
+            if key in self.sortable:
+                self.tree.heading(key, command=lambda k=key: self.sort_by(k))
+        self._update_headings()
+        self.reload()
+
+    def reload(self) -> None:
+        """Discard loaded rows and fetch the first page again"""
+        self._request += 1
+        self.tree.delete(*self.tree.get_children())
+        self.row_count = 0
+        self.next_cursor = None
+        self._pages.clear()
+        self._first_page = 0
+        self._cursors = [None]
+        self._loading = False
+        self._load(0)
+
+    def close(self) -> None:
+        """Ignore pages still in flight and drop a queued fetch before it runs"""
+        self._request += 1
+        if self._future is not None:
+            self._future.cancel()
+
+    def load_more(self) -> None:
+        if self.next_cursor and not self._loading:
+            self._load(self._first_page + len(self._pages))
+
+    def load_previous(self) -> None:
+        """Refetch the page before the first loaded one, if it was dropped"""
+        if self._first_page > 0 and not self._loading:
+            self._load(self._first_page - 1)
+
+    def sort_by(self, key: str) -> None:
+        """Sort by a column; clicking the current sort column flips the direction"""
+        if key not in self.sortable:
+            return
+        self.descending = not self.descending if key == self.sort else False
+        self.sort = key
+        self._update_headings()
+        self.reload()
+
+    def _load(self, number: int) -> None:
+        self._loading = True
+        request = self._request
+        kwargs: Dict[str, Any] = {'limit': self.page_size, 'cursor': self._cursors[number]}
+        if self.sort is not None:
+            kwargs.update(sort=self.sort, descending=self.descending)
+        if self._future is not None:
+            self._future.cancel()
+        self._future = self.tasks.submit(self.fetch_page, **kwargs,
+                          on_success=lambda page: self._add_page(request, number, page),
+                          on_error=lambda e: self._failed(request, e),
+                          channel=self.channel)
+
+    def _add_page(self, request: int, number: int, page: Dict[str, Any]) -> None:
+        if request != self._request or not self.tree.winfo_exists():
+            return
+        self._loading = False
+        keys = [key for key, _ in self.columns]
+        rows = [['' if item.get(key) is None else item.get(key) for key in keys] for item in page['items']]
+        anchor = self._top_item()
+        last = self._first_page + len(self._pages)
+        if number == last:
+            self._pages.append([self.tree.insert('', tk.END, values=values) for values in rows])
+            if len(self._cursors) == number + 1:
+                self._cursors.append(page['next_cursor'])
+            if len(self._pages) > MAX_LOADED_PAGES:
+                self.tree.delete(*self._pages.popleft())
+                self._first_page += 1
+        elif number == self._first_page - 1:
+            self._pages.appendleft([self.tree.insert('', index, values=values)
+                                    for index, values in enumerate(rows)])
+            self._first_page = number
+            if len(self._pages) > MAX_LOADED_PAGES:
+                self.tree.delete(*self._pages.pop())
+        else:
+            return
+        self.row_count = sum(len(ids) for ids in self._pages)
+        self.next_cursor = self._cursors[self._first_page + len(self._pages)]
+        # Rows added or dropped above the viewport would otherwise shift it
+        if anchor is not None and self.tree.exists(anchor):
+            self.tree.yview_moveto(self.tree.index(anchor) / max(self.row_count, 1))
+
+        # Keep loading until the viewport is full; an unmapped tree reports
+        # everything as visible, so only check once it is on screen
+        self.tree.update_idletasks()
+        if self.tree.winfo_ismapped() and self.tree.yview()[1] >= 1.0:
+            self.load_more()
+
+    def _top_item(self) -> Optional[str]:
+        """The first visible row"""
+        children = self.tree.get_children()
+        if not children:
+            return None
+        return children[min(int(float(self.tree.yview()[0]) * len(children)), len(children) - 1)]
+
+    def _failed(self, request: int, error: Exception) -> None:
+        if request != self._request:
+            return
+        self._loading = False
+        logger.error(f"Error loading table page: {error}")
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0 - LOAD_AHEAD_FRACTION:
+            self.load_more()
+        elif float(first) <= LOAD_AHEAD_FRACTION:
+            self.load_previous()
+
+    def _update_headings(self) -> None:
+        arrow = " ▼" if self.descending else " ▲"
+        for key, heading in self.columns:
+            self.tree.heading(key, text=heading + (arrow if key == self.sort else ""))